@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -110,6 +112,18 @@ DATABASES = {
 }
 
 
+# Cache
+# Caregiver dashboard/timeline responses are cached here. Multi-worker deployments
+# need a shared backend (e.g. Redis) so invalidations reach every process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'appeal-default',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -148,6 +162,9 @@ STATIC_URL = 'static/'
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Resumable evidence uploads send the chunk offset in a custom header
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset')
+CORS_EXPOSE_HEADERS = ['Upload-Offset']
 AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
@@ -166,3 +183,56 @@ REST_FRAMEWORK = {
 MEDIA_URL = '/uploaded_media/'
 MEDIA_ROOT = BASE_DIR / 'uploaded_media'
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Milestone evidence and media assets: deduplicated by content hash (core.storage)
+    'evidence': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+}
+
+# How often each process checks whether MilestoneTemplates changed (clinical.catalog)
+MILESTONE_CATALOG_CHECK_SECONDS = 5
+# How often each process writes its caregiver response cache hit/miss counts to the database
+CAREGIVER_CACHE_STATS_FLUSH_SECONDS = 5
+
+# Part files of resumable evidence uploads (clinical.uploads); keep on the same
+# filesystem as MEDIA_ROOT so finalizing is a rename rather than a copy.
+EVIDENCE_UPLOAD_DIR = MEDIA_ROOT / 'uploads'
+# Upload sessions untouched for this long are removed by purge_stale_uploads
+EVIDENCE_UPLOAD_EXPIRY_HOURS = 24
+
+# Background video normalization (media.processing): worker processes per web
+# process, and how many transcodes may queue before new ones are left to the
+# process_media command.
+MEDIA_PROCESSING_WORKERS = 2
+MEDIA_PROCESSING_MAX_PENDING = 8
+MEDIA_RENDITION_MAX_HEIGHT = 360
+MEDIA_RENDITION_MAX_FPS = 15
+
+# Evidence links (media.serving) are signed per family and day, and stay valid this many days
+MEDIA_URL_MAX_AGE_DAYS = 2
+# Set to an nginx `internal` location aliased to MEDIA_ROOT (e.g. '/protected-media/')
+# to hand file transfers to nginx (sendfile, Range) instead of streaming them from Django.
+MEDIA_ACCEL_REDIRECT_PREFIX = None
+
+# AI review queue (media.ai_review), worked by `manage.py run_ai_review`
+AI_REVIEW_ANALYZER = 'media.ai_review.basic_analysis'
+AI_REVIEW_WORKERS = 2
+AI_REVIEW_POLL_SECONDS = 5
+AI_REVIEW_MAX_ATTEMPTS = 5
+# Retries wait 30s, 60s, 120s, ... up to an hour
+AI_REVIEW_RETRY_BASE_SECONDS = 30
+AI_REVIEW_RETRY_MAX_SECONDS = 3600
+# A RUNNING job not finished within this time is assumed lost with its worker and claimed again
+AI_REVIEW_LEASE_SECONDS = 600
+# Batched scoring (media.inference) with `run_ai_review --batch`: frames per model
+# call, and how long a clip may wait for a batch to fill up
+AI_INFERENCE_BACKEND = 'media.inference.LocalModel'
+AI_INFERENCE_BATCH_FRAMES = 64
+AI_INFERENCE_MAX_WAIT_SECONDS = 2
+# Reused AI results (media.result_cache), evicted least recently used first
+AI_RESULT_CACHE_MAX_ENTRIES = 100000
+# Templates whose evidence also gets audio features (media.audio); needs ffmpeg
+AI_AUDIO_DOMAINS = ['LANGUAGE', 'SOCIAL']
+# Templates whose evidence must carry a motion descriptor (media.motion)
+AI_MOTION_DOMAINS = ['GROSS_MOTOR']
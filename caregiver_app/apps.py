@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CaregiverAppConfig(AppConfig):
     name = 'caregiver_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,130 @@
+"""
+Response cache for the caregiver dashboard and timeline.
+
+Cached payloads are keyed by family/child plus the active language. Instead of
+deleting keys on writes, every scope (global, family, caregiver, child) has a
+version counter that signal handlers bump; keys embed the current versions, so
+a bump makes every older payload for that scope unreachable. Entries also
+expire at the next day boundary so age-based milestone states stay correct.
+
+The signals only bump counters in the cache of the process that made the
+write; with a per-process cache, changes made elsewhere (e.g. AI review
+workers moving a milestone to AI_REVIEWED) would go unseen. Views therefore
+also put their conditional-GET validator (conditional.py), which is read from
+the database, into the key.
+
+Hit, miss and invalidation counts are summed across processes in
+AIReviewCounter rows. Each process buffers them and writes at most every
+CAREGIVER_CACHE_STATS_FLUSH_SECONDS, so a cache hit does not cost a write.
+"""
+import collections
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .strings import active_language
+
+KEY_PREFIX = 'caregiver'
+STATS_KEYS = {
+    'hits': f'{KEY_PREFIX}:stats:hits',
+    'misses': f'{KEY_PREFIX}:stats:misses',
+    'invalidations': f'{KEY_PREFIX}:stats:invalidations',
+}
+
+
+def _version_key(scope):
+    return f'{KEY_PREFIX}:version:{scope}'
+
+
+def _incr(key):
+    # add() is a no-op when the key already exists, so incr() never misses
+    cache.add(key, 0, None)
+    return cache.incr(key)
+
+
+_stats_lock = threading.Lock()
+_pending_stats = collections.Counter()
+_flushed_at = time.monotonic()
+
+
+def _count(name):
+    with _stats_lock:
+        _pending_stats[name] += 1
+        if time.monotonic() - _flushed_at < settings.CAREGIVER_CACHE_STATS_FLUSH_SECONDS:
+            return
+    flush_stats()
+
+
+def flush_stats():
+    """Adds this process's buffered counts to the shared totals."""
+    from media.models import AIReviewCounter
+
+    global _flushed_at
+    with _stats_lock:
+        pending = dict(_pending_stats)
+        _pending_stats.clear()
+        _flushed_at = time.monotonic()
+    for name, delta in pending.items():
+        AIReviewCounter.objects.incr(STATS_KEYS[name], delta)
+
+
+def seconds_until_midnight(now=None):
+    now = now or datetime.datetime.now()
+    tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+    return max(int((tomorrow - now).total_seconds()), 1)
+
+
+def make_key(kind, scopes, *parts):
+    """
+    Builds a cache key for `kind` that embeds the current version of every scope
+    it depends on, e.g. make_key('dashboard', ['family:<id>', 'caregiver:<id>'], caregiver_id).
+    """
+    scopes = ['global'] + list(scopes)
+    versions = cache.get_many([_version_key(s) for s in scopes])
+    version = '.'.join(str(versions.get(_version_key(s), 0)) for s in scopes)
+    return ':'.join([KEY_PREFIX, kind, *[str(p) for p in parts], active_language(), f'v{version}'])
+
+
+def get_cached(key):
+    data = cache.get(key)
+    _count('hits' if data is not None else 'misses')
+    return data
+
+
+def set_cached(key, data):
+    cache.set(key, data, seconds_until_midnight())
+
+
+def invalidate(*scopes):
+    for scope in scopes:
+        _incr(_version_key(scope))
+    _count('invalidations')
+
+
+def invalidate_child(child_id, family_id=None, caregiver_id=None):
+    scopes = [f'child:{child_id}']
+    if family_id:
+        scopes.append(f'family:{family_id}')
+    if caregiver_id:
+        scopes.append(f'caregiver:{caregiver_id}')
+    invalidate(*scopes)
+
+
+def dashboard_scopes(caregiver):
+    if caregiver.family_id:
+        return [f'family:{caregiver.family_id}', f'caregiver:{caregiver.id}']
+    return [f'caregiver:{caregiver.id}']
+
+
+def get_stats():
+    from media.models import AIReviewCounter
+
+    flush_stats()
+    values = AIReviewCounter.objects.values_for(STATS_KEYS.values())
+    stats = {name: values[key] for name, key in STATS_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+    return stats
@@ -0,0 +1,99 @@
+"""
+Conditional GET (ETag / Last-Modified) support for caregiver endpoints.
+
+Validators are derived from row timestamps and counts (counts catch deletes)
+rather than from hashing the rendered body, so a 304 is answered with a
+couple of aggregate queries and without building the payload. Template titles
+and descriptions come from the template catalog, so its version is part of
+every ETag.
+
+Only If-None-Match is answered with a 304. Last-Modified is sent for
+information, but some changes have no timestamp to move it (a caregiver
+rename, deleted rows), so If-Modified-Since alone is not trusted.
+"""
+import datetime
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from clinical.catalog import get_catalog
+from clinical.models import ChildMilestone, Encounter
+
+from .strings import active_language
+
+
+class Validators:
+    def __init__(self, request, parts, timestamps):
+        catalog_count, catalog_updated = get_catalog().version
+        parts = [*parts, catalog_count]
+        timestamps = [*timestamps, catalog_updated]
+        today = datetime.date.today()
+        # Age-based milestone states roll over daily, so content can change at midnight
+        # without any row changing.
+        start_of_day = timezone.make_aware(datetime.datetime.combine(today, datetime.time.min))
+        self.last_modified = max([t for t in timestamps if t] + [start_of_day])
+
+        key = [
+            request.get_full_path(),
+            request.get_host(),
+            active_language(),
+            today.isoformat(),
+            *parts,
+            *[t.isoformat() if t else '' for t in timestamps],
+        ]
+        self.etag = '"%s"' % hashlib.sha1('|'.join(str(k) for k in key).encode()).hexdigest()
+
+    def not_modified(self, request):
+        """Returns a 304/412 response if the client's copy (by ETag) is current, else None."""
+        return get_conditional_response(request, etag=self.etag)
+
+    def apply(self, response):
+        if response.status_code != 200:
+            return response
+        response['ETag'] = self.etag
+        response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+def dashboard_validators(request, caregiver, children):
+    stats = children.aggregate(
+        child_count=Count('id', distinct=True),
+        child_updated=Max('updated_at'),
+        milestone_count=Count('milestones'),
+        milestone_updated=Max('milestones__updated_at'),
+        status_changed=Max('milestones__status_changed_at'),
+    )
+    return Validators(
+        request,
+        [caregiver.id, caregiver.first_name, stats['child_count'], stats['milestone_count']],
+        [stats['child_updated'], stats['milestone_updated'], stats['status_changed']],
+    )
+
+
+def timeline_validators(request, child):
+    milestones = ChildMilestone.objects.filter(child=child).aggregate(
+        count=Count('id'),
+        updated=Max('updated_at'),
+        status_changed=Max('status_changed_at'),
+    )
+    encounters = Encounter.objects.filter(child=child).aggregate(
+        count=Count('id', distinct=True),
+        updated=Max('updated_at'),
+        screening_count=Count('screenings'),
+        screening_updated=Max('screenings__updated_at'),
+    )
+    return Validators(
+        request,
+        [child.id, milestones['count'], encounters['count'], encounters['screening_count']],
+        [
+            child.updated_at,
+            milestones['updated'],
+            milestones['status_changed'],
+            encounters['updated'],
+            encounters['screening_updated'],
+        ],
+    )
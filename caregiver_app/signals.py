@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from clinical.models import ChildMilestone, Encounter, MilestoneTemplate, ScreeningResult
+from patients.models import Caregiver, Child
+
+from . import cache
+
+
+def _invalidate_for_child_id(child_id):
+    child = Child.objects.filter(pk=child_id).values('family_id', 'caregiver_id').first() or {}
+    cache.invalidate_child(child_id, child.get('family_id'), child.get('caregiver_id'))
+
+
+@receiver([post_save, post_delete], sender=Child)
+def child_changed(sender, instance, **kwargs):
+    cache.invalidate_child(instance.pk, instance.family_id, instance.caregiver_id)
+
+
+@receiver([post_save, post_delete], sender=ChildMilestone)
+@receiver([post_save, post_delete], sender=Encounter)
+def child_record_changed(sender, instance, **kwargs):
+    _invalidate_for_child_id(instance.child_id)
+
+
+@receiver([post_save, post_delete], sender=ScreeningResult)
+def screening_changed(sender, instance, **kwargs):
+    child_id = Encounter.objects.filter(pk=instance.encounter_id).values_list('child_id', flat=True).first()
+    if child_id:
+        _invalidate_for_child_id(child_id)
+
+
+@receiver(post_save, sender=Caregiver)
+def caregiver_changed(sender, instance, **kwargs):
+    # The dashboard greeting carries the caregiver's name
+    cache.invalidate(f'caregiver:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=MilestoneTemplate)
+def template_changed(sender, instance, **kwargs):
+    cache.invalidate('global')
@@ -0,0 +1,51 @@
+"""
+Per-language UI string catalog for the caregiver API.
+
+Strings live in caregiver_app/locales/<lang>.json, grouped by screen like the
+frontend's locale files. The catalog is loaded once per process with one entry
+per language in settings.LANGUAGES; keys missing from a language fall back to
+the default language. Adding a language needs a LANGUAGES entry and a JSON
+file, no code changes.
+"""
+import functools
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+LOCALES_DIR = Path(__file__).resolve().parent / 'locales'
+DEFAULT_LANGUAGE = getattr(settings, 'MODELTRANSLATION_DEFAULT_LANGUAGE', 'en')
+
+
+def active_language():
+    lang = get_language() or DEFAULT_LANGUAGE
+    return lang.split('-')[0]
+
+
+def _load(lang):
+    path = LOCALES_DIR / f'{lang}.json'
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def catalog():
+    default = _load(DEFAULT_LANGUAGE)
+    languages = {}
+    for code, _name in settings.LANGUAGES:
+        strings = _load(code)
+        languages[code] = {
+            section: {**entries, **strings.get(section, {})}
+            for section, entries in default.items()
+        }
+    return languages
+
+
+def get_strings(section, lang=None):
+    """Returns the {key: text} dict for a screen in the given (or active) language."""
+    languages = catalog()
+    strings = languages.get(lang or active_language()) or languages[DEFAULT_LANGUAGE]
+    return strings[section]
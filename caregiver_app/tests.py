@@ -1,3 +1,373 @@
-from django.test import TestCase
+import datetime
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from caregiver_app import cache as cache_module, strings
+from clinical.models import ChildMilestone, Encounter, MilestoneTemplate, ScreeningResult, TimelineEvent
+from clinical.schedule import get_schedule
+from media import ai_review
+from media.models import AIReviewCounter, MediaAsset
+from patients.models import Caregiver, Child, Family
+
+
+def make_child(family, caregiver, age_months, **kwargs):
+    return Child.objects.create(
+        family=family,
+        caregiver=caregiver,
+        first_name=kwargs.pop('first_name', 'Child'),
+        last_name='Test',
+        sex='F',
+        date_of_birth=datetime.date.today() - datetime.timedelta(days=30 * age_months + 1),
+        **kwargs,
+    )
+
+
+class CaregiverDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.family = Family.objects.create(name='Test Family')
+        self.caregiver = Caregiver.objects.create(
+            first_name='Asha', last_name='', phone_number='9999999999', family=self.family
+        )
+        self.templates = [
+            MilestoneTemplate.objects.create(title='Social Smile', expected_age_months=2),
+            MilestoneTemplate.objects.create(title='Rollover', expected_age_months=4),
+            MilestoneTemplate.objects.create(title='Walks Alone', expected_age_months=12),
+        ]
+        get_schedule()  # process-wide index, built once rather than per request
+
+    def add_child(self, age_months, **kwargs):
+        child = make_child(self.family, self.caregiver, age_months, **kwargs)
+        for t in self.templates:
+            ChildMilestone.objects.create(child=child, template=t)
+        return child
+
+    def get_dashboard(self):
+        return self.client.get('/api/caregiver/dashboard/', {'caregiver_id': str(self.caregiver.id)})
+
+    def test_status_colours(self):
+        amber = self.add_child(5, first_name='Amber')
+        blue = self.add_child(1, first_name='Blue')
+        ChildMilestone.objects.filter(child=blue, template=self.templates[0]).update(status='SUBMITTED')
+        green = self.add_child(1, first_name='Green')
+        red = self.add_child(5, first_name='Red', is_at_risk=True)
+
+        response = self.get_dashboard()
+        self.assertEqual(response.status_code, 200)
+        by_id = {c['id']: c for c in response.data['children']}
+
+        self.assertEqual(by_id[amber.id]['status'], 'amber')
+        # Only the 2m and 4m milestones are unlocked at 5 months
+        self.assertEqual(by_id[amber.id]['status_indicator'], '2 tasks pending')
+        self.assertEqual(by_id[blue.id]['status'], 'blue')
+        self.assertEqual(by_id[green.id]['status'], 'green')
+        self.assertEqual(by_id[red.id]['status'], 'red')
+
+    def test_query_count_independent_of_family_size(self):
+        self.add_child(3)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.get_dashboard().status_code, 200)
+
+        for age in (1, 6, 14, 30, 50):
+            self.add_child(age)
+        with CaptureQueriesContext(connection) as large:
+            response = self.get_dashboard()
+        self.assertEqual(len(response.data['children']), 6)
+
+        self.assertEqual(len(small), len(large))
+
+    def test_summary_refreshed_on_milestone_transition(self):
+        child = self.add_child(1)
+        self.assertEqual(self.get_dashboard().data['children'][0]['status'], 'green')
+
+        milestone = ChildMilestone.objects.get(child=child, template=self.templates[0])
+        milestone.status = 'SUBMITTED'
+        milestone.evidence_asset = MediaAsset.objects.create(media_type='VIDEO')
+        milestone.save()
+        self.client.post(f'/api/clinical/milestones/{milestone.id}/perform_ai_review/')
+        with mock.patch('media.ai_review.get_analyzer', return_value=lambda asset, template: ({}, 0.9)):
+            ai_review.work('test', once=True)
+
+        child.status_summary.refresh_from_db()
+        self.assertEqual(child.status_summary.review_count, 1)
+        self.assertEqual(child.status_summary.status, 'blue')
+
+    def test_fresh_summaries_are_read_without_aggregation(self):
+        for age in (1, 6, 14):
+            self.add_child(age)
+        self.get_dashboard()
+        cache.clear()
+        get_schedule()
+        # Caregiver lookup, ETag validators, then one join over children and their summaries
+        with self.assertNumQueries(3):
+            self.get_dashboard()
+
+
+class CaregiverResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.family = Family.objects.create(name='Cache Family')
+        self.caregiver = Caregiver.objects.create(first_name='Ravi', last_name='', family=self.family)
+        self.template = MilestoneTemplate.objects.create(title='Social Smile', expected_age_months=2)
+        self.child = make_child(self.family, self.caregiver, 3)
+        self.milestone = ChildMilestone.objects.create(child=self.child, template=self.template)
+        self.stats = cache_module.get_stats()  # includes counts buffered by earlier tests
+
+    def lookups_since_setup(self):
+        stats = cache_module.get_stats()
+        return stats['hits'] - self.stats['hits'], stats['misses'] - self.stats['misses']
+
+    def test_dashboard_served_from_cache_until_child_changes(self):
+        params = {'caregiver_id': str(self.caregiver.id)}
+        first = self.client.get('/api/caregiver/dashboard/', params)
+        self.assertEqual(first.data['children'][0]['status'], 'amber')
+
+        with self.assertNumQueries(2):  # caregiver lookup and ETag validators
+            self.client.get('/api/caregiver/dashboard/', params)
+
+        self.child.is_at_risk = True
+        self.child.save()
+        refreshed = self.client.get('/api/caregiver/dashboard/', params)
+        self.assertEqual(refreshed.data['children'][0]['status'], 'red')
+
+        self.assertEqual(self.lookups_since_setup(), (1, 2))
+
+    def test_timeline_cached_per_language(self):
+        url = f'/api/caregiver/child/{self.child.id}/'
+        english = self.client.get(url, HTTP_ACCEPT_LANGUAGE='en')
+        with self.assertNumQueries(3):  # child lookup and ETag validators
+            self.assertEqual(self.client.get(url, HTTP_ACCEPT_LANGUAGE='en').data, english.data)
+
+        hindi = self.client.get(url, HTTP_ACCEPT_LANGUAGE='hi')
+        self.assertNotEqual(hindi.data['timeline'][0]['title'], english.data['timeline'][0]['title'])
+
+    def test_changes_from_other_processes_are_not_served_stale(self):
+        self.milestone.status = 'SUBMITTED'
+        self.milestone.evidence_asset = MediaAsset.objects.create(media_type='VIDEO')
+        self.milestone.save()
+        url = f'/api/caregiver/child/{self.child.id}/'
+        params = {'caregiver_id': str(self.caregiver.id)}
+
+        def milestone_status():
+            return next(e['status'] for e in self.client.get(url).data['timeline'] if e['type'] == 'milestone_won')
+
+        self.assertEqual(milestone_status(), 'SUBMITTED')
+        self.client.get('/api/caregiver/dashboard/', params)
+
+        # An AI review worker's signals bump version counters in its own process's cache only
+        job = ai_review.enqueue(self.milestone)
+        with mock.patch('caregiver_app.cache.invalidate'):
+            ai_review.complete(job, {}, 0.5)
+
+        self.assertEqual(milestone_status(), 'AI_REVIEWED')
+        self.client.get('/api/caregiver/dashboard/', params)
+        self.assertEqual(self.lookups_since_setup(), (0, 4))
+
+    def test_stats_include_other_processes(self):
+        with override_settings(CAREGIVER_CACHE_STATS_FLUSH_SECONDS=3600):
+            self.client.get('/api/caregiver/dashboard/', {'caregiver_id': str(self.caregiver.id)})
+        # Written by another web process
+        AIReviewCounter.objects.incr(cache_module.STATS_KEYS['hits'], 3)
+        self.assertEqual(self.lookups_since_setup(), (3, 1))
+
+    def test_entries_expire_at_day_boundary(self):
+        now = datetime.datetime(2025, 1, 1, 23, 0, 0)
+        self.assertEqual(cache_module.seconds_until_midnight(now), 3600)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.family = Family.objects.create(name='ETag Family')
+        self.caregiver = Caregiver.objects.create(first_name='Meena', last_name='', family=self.family)
+        template = MilestoneTemplate.objects.create(title='Social Smile', expected_age_months=2)
+        self.child = make_child(self.family, self.caregiver, 3)
+        self.milestone = ChildMilestone.objects.create(child=self.child, template=template)
+
+    def test_timeline_not_modified_until_milestone_changes(self):
+        url = f'/api/caregiver/child/{self.child.id}/'
+        first = self.client.get(url)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', first)
+
+        cache.clear()  # a 304 must not depend on the response cache
+        with self.assertNumQueries(3):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+
+        self.milestone.status = 'SUBMITTED'
+        self.milestone.save()
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], etag)
+
+    def test_template_edit_changes_etag(self):
+        url = f'/api/caregiver/child/{self.child.id}/'
+        etag = self.client.get(url)['ETag']
+        self.milestone.template.title = 'First Smile'
+        self.milestone.template.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('First Smile', [m['title'] for m in response.data['milestones']])
+
+    def test_if_modified_since_alone_is_not_answered_with_304(self):
+        params = {'caregiver_id': str(self.caregiver.id)}
+        first = self.client.get('/api/caregiver/dashboard/', params)
+        # A rename moves no timestamp Last-Modified is built from
+        self.caregiver.first_name = 'Meenakshi'
+        self.caregiver.save()
+        response = self.client.get('/api/caregiver/dashboard/', params, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_dashboard_etag_varies_by_language(self):
+        params = {'caregiver_id': str(self.caregiver.id)}
+        english = self.client.get('/api/caregiver/dashboard/', params, HTTP_ACCEPT_LANGUAGE='en')
+        self.assertEqual(
+            self.client.get('/api/caregiver/dashboard/', params, HTTP_IF_NONE_MATCH=english['ETag'],
+                            HTTP_ACCEPT_LANGUAGE='en').status_code,
+            304,
+        )
+        kannada = self.client.get('/api/caregiver/dashboard/', params, HTTP_IF_NONE_MATCH=english['ETag'],
+                                  HTTP_ACCEPT_LANGUAGE='kn')
+        self.assertEqual(kannada.status_code, 200)
+
+
+class ChildTimelineQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        family = Family.objects.create(name='History Family')
+        caregiver = Caregiver.objects.create(first_name='Lakshmi', last_name='', family=family)
+        self.child = make_child(family, caregiver, 30)
+        for age, title in ((2, 'Social Smile'), (4, 'Rollover'), (12, 'Walks Alone')):
+            template = MilestoneTemplate.objects.create(title=title, expected_age_months=age)
+            ChildMilestone.objects.create(child=self.child, template=template, status='COMPLETED',
+                                          completion_date=datetime.date.today())
+        get_schedule()
+
+    def add_encounters(self, count):
+        for _ in range(count):
+            encounter = Encounter.objects.create(child=self.child)
+            ScreeningResult.objects.create(encounter=encounter, milestone_category='Gross Motor',
+                                           question_id='q1', response='Yes')
+
+    def get_timeline(self):
+        cache.clear()
+        get_schedule()  # reloads the template catalog the cleared version counter invalidated
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/caregiver/child/{self.child.id}/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_independent_of_history_length(self):
+        self.add_encounters(1)
+        _, baseline = self.get_timeline()
+
+        self.add_encounters(99)
+        response, queries = self.get_timeline()
+
+        encounters = [e for e in response.data['timeline'] if e['type'] == 'encounter']
+        self.assertEqual(len(encounters), 100)
+        self.assertEqual(encounters[0]['description'], '1 checks performed')
+        self.assertEqual(len([e for e in response.data['timeline'] if e['type'] == 'milestone_won']), 3)
+        self.assertEqual(queries, baseline)
+        # child, ETag validators (2), encounters, milestones (templates come from the catalog)
+        self.assertEqual(queries, 5)
+
+
+class TimelinePaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        family = Family.objects.create(name='Paging Family')
+        caregiver = Caregiver.objects.create(first_name='Kavya', last_name='', family=family)
+        self.child = make_child(family, caregiver, 24)
+        for _ in range(7):
+            Encounter.objects.create(child=self.child)
+        for age in range(5):
+            template = MilestoneTemplate.objects.create(title=f'Milestone {age}', expected_age_months=age)
+            ChildMilestone.objects.create(
+                child=self.child, template=template, status='COMPLETED',
+                completion_date=datetime.date.today() - datetime.timedelta(days=age),
+            )
+        self.url = f'/api/caregiver/child/{self.child.id}/'
+        get_schedule()
+
+    def test_pages_cover_timeline_once_in_date_order(self):
+        entries, cursor, pages = [], None, 0
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['timeline']), 3)
+            entries.extend(response.data['timeline'])
+            pages += 1
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+
+        # registration + 7 encounters + 5 milestones
+        self.assertEqual(len(entries), 13)
+        self.assertEqual(pages, 5)
+        days = [e['date'].date() if isinstance(e['date'], datetime.datetime) else e['date'] for e in entries]
+        self.assertEqual(days, sorted(days, reverse=True))
+        self.assertEqual(len({e['id'] for e in entries if e['type'] == 'milestone_won'}), 5)
+
+    def test_page_query_count_is_bounded(self):
+        with self.assertNumQueries(4):  # child, ETag validators (2), one range scan of the event log
+            self.client.get(self.url, {'limit': 2})
+
+    def test_history_keeps_every_transition(self):
+        milestone = ChildMilestone.objects.create(
+            child=self.child, template=MilestoneTemplate.objects.create(title='Babbling', expected_age_months=4)
+        )
+        milestone.status = 'SUBMITTED'
+        milestone.save()
+        milestone.status = 'COMPLETED'
+        milestone.save()
+
+        entries = self.client.get(self.url, {'limit': 100}).data['timeline']
+        statuses = [e['title'] for e in entries if e.get('id') == milestone.id]
+        self.assertEqual(statuses, ['Achieved: Babbling', 'In Review: Babbling'])
+
+    def test_backfill_is_idempotent(self):
+        TimelineEvent.objects.all().delete()
+        call_command('backfill_timeline_events', stdout=io.StringIO())
+        self.assertEqual(TimelineEvent.objects.count(), 13)
+        call_command('backfill_timeline_events', stdout=io.StringIO())
+        self.assertEqual(TimelineEvent.objects.count(), 13)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class StringCatalogTests(TestCase):
+    def tearDown(self):
+        strings.catalog.cache_clear()
+
+    def test_lookup_per_language(self):
+        self.assertEqual(strings.get_strings('dashboard', 'hi')['hello'], 'नमस्ते')
+        self.assertEqual(strings.get_strings('timeline', 'kn')['verify'], 'ಪರಿಶೀಲಿಸಿ')
+        self.assertEqual(strings.get_strings('timeline', 'xx')['verify'], 'Verify')
+
+    def test_new_language_falls_back_to_default_without_code_changes(self):
+        strings.catalog.cache_clear()
+        with self.settings(LANGUAGES=(('en', 'English'), ('ta', 'Tamil'))):
+            catalog = strings.catalog()
+        self.assertEqual(set(catalog), {'en', 'ta'})
+        self.assertEqual(catalog['ta']['dashboard'], catalog['en']['dashboard'])
@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination over a child's timeline.
+
+Pages are read from the append-only TimelineEvent log as one range scan on the
+(child, -occurred_at, -id) index, cut off at the cursor, so a page costs
+O(limit) rows however long the history is.
+"""
+import base64
+import datetime
+import json
+
+from django.db.models import Count, Q
+
+from clinical.models import TimelineEvent
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(occurred_at, pk):
+    raw = json.dumps([occurred_at.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        occurred_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.datetime.fromisoformat(occurred_at), int(pk)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise InvalidCursor(cursor)
+
+
+def parse_limit(value):
+    try:
+        limit = int(value) if value else DEFAULT_LIMIT
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def paginate(child, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Returns ([TimelineEvent, ...], next_cursor) for one page of the timeline.
+    `cursor` is the decoded tuple from decode_cursor().
+    """
+    events = (
+        TimelineEvent.objects.filter(child=child)
+        .select_related('encounter', 'milestone')
+        .annotate(screening_count=Count('encounter__screenings'))
+        .order_by('-occurred_at', '-id')
+    )
+    if cursor is not None:
+        occurred_at, pk = cursor
+        events = events.filter(Q(occurred_at__lt=occurred_at) | Q(occurred_at=occurred_at, id__lt=pk))
+
+    page = list(events[:limit + 1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(page[-1].occurred_at, page[-1].id)
+    return page, None
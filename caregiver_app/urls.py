@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import CaregiverLoginView, CaregiverDashboardView, ChildTimelineView, AddFamilyMemberView
+from .views import CaregiverLoginView, CaregiverDashboardView, ChildTimelineView, AddFamilyMemberView, CacheStatsView
 
 urlpatterns = [
     path('login/', CaregiverLoginView.as_view(), name='caregiver-login'),
     path('dashboard/', CaregiverDashboardView.as_view(), name='caregiver-dashboard'),
     path('child/<uuid:child_id>/', ChildTimelineView.as_view(), name='child-timeline'),
     path('add-member/', AddFamilyMemberView.as_view(), name='add-family-member'),
+    path('cache-stats/', CacheStatsView.as_view(), name='caregiver-cache-stats'),
 ]
@@ -2,9 +2,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.authtoken.models import Token
+from django.db.models import Count
 from django.contrib.auth import get_user_model
 from patients.models import Caregiver, Child
-from clinical.models import Encounter
+from clinical.models import Encounter, ChildStatusSummary
+from clinical.catalog import get_catalog
+from clinical.schedule import age_in_months, get_schedule
+from media import derivatives
+from media.serving import media_url, scope_for
+from . import cache
+from . import timeline as timeline_pages
+from .conditional import dashboard_validators, timeline_validators
+from .strings import get_strings
 
 User = get_user_model()
 
@@ -80,68 +89,54 @@ class CaregiverDashboardView(APIView):
         except Caregiver.DoesNotExist:
              return Response({'error': 'Caregiver not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Helper for static strings (manual translation)
-        from django.utils.translation import get_language
-        lang = get_language()
-        is_hindi = lang and lang.startswith('hi')
-        is_kannada = lang and lang.startswith('kn')
-
-        strings = {
-            'months': "ತಿಂಗಳುಗಳು" if is_kannada else ("महीने" if is_hindi else "months"),
-            'years': "ವರ್ಷಗಳು" if is_kannada else ("साल" if is_hindi else "years"),
-            'yrs': "ವರ್ಷ" if is_kannada else ("साल" if is_hindi else "yrs"),
-            'mo': "ತಿಂಗಳು" if is_kannada else ("महीने" if is_hindi else "mo"),
-            'tasks_pending': "ಕಾರ್ಯಗಳು ಬಾಕಿ ಇವೆ" if is_kannada else ("कार्य लंबित" if is_hindi else "tasks pending"),
-            'in_review': "ಪರಿಶೀಲನೆಯಲ್ಲಿದೆ" if is_kannada else ("समीक्षा में" if is_hindi else "In Review"),
-            'none_pending': "ಯಾವುದೂ ಬಾಕಿ ಇಲ್ಲ" if is_kannada else ("कोई लंबित नहीं" if is_hindi else "None pending"),
-            'doctor_review': "ವೈದ್ಯರ ಪರಿಶೀಲನೆ ನಡೆಯುತ್ತಿದೆ" if is_kannada else ("डॉक्टर समीक्षा जारी" if is_hindi else "Doctor review ongoing"),
-            'hello': "ನಮಸ್ಕಾರ" if is_kannada else ("नमस्ते" if is_hindi else "Hello"),
-        }
+        strings = get_strings('dashboard')
 
         # FETCH CHILDREN FROM FAMILY
-        if caregiver.family:
-            children = Child.objects.filter(family=caregiver.family)
+        if caregiver.family_id:
+            children = Child.objects.filter(family_id=caregiver.family_id)
         else:
              # Fallback for legacy/unmigrated data
             children = caregiver.children.all()
 
+        validators = dashboard_validators(request, caregiver, children)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = cache.make_key('dashboard', cache.dashboard_scopes(caregiver), caregiver.id, validators.etag.strip('"'))
+        cached = cache.get_cached(cache_key)
+        if cached is not None:
+            return validators.apply(Response(cached))
+
+        import datetime
+        today = datetime.date.today()
+
+        # Dashboard state is read from the denormalized summaries (one indexed join).
+        # Summaries from a previous day, or older than an edit to the child, are
+        # rebuilt together in one aggregate query.
+        children = list(children.select_related('status_summary'))
+        summaries = {c.id: c.status_summary for c in children if hasattr(c, 'status_summary')}
+        stale_ids = [c.id for c in children if c.id not in summaries or summaries[c.id].is_stale(c, today)]
+        if stale_ids:
+            summaries.update(ChildStatusSummary.objects.rebuild(Child.objects.filter(id__in=stale_ids), today=today))
+
+        status_texts = {
+            'red': strings['doctor_review'],
+            'blue': strings['in_review'],
+            'green': strings['none_pending'],
+        }
+
         data = []
         for child in children:
-            # Calculate simple status
-            # Calculate age for logic
-            import datetime
-            today = datetime.date.today()
-            age_days = (today - child.date_of_birth).days
-            age_months = int(age_days / 30)
-
-            # Check for active/pending milestones (Strict match to current age to align with UI cards)
-            cutoff_age = age_months
-            
-            # 1. Actionable (User needs to do something)
-            # Status is PENDING or REJECTED, and age is within range
-            actionable_count = child.milestones.filter(
-                status__in=['PENDING', 'REJECTED'],
-                template__expected_age_months__lte=cutoff_age
-            ).count()
-
-            # 2. In Review (System needs to do something)
-            review_count = child.milestones.filter(
-                status__in=['SUBMITTED', 'AI_REVIEWED']
-            ).count()
-
-            if child.is_at_risk:
-                status = 'red'
-                status_text = strings['doctor_review']
-            elif actionable_count > 0:
-                 status = 'amber'
-                 status_text = f'{actionable_count} {strings["tasks_pending"]}'
-            elif review_count > 0:
-                 status = 'blue' 
-                 status_text = strings['in_review']
+            age_months = age_in_months(child.date_of_birth, today)
+
+            summary = summaries[child.id]
+            status = summary.status
+            if status == 'amber':
+                status_text = f'{summary.actionable_count} {strings["tasks_pending"]}'
             else:
-                 status = 'green'
-                 status_text = strings['none_pending']
-            
+                status_text = status_texts[status]
+
             # Calculate age logic
             # < 24 months -> X months
             # >= 24 months -> Y years
@@ -164,7 +159,9 @@ class CaregiverDashboardView(APIView):
                 'avatar_url': '' # Placeholder
             })
 
-        return Response({'children': data, 'greeting': f"{strings['hello']}, {caregiver.first_name}"})
+        payload = {'children': data, 'greeting': f"{strings['hello']}, {caregiver.first_name}"}
+        cache.set_cached(cache_key, payload)
+        return validators.apply(Response(payload))
 
 class AddFamilyMemberView(APIView):
     """
@@ -227,106 +224,55 @@ class ChildTimelineView(APIView):
         except Child.DoesNotExist:
             return Response({'error': 'Child not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Get encounters
-        encounters = child.encounters.all().order_by('-encounter_date')
-        timeline = []
-        
+        validators = timeline_validators(request, child)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        # ?cursor=&limit= pages through the timeline only, lazily, as the app scrolls
+        paginated = 'cursor' in request.query_params or 'limit' in request.query_params
+
+        # evidence_url is absolute, so the host is part of the key
+        cache_key = cache.make_key('timeline', [f'child:{child_id}'], child_id, request.get_host(), validators.etag.strip('"'))
+        cached = None if paginated else cache.get_cached(cache_key)
+        if cached is not None:
+            return validators.apply(Response(cached))
+
         import datetime # Move import up
 
-        # Helper for static strings (since we can't compile .mo files easily in this env)
-        from django.utils.translation import get_language
-        lang = get_language()
-        
-        is_hindi = lang and lang.startswith('hi')
-        is_kannada = lang and lang.startswith('kn')
-        
-        strings = {
-            'joined': "APPEAL ಸೇರಿದರು" if is_kannada else ("APPEAL में शामिल हुए" if is_hindi else "Joined APPEAL"),
-            'reg_complete': "ನೋಂದಣಿ ಪೂರ್ಣಗೊಂಡಿದೆ" if is_kannada else ("सत्यापन पूर्ण" if is_hindi else "Registration complete"),
-            'checkup': "ತಪಾಸಣೆ" if is_kannada else ("जांच" if is_hindi else "Check-up"),
-            'home_visit': "ಮನೆ ಭೇಟಿ" if is_kannada else ("गृह भेंट" if is_hindi else "Home Visit"),
-            'checks_performed': "ತಪಾಸಣೆ ಮಾಡಲಾಗಿದೆ" if is_kannada else ("जांच की गई" if is_hindi else "checks performed"),
-            'achieved': "ಸಾಧಿಸಲಾಗಿದೆ: " if is_kannada else ("प्राप्त किया: " if is_hindi else "Achieved: "),
-            'milestone_comp': "ಮೈಲಿಗಲ್ಲು ಪೂರ್ಣಗೊಂಡಿದೆ" if is_kannada else ("महीने में मील का पत्थर पूरा हुआ" if is_hindi else "Milestone completed at"),
-            'months': "ತಿಂಗಳುಗಳು" if is_kannada else ("महीने" if is_hindi else "months"),
-            'needs_retry': "ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ: " if is_kannada else ("पुनः प्रयास करें: " if is_hindi else "Needs Retry: "),
-            'retry_desc': "ವೀಡಿಯೊ ಗುಣಮಟ್ಟದ ಸಮಸ್ಯೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ." if is_kannada else ("वीडियो की गुणवत्ता में समस्या। कृपया पुन: प्रयास करें।" if is_hindi else "Video quality issues. Please try again."),
-            'in_review': "ಪರಿಶೀಲನೆಯಲ್ಲಿದೆ: " if is_kannada else ("समीक्षा में: " if is_hindi else "In Review: "),
-            'ai_analyzing': "AI ವಿಶ್ಲೇಷಿಸುತ್ತಿದೆ..." if is_kannada else ("एआई विश्लेषण कर रहा है..." if is_hindi else "AI Analyzing..."),
-            'dr_reviewing': "ವೈದ್ಯರು ಪರಿಶೀಲಿಸುತ್ತಿದ್ದಾರೆ..." if is_kannada else ("डॉक्टर समीक्षा कर रहे हैं..." if is_hindi else "Dr. Reviewing..."),
-            'verify': "ಪರಿಶೀಲಿಸಿ" if is_kannada else ("सत्यापित करें" if is_hindi else "Verify"),
-            'is_child': "ಏನು" if is_kannada else ("क्या" if is_hindi else "Check if"),
-            'action_desc': "ಹಾಗೆ ವರ್ತಿಸುತ್ತಿದೆಯೇ? AI ವಿಶ್ಲೇಷಣೆಗಾಗಿ ವೀಡಿಯೊ ರೆಕಾರ್ಡ್ ಮಾಡಿ." if is_kannada else ("जैसा व्यवहार कर रहा है? एआई विश्लेषण के लिए एक वीडियो रिकॉर्ड करें।" if is_hindi else ". Record a video for AI analysis."),
-            'caught_up': "ಎಲ್ಲವೂ ಮುಗಿದಿದೆ!" if is_kannada else ("सब ठीक है!" if is_hindi else "All Caught Up!"),
-            'doing_great': "ಅತ್ಯುತ್ತಮವಾಗಿದೆ. ಯಾವುದೇ ಬಾಕಿ ಇಲ್ಲ." if is_kannada else ("बहुत अच्छा कर रहा है। कोई लंबित कार्य नहीं।" if is_hindi else "is doing great. No pending actions."),
-            'view_history': "ಇತಿಹಾಸ ವೀಕ್ಷಿಸಿ" if is_kannada else ("इतिहास देखें" if is_hindi else "View History"),
-            'start_recording': "ರೆಕಾರ್ಡಿಂಗ್ ಪ್ರಾರಂಭಿಸಿ" if is_kannada else ("रिकॉर्डिंग शुरू करें" if is_hindi else "Start Recording"),
-        }
+        strings = get_strings('timeline')
+
+        if paginated:
+            return validators.apply(self.get_page(request, child, strings))
+
+        # Get encounters, with screening counts aggregated in the same query
+        encounters = child.encounters.annotate(screening_count=Count('screenings')).order_by('-encounter_date')
+        # Milestones are fetched once and shared by the timeline and gamified sections;
+        # template titles/descriptions come from the in-process catalog instead of a join
+        self.catalog = get_catalog()
+        self.media_scope = scope_for(child)
+        child_milestones = sorted(
+            child.milestones.all(),
+            key=lambda cm: (self.catalog.get(cm.template_id).expected_age_months, cm.id),
+        )
+        timeline = []
 
         # 1. Add "Registered" event
-        timeline.append({
-            'type': 'milestone',
-            'title': strings['joined'],
-            'date': child.enrollment_date,
-            'icon': '👋',
-            'description': strings['reg_complete']
-        })
+        timeline.append(self.registration_entry(child, strings))
 
         # 2. Add Encounters
         for enc in encounters:
-            title = strings['checkup']
-            icon = "👩‍⚕️"
-            if enc.encounter_type == 'HOME_VISIT':
-                title = strings['home_visit']
-            
-            # Check for screening results to add detail
-            results_count = enc.screenings.count()
-            desc = f"{results_count} {strings['checks_performed']}"
-
-            timeline.append({
-                'type': 'encounter',
-                'title': title,
-                'date': enc.encounter_date,
-                'icon': icon,
-                'description': desc
-            })
+            timeline.append(self.encounter_entry(enc, strings))
 
         # 3. Add Completed Milestones to Timeline
         # Include COMPLETED, SUBMITTED, and AI_REVIEWED
         # Basically anything with Status != PENDING (or where evidence exists)
         # Using status field now.
-        timeline_milestones = child.milestones.exclude(status='PENDING')
+        timeline_milestones = [cm for cm in child_milestones if cm.status != 'PENDING']
         
         for cm in timeline_milestones:
-            evidence_url = None
-            if cm.evidence:
-                evidence_url = request.build_absolute_uri(cm.evidence.url)
-
-            # Determine visual state based on status
-            if cm.status == 'COMPLETED':
-                title = f"{strings['achieved']}{cm.template.title}"
-                icon = '🏆'
-                desc = f"{strings['milestone_comp']} {cm.template.expected_age_months} {strings['months']}" if (is_hindi or is_kannada) else f"Milestone completed at {cm.template.expected_age_months} months"
-            elif cm.status == 'REJECTED':
-                title = f"{strings['needs_retry']}{cm.template.title}"
-                icon = '⚠️'
-                desc = strings['retry_desc']
-            else: # SUBMITTED or AI_REVIEWED
-                title = f"{strings['in_review']}{cm.template.title}"
-                icon = '⏳'
-                state = strings['ai_analyzing'] if cm.status == 'SUBMITTED' else strings['dr_reviewing']
-                desc = f"Status: {state}"
-
-            timeline.append({
-                'id': cm.id,
-                'type': 'milestone_won',
-                'title': title,
-                'date': cm.completion_date if cm.completion_date else datetime.date.today(), # Use today for pending reviews
-                'icon': icon,
-                'description': desc,
-                'evidence_url': evidence_url,
-                'status': cm.status
-            })
+            date = cm.completion_date if cm.completion_date else datetime.date.today() # Use today for pending reviews
+            timeline.append(self.milestone_entry(request, cm, cm.status, cm.evidence, date, strings))
             
         # Sort by date descending
         # ... (Sorting logic remains same) ...
@@ -343,16 +289,14 @@ class ChildTimelineView(APIView):
         # ... (Logic remains same) ...
         
         # Calculate child age in months (approx)
-        import datetime
-        today = datetime.date.today()
-        age_days = (today - child.date_of_birth).days
-        age_months = int(age_days / 30)
+        age_months = age_in_months(child.date_of_birth)
+        # Unlocked templates come from the shared schedule index (binary search on expected age)
+        active_template_ids = set(get_schedule().active_template_ids(age_months))
 
         milestones_data = []
-        child_milestones = child.milestones.select_related('template').order_by('template__expected_age_months')
         
         for cm in child_milestones:
-            t = cm.template
+            t = self.catalog.get(cm.template_id)
             state = 'LOCKED'
             
             # State Logic
@@ -362,7 +306,7 @@ class ChildTimelineView(APIView):
                 state = 'REVIEW'
             elif cm.status == 'REJECTED':
                 state = 'ACTIVE' # Retry
-            elif age_months >= t.expected_age_months:
+            elif cm.template_id in active_template_ids:
                 state = 'ACTIVE'
             
             milestones_data.append({
@@ -383,7 +327,8 @@ class ChildTimelineView(APIView):
         if active_milestones:
             for active in active_milestones:
                 # Construct description carefully
-                desc_text = f"{strings['is_child']} {child.first_name} {active['description'].lower() if not (is_hindi or is_kannada) else active['description']} {strings['action_desc']}"
+                # lower() is a no-op for scripts without case (Hindi, Kannada)
+                desc_text = f"{strings['is_child']} {child.first_name} {active['description'].lower()} {strings['action_desc']}"
                 
                 pending_actions.append({
                     'type': 'video',
@@ -401,7 +346,7 @@ class ChildTimelineView(APIView):
                 'action_label': strings['view_history']
             })
 
-        return Response({
+        payload = {
             'child': {
                 'id': child.id,
                 'name': child.first_name,
@@ -412,4 +357,107 @@ class ChildTimelineView(APIView):
             'timeline': timeline,
             'milestones': milestones_data,
             'pending_actions': pending_actions
-        })
+        }
+        cache.set_cached(cache_key, payload)
+        return validators.apply(Response(payload))
+
+    def get_page(self, request, child, strings):
+        try:
+            cursor = request.query_params.get('cursor')
+            cursor = timeline_pages.decode_cursor(cursor) if cursor else None
+        except timeline_pages.InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = timeline_pages.parse_limit(request.query_params.get('limit'))
+
+        self.catalog = get_catalog()
+        self.media_scope = scope_for(child)
+        page, next_cursor = timeline_pages.paginate(child, cursor, limit)
+        entries = []
+        for event in page:
+            if event.event_type == 'REGISTERED':
+                entries.append(self.registration_entry(child, strings))
+            elif event.event_type == 'ENCOUNTER':
+                event.encounter.screening_count = event.screening_count
+                entries.append(self.encounter_entry(event.encounter, strings))
+            else:
+                # Title and evidence as they were at the time; history is not overwritten
+                entries.append(self.milestone_entry(
+                    request, event.milestone, event.event_type, event.evidence, event.occurred_at, strings
+                ))
+
+        return Response({'timeline': entries, 'next_cursor': next_cursor})
+
+    def registration_entry(self, child, strings):
+        return {
+            'type': 'milestone',
+            'title': strings['joined'],
+            'date': child.enrollment_date,
+            'icon': '👋',
+            'description': strings['reg_complete']
+        }
+
+    def encounter_entry(self, enc, strings):
+        title = strings['checkup']
+        icon = "👩‍⚕️"
+        if enc.encounter_type == 'HOME_VISIT':
+            title = strings['home_visit']
+
+        # Check for screening results to add detail
+        desc = f"{enc.screening_count} {strings['checks_performed']}"
+
+        return {
+            'type': 'encounter',
+            'title': title,
+            'date': enc.encounter_date,
+            'icon': icon,
+            'description': desc
+        }
+
+    def milestone_entry(self, request, cm, milestone_status, evidence, date, strings):
+        template = self.catalog.get(cm.template_id)
+        # Signed for the child's family, so the app's <video> tag can load it
+        evidence_url = media_url(request, evidence, self.media_scope)
+        # Poster and preview are rendered on first request if the upload job has not made them yet
+        has_derivatives = bool(evidence) and derivatives.is_video(evidence.name)
+        poster_url, preview_url = (
+            media_url(request, derivatives.derivative_name(evidence.name, kind), self.media_scope)
+            if has_derivatives else None
+            for kind in ('poster', 'preview')
+        )
+
+        # Determine visual state based on status
+        if milestone_status == 'COMPLETED':
+            title = f"{strings['achieved']}{template.title}"
+            icon = '🏆'
+            desc = f"{strings['milestone_comp']} {template.expected_age_months} {strings['months']}"
+        elif milestone_status == 'REJECTED':
+            title = f"{strings['needs_retry']}{template.title}"
+            icon = '⚠️'
+            desc = strings['retry_desc']
+        else: # SUBMITTED or AI_REVIEWED
+            title = f"{strings['in_review']}{template.title}"
+            icon = '⏳'
+            state = strings['ai_analyzing'] if milestone_status == 'SUBMITTED' else strings['dr_reviewing']
+            desc = f"Status: {state}"
+
+        return {
+            'id': cm.id,
+            'type': 'milestone_won',
+            'title': title,
+            'date': date,
+            'icon': icon,
+            'description': desc,
+            'evidence_url': evidence_url,
+            'poster_url': poster_url,
+            'preview_url': preview_url,
+            'status': cm.status
+        }
+
+class CacheStatsView(APIView):
+    """
+    Hit/miss counters for the caregiver response cache, for monitoring.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache.get_stats())
@@ -0,0 +1,98 @@
+"""
+In-process catalog of MilestoneTemplates with their translated fields.
+
+Templates are read on almost every caregiver request but only change when an
+admin edits them, so each process keeps a copy keyed by template id and
+language. The catalog's version is derived from the templates table itself
+(row count and latest updated_at), so every process, AI review workers
+included, sees a change without a shared cache. A process checks the version
+at most once every MILESTONE_CATALOG_CHECK_SECONDS; the process that saves or
+deletes a template drops its copy at once (signals.py).
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count, Max
+from modeltranslation.utils import build_localized_fieldname, get_language
+
+TemplateEntry = namedtuple('TemplateEntry', ['id', 'title', 'description', 'expected_age_months'])
+
+
+def shared_version():
+    """(count, latest updated_at) of the templates; a save or a delete in any process changes it."""
+    from .models import MilestoneTemplate
+
+    stats = MilestoneTemplate.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    return stats['count'], stats['updated']
+
+
+class TemplateCatalog:
+    def __init__(self, templates, version):
+        self.version = version
+        self.default_language = getattr(settings, 'MODELTRANSLATION_DEFAULT_LANGUAGE', 'en')
+        self.languages = [code for code, _name in settings.LANGUAGES]
+        self.entries = {}
+        self.ids = set()
+        for t in templates:
+            self.add(t)
+
+    def add(self, template):
+        default_title = getattr(template, build_localized_fieldname('title', self.default_language)) or template.title
+        default_desc = getattr(template, build_localized_fieldname('description', self.default_language)) or template.description
+        for lang in self.languages:
+            self.entries[template.id, lang] = TemplateEntry(
+                template.id,
+                getattr(template, build_localized_fieldname('title', lang), None) or default_title,
+                getattr(template, build_localized_fieldname('description', lang), None) or default_desc or '',
+                template.expected_age_months,
+            )
+        self.ids.add(template.id)
+
+    def get(self, template_id, lang=None):
+        """The template translated to `lang` (default: the active language)."""
+        lang = lang or get_language()
+        entry = self.entries.get((template_id, lang)) or self.entries.get((template_id, self.default_language))
+        if entry is None:
+            # Created without signals (e.g. a bulk insert); load just this one
+            from .models import MilestoneTemplate
+
+            self.add(MilestoneTemplate.objects.get(pk=template_id))
+            return self.get(template_id, lang)
+        return entry
+
+    def __iter__(self):
+        for template_id in sorted(self.ids):
+            yield self.get(template_id, self.default_language)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = None
+
+
+def get_catalog():
+    global _catalog, _checked_at
+    catalog = _catalog
+    now = time.monotonic()
+    if catalog is not None and now - _checked_at < settings.MILESTONE_CATALOG_CHECK_SECONDS:
+        return catalog
+
+    from .models import MilestoneTemplate
+
+    version = shared_version()
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = TemplateCatalog(list(MilestoneTemplate.objects.all()), version)
+        _checked_at = now
+        return _catalog
+
+
+def invalidate():
+    global _catalog
+    with _lock:
+        _catalog = None
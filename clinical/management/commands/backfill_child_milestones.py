@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from clinical.models import ChildMilestone, ChildStatusSummary, MilestoneTemplate
+from patients.models import Child
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the PENDING ChildMilestone rows children are missing for the current template set "
+        "(e.g. after a template is added). Works through children in id order, one short transaction "
+        "per batch, so it can be interrupted and resumed with --start-after. Safe to rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Children per batch.")
+        parser.add_argument('--start-after', help="Resume after this child id (printed with each batch).")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        template_ids = list(MilestoneTemplate.objects.order_by('id').values_list('id', flat=True))
+        if not template_ids:
+            self.stdout.write("No milestone templates defined")
+            return
+
+        children = Child.objects.order_by('id')
+        if options['start_after']:
+            children = children.filter(id__gt=options['start_after'])
+
+        processed = created = 0
+        last_id = None
+        while True:
+            # Keyset batches: each one is a fresh indexed range read, so memory stays flat
+            # and locks are only held for one batch at a time.
+            batch = children.filter(id__gt=last_id) if last_id else children
+            child_ids = list(batch.values_list('id', flat=True)[:batch_size])
+            if not child_ids:
+                break
+            created += self.backfill_batch(child_ids, template_ids)
+            processed += len(child_ids)
+            last_id = child_ids[-1]
+            self.stdout.write(f"Processed {processed} children, created {created} milestones (last id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {created} milestones for {processed} children"))
+
+    def backfill_batch(self, child_ids, template_ids):
+        existing = set(
+            ChildMilestone.objects.filter(child_id__in=child_ids, template_id__in=template_ids)
+            .values_list('child_id', 'template_id')
+        )
+        missing = [
+            ChildMilestone(child_id=child_id, template_id=template_id)
+            for child_id in child_ids for template_id in template_ids
+            if (child_id, template_id) not in existing
+        ]
+        if not missing:
+            return 0
+
+        touched = {m.child_id for m in missing}
+        with transaction.atomic():
+            # ignore_conflicts covers rows enrolled concurrently since the read above
+            ChildMilestone.objects.bulk_create(missing, ignore_conflicts=True)
+            # New PENDING rows change the actionable counts on the dashboard
+            ChildStatusSummary.objects.rebuild(Child.objects.filter(id__in=touched))
+        return len(missing)
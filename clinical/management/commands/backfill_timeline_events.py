@@ -0,0 +1,52 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clinical.models import ChildMilestone, Encounter, TimelineEvent
+from patients.models import Child
+
+
+class Command(BaseCommand):
+    help = "Creates TimelineEvent rows for registrations, encounters and milestone states recorded before the event log existed. Safe to rerun."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+
+        registrations = Child.objects.exclude(timeline_events__event_type='REGISTERED')
+        self.backfill('registrations', registrations, lambda child: TimelineEvent(
+            child=child, event_type='REGISTERED', occurred_at=child.enrollment_date,
+        ))
+
+        encounters = Encounter.objects.filter(timeline_events__isnull=True)
+        self.backfill('encounters', encounters, lambda enc: TimelineEvent(
+            child_id=enc.child_id, event_type='ENCOUNTER', encounter=enc, occurred_at=enc.encounter_date,
+        ))
+
+        # Only the current state of older milestones is known; earlier transitions were overwritten
+        milestones = ChildMilestone.objects.exclude(status='PENDING').filter(timeline_events__isnull=True)
+        self.backfill('milestones', milestones, lambda cm: TimelineEvent(
+            child_id=cm.child_id, event_type=cm.status, milestone=cm,
+            evidence=cm.evidence.name or None, occurred_at=self.milestone_time(cm),
+        ))
+
+    def milestone_time(self, cm):
+        if cm.status_changed_at:
+            return cm.status_changed_at
+        if cm.completion_date:
+            return timezone.make_aware(datetime.datetime.combine(cm.completion_date, datetime.time.min))
+        return cm.updated_at
+
+    def backfill(self, label, queryset, make_event):
+        batch, created = [], 0
+        for obj in queryset.order_by('pk').iterator(chunk_size=self.batch_size):
+            batch.append(make_event(obj))
+            if len(batch) >= self.batch_size:
+                created += len(TimelineEvent.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(TimelineEvent.objects.bulk_create(batch))
+        self.stdout.write(f"Backfilled {created} {label}")
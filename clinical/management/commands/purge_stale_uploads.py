@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from clinical import uploads
+
+
+class Command(BaseCommand):
+    help = "Deletes resumable evidence uploads (and their part files) that have not received a chunk recently. Run from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=settings.EVIDENCE_UPLOAD_EXPIRY_HOURS,
+            help="Age of the last chunk after which an upload counts as abandoned.",
+        )
+
+    def handle(self, *args, **options):
+        purged = 0
+        for upload in uploads.stale_uploads(options['hours']).iterator():
+            uploads.discard(upload)
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} stale uploads"))
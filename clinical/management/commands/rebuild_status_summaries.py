@@ -0,0 +1,39 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from clinical.models import ChildStatusSummary
+from clinical.schedule import get_schedule
+from patients.models import Child
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the denormalized dashboard status summary for every child. Run daily, as age-based activation moves forward."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--due', action='store_true',
+            help="Only rebuild children without a summary or who reached a new milestone age since the last rebuild.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        today = datetime.date.today()
+
+        if options['due']:
+            schedule = get_schedule()
+            rows = Child.objects.order_by('id').values_list('id', 'date_of_birth', 'status_summary__as_of')
+            child_ids = [
+                pk for pk, dob, as_of in rows
+                if as_of is None or schedule.unlocked_between(dob, as_of, today)
+            ]
+        else:
+            child_ids = list(Child.objects.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(child_ids), batch_size):
+            batch = child_ids[start:start + batch_size]
+            ChildStatusSummary.objects.rebuild(Child.objects.filter(id__in=batch), today=today)
+            self.stdout.write(f"Rebuilt {min(start + batch_size, len(child_ids))}/{len(child_ids)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt status summaries for {len(child_ids)} children"))
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0009_milestonetemplate_description_kn_and_more'),
+        ('patients', '0003_family_alter_caregiver_relationship_caregiver_family_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChildStatusSummary',
+            fields=[
+                ('child', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='status_summary', serialize=False, to='patients.child')),
+                ('actionable_count', models.IntegerField(default=0)),
+                ('review_count', models.IntegerField(default=0)),
+                ('is_at_risk', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('red', 'At Risk'), ('amber', 'Tasks Pending'), ('blue', 'In Review'), ('green', 'None Pending')], default='green', max_length=10)),
+                ('as_of', models.DateField(help_text='Day the age-based counts were computed for')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
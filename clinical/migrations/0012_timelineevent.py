@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 19:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0011_childmilestone_status_changed_at_and_more'),
+        ('patients', '0003_family_alter_caregiver_relationship_caregiver_family_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('REGISTERED', 'Registered'), ('ENCOUNTER', 'Encounter'), ('SUBMITTED', 'Evidence Submitted'), ('AI_REVIEWED', 'AI Reviewed'), ('COMPLETED', 'Completed'), ('REJECTED', 'Rejected')], max_length=20)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('evidence', models.FileField(blank=True, null=True, upload_to='milestone_evidence/')),
+                ('child', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_events', to='patients.child')),
+                ('encounter', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_events', to='clinical.encounter')),
+                ('milestone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_events', to='clinical.childmilestone')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['child', '-occurred_at', '-id'], name='timeline_child_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0013_evidenceupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='childmilestone',
+            name='evidence_checksum',
+            field=models.CharField(blank=True, help_text='SHA-256 of the evidence file', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='childmilestone',
+            name='evidence_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 19:47
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0014_childmilestone_evidence_checksum'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='childmilestone',
+            name='evidence',
+            field=models.FileField(blank=True, null=True, storage=core.storage.get_evidence_storage, upload_to='milestone_evidence/'),
+        ),
+        migrations.AlterField(
+            model_name='timelineevent',
+            name='evidence',
+            field=models.FileField(blank=True, null=True, storage=core.storage.get_evidence_storage, upload_to='milestone_evidence/'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 19:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0015_evidence_storage'),
+        ('media', '0003_evidence_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='childmilestone',
+            name='evidence_asset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='media.mediaasset'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+# The standard templates created by populate_milestones.py
+DOMAINS = {
+    'Social Smile': 'SOCIAL',
+    'Head Up': 'GROSS_MOTOR',
+    'Rollover': 'GROSS_MOTOR',
+    'Babbling': 'LANGUAGE',
+    'Sits with Support': 'GROSS_MOTOR',
+    'Passes Objects': 'FINE_MOTOR',
+    'Crawling': 'GROSS_MOTOR',
+    'Pincer Grasp': 'FINE_MOTOR',
+    'First Steps': 'GROSS_MOTOR',
+    'First Words': 'LANGUAGE',
+    'Walking Well': 'GROSS_MOTOR',
+    'Spoon Feeding': 'FINE_MOTOR',
+    'Running': 'GROSS_MOTOR',
+    '2-Word Sentences': 'LANGUAGE',
+}
+
+
+def set_domains(apps, schema_editor):
+    MilestoneTemplate = apps.get_model('clinical', 'MilestoneTemplate')
+    for title, domain in DOMAINS.items():
+        MilestoneTemplate.objects.filter(title_en=title).update(domain=domain)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0016_childmilestone_evidence_asset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='milestonetemplate',
+            name='domain',
+            field=models.CharField(blank=True, choices=[('GROSS_MOTOR', 'Gross Motor'), ('FINE_MOTOR', 'Fine Motor'), ('LANGUAGE', 'Language'), ('SOCIAL', 'Social')], max_length=20),
+        ),
+        migrations.RunPython(set_domains, migrations.RunPython.noop),
+    ]
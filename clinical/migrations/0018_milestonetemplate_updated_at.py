@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 21:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0017_milestonetemplate_domain'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='milestonetemplate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
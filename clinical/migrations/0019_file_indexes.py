@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 21:30
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0018_milestonetemplate_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='childmilestone',
+            name='evidence',
+            field=models.FileField(blank=True, db_index=True, null=True, storage=core.storage.get_evidence_storage, upload_to='milestone_evidence/'),
+        ),
+        migrations.AlterField(
+            model_name='timelineevent',
+            name='evidence',
+            field=models.FileField(blank=True, db_index=True, null=True, storage=core.storage.get_evidence_storage, upload_to='milestone_evidence/'),
+        ),
+    ]
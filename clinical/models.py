@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from core.storage import get_evidence_storage
 from patients.models import Child
+import datetime
 import uuid
 
 class Encounter(models.Model):
@@ -17,6 +20,7 @@ class Encounter(models.Model):
     location_lat = models.FloatField(null=True, blank=True)
     location_lng = models.FloatField(null=True, blank=True)
     notes = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Encounter: {self.child} on {self.encounter_date.date()}"
@@ -27,6 +31,7 @@ class ScreeningResult(models.Model):
     question_id = models.CharField(max_length=50) # Reference to quesionnaire
     response = models.CharField(max_length=50) # e.g., 'Yes', 'No', 'Sometimes'
     is_flagged = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.milestone_category}: {self.response}"
@@ -36,17 +41,48 @@ class MilestoneTemplate(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     expected_age_months = models.IntegerField(help_text="Age in months when this milestone becomes active")
-    
+    DOMAIN_CHOICES = [
+        ('GROSS_MOTOR', 'Gross Motor'),
+        ('FINE_MOTOR', 'Fine Motor'),
+        ('LANGUAGE', 'Language'),
+        ('SOCIAL', 'Social'),
+    ]
+    # Decides which AI analysis stages run on the evidence (e.g. audio for LANGUAGE and SOCIAL)
+    domain = models.CharField(max_length=20, choices=DOMAIN_CHOICES, blank=True)
+    # Part of the catalog version every process checks (catalog.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"{self.title} ({self.expected_age_months}m)"
 
+class ChildMilestoneManager(models.Manager):
+    def materialize(self, child_ids, template_ids=None, batch_size=1000):
+        """
+        Creates the missing PENDING milestones for every (child, template) pair
+        with batched INSERTs; pairs that already exist are skipped by the
+        (child, template) unique constraint. Defaults to every template.
+        """
+        if template_ids is None:
+            from .catalog import get_catalog
+
+            template_ids = sorted(get_catalog().ids)
+        rows = [self.model(child_id=child_id, template_id=template_id)
+                for child_id in child_ids for template_id in template_ids]
+        self.bulk_create(rows, ignore_conflicts=True, batch_size=batch_size)
+        return len(rows)
+
 class ChildMilestone(models.Model):
     """Tracks a specific child's progress on a milestone"""
     child = models.ForeignKey('patients.Child', on_delete=models.CASCADE, related_name='milestones')
     template = models.ForeignKey(MilestoneTemplate, on_delete=models.CASCADE)
     is_completed = models.BooleanField(default=False)
     completion_date = models.DateField(null=True, blank=True)
-    evidence = models.FileField(upload_to='milestone_evidence/', null=True, blank=True)
+    evidence = models.FileField(upload_to='milestone_evidence/', storage=get_evidence_storage, null=True, blank=True,
+                                db_index=True)
+    evidence_size = models.BigIntegerField(null=True, blank=True)
+    evidence_checksum = models.CharField(max_length=64, null=True, blank=True, help_text="SHA-256 of the evidence file")
+    # The MediaAsset for the current evidence, carrying its processed rendition
+    evidence_asset = models.ForeignKey('media.MediaAsset', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -56,9 +92,148 @@ class ChildMilestone(models.Model):
         ('REJECTED', 'Rejected'),
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    status_changed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ChildMilestoneManager()
 
     class Meta:
         unique_together = ('child', 'template')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_evidence = instance.__dict__.get('evidence') or None
+        return instance
+
+    def save(self, *args, **kwargs):
+        status_changed = self.status != getattr(self, '_loaded_status', None)
+        evidence_changed = (self.evidence.name or None) != getattr(self, '_loaded_evidence', None)
+        if status_changed:
+            self.status_changed_at = timezone.now()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'status_changed_at'}
+        super().save(*args, **kwargs)
+
+        # Every transition (and every re-upload) is appended to the child's timeline log
+        if self.status != 'PENDING' and (status_changed or evidence_changed):
+            TimelineEvent.objects.create(
+                child_id=self.child_id,
+                event_type=self.status,
+                milestone=self,
+                evidence=self.evidence.name or None,
+                occurred_at=self.status_changed_at if status_changed else timezone.now(),
+            )
+        self._loaded_status = self.status
+        self._loaded_evidence = self.evidence.name or None
+
     def __str__(self):
         return f"{self.child.first_name} - {self.template.title}: {self.get_status_display()}"
+
+class TimelineEvent(models.Model):
+    """Append-only log of what happened to a child; the paginated timeline reads it by (child, date)"""
+    EVENT_TYPE_CHOICES = [
+        ('REGISTERED', 'Registered'),
+        ('ENCOUNTER', 'Encounter'),
+        ('SUBMITTED', 'Evidence Submitted'),
+        ('AI_REVIEWED', 'AI Reviewed'),
+        ('COMPLETED', 'Completed'),
+        ('REJECTED', 'Rejected'),
+    ]
+    child = models.ForeignKey('patients.Child', on_delete=models.CASCADE, related_name='timeline_events')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    encounter = models.ForeignKey(Encounter, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_events')
+    milestone = models.ForeignKey(ChildMilestone, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_events')
+    # Evidence as it was at the time of the event, so earlier uploads stay visible
+    evidence = models.FileField(upload_to='milestone_evidence/', storage=get_evidence_storage, null=True, blank=True,
+                                db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['child', '-occurred_at', '-id'], name='timeline_child_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.child.first_name}: {self.get_event_type_display()} on {self.occurred_at.date()}"
+
+class ChildStatusSummaryManager(models.Manager):
+    def rebuild(self, children, today=None):
+        """
+        Recomputes summaries for a queryset of children with one aggregate query
+        and one upsert. Returns the summaries keyed by child id.
+        """
+        today = today or datetime.date.today()
+        summaries = [
+            self.model(
+                child=child,
+                actionable_count=child.actionable_count,
+                review_count=child.review_count,
+                is_at_risk=child.is_at_risk,
+                status=child.status_color,
+                as_of=today,
+            )
+            for child in children.with_milestone_status(today=today)
+        ]
+        self.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['child'],
+            update_fields=['actionable_count', 'review_count', 'is_at_risk', 'status', 'as_of', 'updated_at'],
+        )
+        return {s.child_id: s for s in summaries}
+
+    def refresh_for_child(self, child_id):
+        return self.rebuild(Child.objects.filter(pk=child_id)).get(child_id)
+
+class ChildStatusSummary(models.Model):
+    """Denormalized dashboard state for a child, refreshed on every milestone transition"""
+    STATUS_CHOICES = [
+        ('red', 'At Risk'),
+        ('amber', 'Tasks Pending'),
+        ('blue', 'In Review'),
+        ('green', 'None Pending'),
+    ]
+    child = models.OneToOneField('patients.Child', on_delete=models.CASCADE, primary_key=True, related_name='status_summary')
+    actionable_count = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    is_at_risk = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='green')
+    as_of = models.DateField(help_text="Day the age-based counts were computed for")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ChildStatusSummaryManager()
+
+    def is_stale(self, child, today):
+        # Admin edits (e.g. is_at_risk) touch child.updated_at; otherwise the counts only
+        # move when the child ages past the next template in the schedule.
+        from .schedule import get_schedule
+
+        return (
+            child.updated_at > self.updated_at
+            or self.as_of > today
+            or get_schedule().unlocked_between(child.date_of_birth, self.as_of, today)
+        )
+
+    def __str__(self):
+        return f"{self.child.first_name}: {self.status}"
+
+class EvidenceUpload(models.Model):
+    """A resumable evidence upload: chunks are appended to a part file until `received` reaches `size`"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    milestone = models.ForeignKey(ChildMilestone, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField(help_text="Total bytes the client will send")
+    received = models.BigIntegerField(default=0, help_text="Bytes durably written so far; the next chunk's offset")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
+    def __str__(self):
+        return f"{self.filename}: {self.received}/{self.size}"
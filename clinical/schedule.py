@@ -0,0 +1,67 @@
+"""
+Process-wide index of MilestoneTemplates sorted by expected age.
+
+Answers "which templates are active at age N" and "when does the next one
+unlock" with a binary search instead of scanning templates per child. The
+index is derived from the template catalog (catalog.py) and rebuilt whenever
+the catalog version changes, so it shares its invalidation.
+"""
+import bisect
+import datetime
+import threading
+
+from .catalog import get_catalog
+
+# Ages are counted in 30-day months throughout the app
+DAYS_PER_MONTH = 30
+
+
+def age_in_months(date_of_birth, today=None):
+    today = today or datetime.date.today()
+    return int((today - date_of_birth).days / DAYS_PER_MONTH)
+
+
+class MilestoneSchedule:
+    def __init__(self, templates, version=0):
+        rows = sorted((age, pk) for pk, age in templates)
+        self.ages = [age for age, _ in rows]
+        self.template_ids = [pk for _, pk in rows]
+        self.distinct_ages = sorted(set(self.ages))
+        self.version = version
+
+    def active_template_ids(self, age_months):
+        """Ids of templates unlocked at `age_months` (expected age <= age)."""
+        return self.template_ids[:bisect.bisect_right(self.ages, age_months)]
+
+    def next_unlock_age(self, age_months):
+        """Expected age of the next template to unlock after `age_months`, or None."""
+        i = bisect.bisect_right(self.distinct_ages, age_months)
+        return self.distinct_ages[i] if i < len(self.distinct_ages) else None
+
+    def next_unlock_date(self, date_of_birth, today=None):
+        next_age = self.next_unlock_age(age_in_months(date_of_birth, today))
+        if next_age is None:
+            return None
+        return date_of_birth + datetime.timedelta(days=DAYS_PER_MONTH * next_age)
+
+    def unlocked_between(self, date_of_birth, since, today=None):
+        """True if any template unlocked for this child after `since`, up to and including `today`."""
+        next_date = self.next_unlock_date(date_of_birth, since)
+        return next_date is not None and next_date <= (today or datetime.date.today())
+
+
+_lock = threading.Lock()
+_schedule = None
+
+
+def get_schedule():
+    global _schedule
+    catalog = get_catalog()
+    schedule = _schedule
+    if schedule is None or schedule.version != catalog.version:
+        with _lock:
+            if _schedule is None or _schedule.version != catalog.version:
+                templates = [(t.id, t.expected_age_months) for t in catalog]
+                _schedule = MilestoneSchedule(templates, version=catalog.version)
+            schedule = _schedule
+    return schedule
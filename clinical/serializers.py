@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Encounter, ScreeningResult
+from .models import Encounter, ScreeningResult, ChildMilestone, EvidenceUpload
+from media.serving import media_url, scope_for
+from .catalog import get_catalog
 
 class ScreeningResultSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,3 +14,50 @@ class EncounterSerializer(serializers.ModelSerializer):
     class Meta:
         model = Encounter
         fields = '__all__'
+
+class ChildMilestoneSerializer(serializers.ModelSerializer):
+    # Template fields come from the cached catalog, translated for the active language
+    title = serializers.SerializerMethodField()
+    description = serializers.SerializerMethodField()
+    expected_age_months = serializers.SerializerMethodField()
+    evidence_url = serializers.SerializerMethodField()
+    # Compact rendition for reviewers once processed, else the original
+    review_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChildMilestone
+        fields = ['id', 'child', 'title', 'description', 'expected_age_months', 'status', 'evidence_url', 'review_url']
+
+    def get_title(self, obj):
+        return get_catalog().get(obj.template_id).title
+
+    def get_description(self, obj):
+        return get_catalog().get(obj.template_id).description
+
+    def get_expected_age_months(self, obj):
+        return get_catalog().get(obj.template_id).expected_age_months
+
+    def file_url(self, obj, file):
+        return media_url(self.context.get('request'), file, scope_for(obj.child))
+
+    def get_evidence_url(self, obj):
+        return self.file_url(obj, obj.evidence)
+
+    def get_review_url(self, obj):
+        asset = obj.evidence_asset
+        if asset is not None and asset.is_processed and asset.rendition:
+            return self.file_url(obj, asset.rendition)
+        return self.file_url(obj, obj.evidence)
+
+class EvidenceUploadSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+
+    class Meta:
+        model = EvidenceUpload
+        fields = ['id', 'milestone', 'filename', 'content_type', 'size', 'offset']
+        read_only_fields = ['milestone']
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Size must be positive.")
+        return value
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from patients.models import Child
+
+from . import catalog
+from .models import Encounter, MilestoneTemplate, TimelineEvent
+
+
+@receiver(post_save, sender=Child)
+def record_registration(sender, instance, created, **kwargs):
+    if created:
+        TimelineEvent.objects.create(child=instance, event_type='REGISTERED', occurred_at=instance.enrollment_date)
+
+
+@receiver(post_save, sender=Encounter)
+def record_encounter(sender, instance, created, **kwargs):
+    if created:
+        TimelineEvent.objects.create(
+            child_id=instance.child_id,
+            event_type='ENCOUNTER',
+            encounter=instance,
+            occurred_at=instance.encounter_date,
+        )
+
+
+@receiver([post_save, post_delete], sender=MilestoneTemplate)
+def template_changed(sender, instance, **kwargs):
+    catalog.invalidate()
@@ -1,3 +1,266 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from patients.models import Child
+from . import uploads
+from .catalog import get_catalog
+from .models import ChildMilestone, ChildStatusSummary, EvidenceUpload, MilestoneTemplate
+from .schedule import get_schedule
+
+
+class MilestoneDetailTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.child = Child.objects.create(
+            first_name='Arjun', last_name='Test', sex='M',
+            date_of_birth=datetime.date.today() - datetime.timedelta(days=150),
+        )
+        template = MilestoneTemplate.objects.create(
+            title='Rollover', title_hi='पलटना',
+            description='Rolls from tummy to back', description_hi='पेट से पीठ के बल पलटता है',
+            expected_age_months=4,
+        )
+        self.milestone = ChildMilestone.objects.create(child=self.child, template=template)
+        self.url = f'/api/clinical/milestones/{self.milestone.id}/'
+
+    def test_detail_is_localized_single_lookup(self):
+        get_catalog()  # template fields come from the process-wide catalog
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'child': str(self.child.id)}, HTTP_ACCEPT_LANGUAGE='hi')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'पलटना')
+        self.assertEqual(response.data['description'], 'पेट से पीठ के बल पलटता है')
+        self.assertEqual(response.data['status'], 'PENDING')
+        self.assertIsNone(response.data['evidence_url'])
+
+    def test_missing_milestone(self):
+        self.assertEqual(self.client.get('/api/clinical/milestones/999999/', {'child': str(self.child.id)}).status_code, 404)
+
+    def test_detail_requires_the_milestones_child(self):
+        other = Child.objects.create(first_name='Other', last_name='Test', sex='F', date_of_birth=self.child.date_of_birth)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'child': str(other.id)}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'child': 'not-a-uuid'}).status_code, 404)
+
+
+class MilestoneScheduleTests(TestCase):
+    def setUp(self):
+        for title, age in (('Social Smile', 2), ('Head Up', 2), ('Rollover', 4), ('Walks Alone', 12)):
+            MilestoneTemplate.objects.create(title=title, expected_age_months=age)
+
+    def test_active_and_next_unlock(self):
+        schedule = get_schedule()
+        titles = dict(MilestoneTemplate.objects.values_list('id', 'title'))
+        self.assertEqual(schedule.active_template_ids(1), [])
+        self.assertEqual({titles[i] for i in schedule.active_template_ids(5)}, {'Social Smile', 'Head Up', 'Rollover'})
+        self.assertEqual(schedule.next_unlock_age(4), 12)
+        self.assertIsNone(schedule.next_unlock_age(12))
+
+        dob = datetime.date(2025, 1, 1)
+        self.assertEqual(schedule.next_unlock_date(dob, today=datetime.date(2025, 2, 15)), dob + datetime.timedelta(days=60))
+        self.assertTrue(schedule.unlocked_between(dob, datetime.date(2025, 2, 15), datetime.date(2025, 3, 2)))
+        self.assertFalse(schedule.unlocked_between(dob, datetime.date(2025, 3, 2), datetime.date(2025, 4, 15)))
+
+    def test_rebuilt_after_template_change(self):
+        version = get_schedule().version
+        MilestoneTemplate.objects.create(title='Babbling', expected_age_months=4)
+        schedule = get_schedule()
+        self.assertGreater(schedule.version, version)
+        self.assertEqual(len(schedule.active_template_ids(4)), 4)
+
+    def test_lookup_needs_no_queries_once_built(self):
+        get_schedule()
+        with self.assertNumQueries(0):
+            get_schedule().active_template_ids(6)
+
+
+class TemplateCatalogTests(TestCase):
+    def setUp(self):
+        self.template = MilestoneTemplate.objects.create(
+            title='Rollover', title_hi='पलटना', expected_age_months=4,
+        )
+
+    def test_translated_entries_with_default_fallback(self):
+        catalog = get_catalog()
+        self.assertEqual(catalog.get(self.template.id, 'hi').title, 'पलटना')
+        self.assertEqual(catalog.get(self.template.id, 'kn').title, 'Rollover')
+        self.assertEqual(catalog.get(self.template.id, 'hi').expected_age_months, 4)
+
+    def test_reloaded_after_save(self):
+        stale = get_catalog()
+        self.template.title_hi = 'करवट'
+        self.template.save()
+        fresh = get_catalog()
+        self.assertNotEqual(fresh.version, stale.version)
+        self.assertEqual(fresh.get(self.template.id, 'hi').title, 'करवट')
+        with self.assertNumQueries(0):
+            get_catalog().get(self.template.id, 'hi')
+
+    def test_changes_from_other_processes_seen_at_next_check(self):
+        get_catalog()
+        # Written by another process: no signal reaches this one
+        MilestoneTemplate.objects.filter(pk=self.template.pk).update(
+            title_hi='करवट', updated_at=timezone.now() + datetime.timedelta(seconds=1),
+        )
+        self.assertEqual(get_catalog().get(self.template.id, 'hi').title, 'पलटना')
+        with override_settings(MILESTONE_CATALOG_CHECK_SECONDS=0):
+            self.assertEqual(get_catalog().get(self.template.id, 'hi').title, 'करवट')
+            # A delete changes the version too
+            MilestoneTemplate.objects.filter(pk=self.template.pk).delete()
+            self.assertEqual(len(get_catalog()), 0)
+
+
+class BackfillChildMilestonesTests(TestCase):
+    def setUp(self):
+        self.children = [
+            Child.objects.create(first_name=f'Child {i}', last_name='Test', sex='F',
+                                 date_of_birth=datetime.date.today() - datetime.timedelta(days=200))
+            for i in range(5)
+        ]
+        self.smile = MilestoneTemplate.objects.create(title='Social Smile', expected_age_months=2)
+        ChildMilestone.objects.create(child=self.children[0], template=self.smile, status='COMPLETED')
+        MilestoneTemplate.objects.create(title='Rollover', expected_age_months=4)
+
+    def backfill(self, **options):
+        out = io.StringIO()
+        call_command('backfill_child_milestones', batch_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_creates_missing_rows_in_batches_and_is_rerunnable(self):
+        output = self.backfill()
+        self.assertIn('Backfilled 9 milestones for 5 children', output)
+        self.assertEqual(output.count('Processed'), 3)
+        self.assertEqual(ChildMilestone.objects.count(), 10)
+        self.assertEqual(ChildMilestone.objects.get(child=self.children[0], template=self.smile).status, 'COMPLETED')
+        self.assertEqual(ChildStatusSummary.objects.get(child=self.children[1]).actionable_count, 2)
+
+        self.assertIn('Backfilled 0 milestones for 5 children', self.backfill())
+
+    def test_resume_after_child(self):
+        ordered = sorted(child.id for child in self.children)
+        self.backfill(start_after=str(ordered[2]))
+        self.assertEqual(set(ChildMilestone.objects.filter(template__title='Rollover').values_list('child_id', flat=True)),
+                         set(ordered[3:]))
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp, EVIDENCE_UPLOAD_DIR=os.path.join(self.tmp, 'uploads'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        child = Child.objects.create(first_name='Zara', last_name='Test', sex='F',
+                                     date_of_birth=datetime.date.today() - datetime.timedelta(days=150))
+        template = MilestoneTemplate.objects.create(title='Rollover', expected_age_months=4)
+        self.milestone = ChildMilestone.objects.create(child=child, template=template)
+        self.video = os.urandom(300_000)
+
+    def start(self):
+        response = self.client.post(f'/api/clinical/milestones/{self.milestone.id}/uploads/',
+                                    {'filename': 'clip.webm', 'size': len(self.video)}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return f"/api/clinical/evidence-uploads/{response.data['id']}/"
+
+    def put(self, url, offset, data):
+        return self.client.put(url, data, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_resume_after_interrupted_chunk(self):
+        url = self.start()
+        self.assertEqual(self.put(url, 0, self.video[:100_000]).data['offset'], 100_000)
+
+        # Retried chunk at a stale offset: told where to resume instead
+        conflict = self.put(url, 0, self.video[:100_000])
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict['Upload-Offset'], '100000')
+
+        self.assertEqual(self.client.post(f'{url}finalize/').status_code, 409)
+        self.assertEqual(self.client.get(url).data['offset'], 100_000)
+        self.assertEqual(self.put(url, 100_000, self.video[100_000:]).data['offset'], len(self.video))
+
+        response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, 200)
+        self.milestone.refresh_from_db()
+        self.assertEqual(self.milestone.status, 'SUBMITTED')
+        self.assertEqual(self.milestone.evidence_checksum, hashlib.sha256(self.video).hexdigest())
+        self.assertEqual(self.milestone.evidence_size, len(self.video))
+        with self.milestone.evidence.open('rb') as f:
+            self.assertEqual(f.read(), self.video)
+        self.assertFalse(EvidenceUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'uploads')), [])
+
+    def test_finalize_hashes_before_locking(self):
+        url = self.start()
+        self.put(url, 0, self.video)
+        hashed = []
+        finished_digest = uploads.finished_digest
+        outside = len(connection.atomic_blocks)  # the test case's own transaction
+
+        def digest(upload):
+            hashed.append(len(connection.atomic_blocks) == outside)
+            return finished_digest(upload)
+
+        with mock.patch('clinical.uploads.finished_digest', side_effect=digest):
+            self.assertEqual(self.client.post(f'{url}finalize/').status_code, 200)
+        self.assertEqual(hashed, [True])
+        self.milestone.refresh_from_db()
+        self.assertEqual(self.milestone.evidence_checksum, hashlib.sha256(self.video).hexdigest())
+
+    def test_multipart_upload_is_streamed_and_hashed(self):
+        video = SimpleUploadedFile('clip.webm', self.video, content_type='video/webm')
+        with mock.patch('django.core.files.uploadedfile.TemporaryUploadedFile.read', side_effect=AssertionError):
+            response = self.client.post(f'/api/clinical/milestones/{self.milestone.id}/upload_evidence/',
+                                        {'file': video}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.milestone.refresh_from_db()
+        self.assertEqual(self.milestone.evidence_checksum, hashlib.sha256(self.video).hexdigest())
+        self.assertEqual(self.milestone.evidence_size, len(self.video))
+        self.assertEqual(os.path.getsize(self.milestone.evidence.path), len(self.video))
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'uploads')), [])
+
+    def test_stalled_chunk_loses_to_its_retry(self):
+        url = self.start()
+        upload = EvidenceUpload.objects.get()
+        retry = self.video[:100_000]
+
+        class StalledStream(io.BytesIO):
+            # The client gives up on this request and retries the chunk while the body is still arriving
+            def read(stream, size=-1):
+                if stream.tell() == 0:
+                    self.assertEqual(self.put(url, 0, retry).data['offset'], len(retry))
+                return super().read(size)
+
+        with self.assertRaises(uploads.OffsetMismatch):
+            uploads.append_chunk(upload, 0, StalledStream(bytes(50_000)), 50_000)
+        upload.refresh_from_db()
+        self.assertEqual(upload.received, len(retry))
+        with open(uploads.part_path(upload), 'rb') as f:
+            self.assertEqual(f.read(), retry)
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'uploads')), [f'{upload.id}.part'])
+
+    def test_chunk_past_declared_size(self):
+        url = self.start()
+        self.assertEqual(self.put(url, 0, self.video + b'extra').status_code, 400)
+
+    def test_stale_uploads_are_purged(self):
+        url = self.start()
+        self.put(url, 0, self.video[:1000])
+        EvidenceUpload.objects.update(updated_at=timezone.now() - datetime.timedelta(days=2))
+        call_command('purge_stale_uploads', stdout=io.StringIO())
+        self.assertFalse(EvidenceUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'uploads')), [])
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,134 @@
+"""
+Resumable evidence uploads.
+
+A client opens an EvidenceUpload session, PUTs the video in chunks at
+explicit offsets and finalizes it. Chunks are appended to a part file under
+settings.EVIDENCE_UPLOAD_DIR; whatever reached disk before a dropped
+connection is kept, so the client resumes from the offset the server reports
+instead of starting over. Finalizing hashes the part file before locking the
+session and hands it to storage as a temporary file, which FileSystemStorage
+moves into place without reading it again.
+
+A chunk is read from the network into a file of its own, with no
+transaction open, and only then spliced into the part file. Two requests
+for the same offset (a client retrying over a stalled connection) race on a
+conditional UPDATE of `received`; the loser is told the new offset.
+"""
+import datetime
+import glob
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+
+from core.uploadhandlers import StagedFile, file_digest
+
+CHUNK_READ_SIZE = 64 * 1024
+
+
+class OffsetMismatch(Exception):
+    """The chunk does not start where the part file ends."""
+
+
+def part_path(upload):
+    return os.path.join(settings.EVIDENCE_UPLOAD_DIR, f'{upload.id}.part')
+
+
+def receive_chunk(upload, stream, length):
+    """
+    Writes up to `length` bytes from `stream` to a new chunk file and returns its path.
+    A connection dropped mid-chunk keeps the bytes that arrived.
+    """
+    path = f'{part_path(upload)}.{uuid.uuid4().hex}.chunk'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        remaining = length
+        try:
+            while remaining > 0:
+                block = stream.read(min(CHUNK_READ_SIZE, remaining))
+                if not block:
+                    break
+                f.write(block)
+                remaining -= len(block)
+        except UnreadablePostError:
+            pass
+    return path
+
+
+def commit_chunk(upload, offset, chunk):
+    """
+    Splices the chunk file into the part file at `offset` and returns the new offset,
+    unless another request already moved upload.received past `offset`.
+    Bytes past `offset` (left by an interrupted chunk) are overwritten.
+    """
+    from .models import EvidenceUpload
+
+    end = offset + os.path.getsize(chunk)
+    with transaction.atomic():
+        # Only one request's UPDATE matches the offset it read
+        claimed = EvidenceUpload.objects.filter(pk=upload.pk, received=offset).update(
+            received=end, updated_at=timezone.now(),
+        )
+        if not claimed:
+            raise OffsetMismatch()
+        path = part_path(upload)
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f, open(chunk, 'rb') as src:
+            f.seek(offset)
+            f.truncate()
+            shutil.copyfileobj(src, f)
+            f.flush()
+            os.fsync(f.fileno())
+    return end
+
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Writes `length` bytes from `stream` at `offset` and returns the new offset.
+    Raises OffsetMismatch if `offset` is not (or no longer) where the upload stands.
+    """
+    if offset != upload.received:
+        raise OffsetMismatch(upload.received)
+    chunk = receive_chunk(upload, stream, length)
+    try:
+        return commit_chunk(upload, offset, chunk)
+    finally:
+        os.remove(chunk)
+
+
+def finished_file(upload, sha256=None):
+    file = StagedFile(part_path(upload), upload.filename)
+    if sha256:
+        file.sha256 = sha256
+    return file
+
+
+def finished_digest(upload):
+    """
+    SHA-256 of a complete upload's part file. Once every byte is received no
+    chunk can commit any more, so this is read without holding a lock.
+    """
+    with finished_file(upload) as file:
+        return file_digest(file)[0]
+
+
+def discard(upload):
+    """Deletes the session, its part file and any chunk still being received."""
+    path = part_path(upload)
+    for name in [path, *glob.glob(glob.escape(path) + '.*.chunk')]:
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+    upload.delete()
+
+
+def stale_uploads(hours=None, now=None):
+    from .models import EvidenceUpload
+
+    hours = settings.EVIDENCE_UPLOAD_EXPIRY_HOURS if hours is None else hours
+    cutoff = (now or timezone.now()) - datetime.timedelta(hours=hours)
+    return EvidenceUpload.objects.filter(updated_at__lt=cutoff)
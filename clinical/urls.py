@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EncounterViewSet, ScreeningResultViewSet, MilestoneViewSet
+from .views import EncounterViewSet, ScreeningResultViewSet, MilestoneViewSet, EvidenceUploadViewSet
 
 router = DefaultRouter()
 router.register(r'encounters', EncounterViewSet)
 router.register(r'screening-results', ScreeningResultViewSet)
 router.register(r'milestones', MilestoneViewSet, basename='milestone')
+router.register(r'evidence-uploads', EvidenceUploadViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
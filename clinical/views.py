@@ -1,9 +1,41 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, mixins, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import Encounter, ScreeningResult, ChildMilestone
-from .serializers import EncounterSerializer, ScreeningResultSerializer
+from django.db import transaction
+from functools import partial
+from core.uploadhandlers import ChecksumUploadMixin, file_digest
+from .models import Encounter, ScreeningResult, ChildMilestone, ChildStatusSummary, EvidenceUpload
+from .serializers import EncounterSerializer, ScreeningResultSerializer, ChildMilestoneSerializer, EvidenceUploadSerializer
+from . import uploads
 import datetime
+import uuid
+
+def submit_evidence(milestone, file):
+    """
+    Attaches the evidence file and moves the milestone into review (Review Flow Step 1).
+    The file is stored once, as a MediaAsset that is normalized in the background after commit,
+    and an AI review job is queued with it.
+    """
+    from media import ai_review, processing
+    from media.models import MediaAsset
+
+    milestone.evidence_checksum, milestone.evidence_size = file_digest(file)
+    milestone.status = 'SUBMITTED'
+    # milestone.is_completed = True # REMOVED: Wait for review
+    milestone.completion_date = None # Not done yet
+    with transaction.atomic():
+        asset = MediaAsset.objects.create(
+            file=file, media_type='VIDEO',
+            checksum=milestone.evidence_checksum, file_size=milestone.evidence_size,
+        )
+        # Same storage, so the milestone points at the stored blob
+        milestone.evidence = asset.file.name
+        milestone.evidence_asset = asset
+        milestone.save()
+        ChildStatusSummary.objects.refresh_for_child(milestone.child_id)
+        ai_review.enqueue(milestone)
+        transaction.on_commit(partial(processing.enqueue, asset.id))
 
 class EncounterViewSet(viewsets.ModelViewSet):
     queryset = Encounter.objects.all()
@@ -13,14 +45,31 @@ class ScreeningResultViewSet(viewsets.ModelViewSet):
     queryset = ScreeningResult.objects.all()
     serializer_class = ScreeningResultSerializer
 
-class MilestoneViewSet(viewsets.GenericViewSet):
+class MilestoneViewSet(ChecksumUploadMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     """
-    Handle individual milestone actions
+    Handle individual milestone actions.
+    GET ?child=<child uuid> returns the localized title/description, status and evidence URL
+    for the recording screen.
     """
-    queryset = ChildMilestone.objects.all()
+    queryset = ChildMilestone.objects.select_related('child', 'evidence_asset')
+    serializer_class = ChildMilestoneSerializer
     # lookup_field = 'pk' # Default
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'retrieve':
+            return queryset
+        # Milestone ids are sequential, and the detail carries family-signed evidence links,
+        # so it is only found through the (unguessable) child id, as on the timeline
+        child_id = self.request.query_params.get('child')
+        if not child_id:
+            raise ValidationError({'child': 'Child ID required'})
+        try:
+            return queryset.filter(child_id=uuid.UUID(child_id))
+        except ValueError:
+            return queryset.none()
+
     @action(detail=True, methods=['post'])
     def upload_evidence(self, request, pk=None):
         try:
@@ -31,11 +80,7 @@ class MilestoneViewSet(viewsets.GenericViewSet):
             if not file:
                  return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
             
-            milestone.evidence = file
-            milestone.status = 'SUBMITTED' # Review Flow Step 1
-            # milestone.is_completed = True # REMOVED: Wait for review
-            milestone.completion_date = None # Not done yet
-            milestone.save()
+            submit_evidence(milestone, file)
             
             return Response({'status': 'success', 'message': 'Evidence uploaded. Submitted for AI review.'})
             
@@ -44,19 +89,35 @@ class MilestoneViewSet(viewsets.GenericViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def start_upload(self, request, pk=None):
+        """
+        Opens a resumable upload session for the evidence video; see EvidenceUploadViewSet.
+        Body: {"filename": ..., "size": <total bytes>, "content_type": ...}
+        """
+        milestone = self.get_object()
+        serializer = EvidenceUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(milestone=milestone)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'])
     def perform_ai_review(self, request, pk=None):
         """
-        Mock Endpoint: Simulates AI analysis passing.
+        Queues an AI review of the current evidence (uploading evidence already does) and returns at once.
+        `manage.py run_ai_review` workers write the AIReport and move the milestone to AI_REVIEWED.
         """
+        from media import ai_review
+
         try:
             milestone = ChildMilestone.objects.get(id=pk)
             if milestone.status != 'SUBMITTED':
                  return Response({'error': 'Milestone not in SUBMITTED state'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            milestone.status = 'AI_REVIEWED'
-            milestone.save()
-            return Response({'status': 'success', 'message': 'AI Review Passed'})
+            if milestone.evidence_asset_id is None:
+                return Response({'error': 'No evidence to review'}, status=status.HTTP_400_BAD_REQUEST)
+
+            job = ai_review.enqueue(milestone)
+            return Response({'status': 'queued', 'job': job.id}, status=status.HTTP_202_ACCEPTED)
         except ChildMilestone.DoesNotExist:
             return Response({'error': 'Milestone not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -74,7 +135,76 @@ class MilestoneViewSet(viewsets.GenericViewSet):
             milestone.status = 'COMPLETED'
             milestone.is_completed = True
             milestone.completion_date = datetime.date.today()
-            milestone.save()
+            with transaction.atomic():
+                milestone.save()
+                ChildStatusSummary.objects.refresh_for_child(milestone.child_id)
             return Response({'status': 'success', 'message': 'Milestone Approved and Completed'})
         except ChildMilestone.DoesNotExist:
             return Response({'error': 'Milestone not found'}, status=status.HTTP_404_NOT_FOUND)
+
+class EvidenceUploadViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable evidence upload sessions, opened with POST /milestones/<id>/uploads/.
+    GET     returns the session; `offset` (also the Upload-Offset header) is where to resume.
+    PUT     appends the raw request body at the offset given in the Upload-Offset header.
+    DELETE  abandons the upload.
+    POST    finalize/ attaches the assembled file to the milestone and submits it for review.
+    """
+    queryset = EvidenceUpload.objects.all()
+    serializer_class = EvidenceUploadSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def offset_response(self, upload, status_code=status.HTTP_200_OK):
+        response = Response(self.get_serializer(upload).data, status=status_code)
+        response['Upload-Offset'] = str(upload.received)
+        return response
+
+    def retrieve(self, request, pk=None):
+        return self.offset_response(self.get_object())
+
+    def update(self, request, pk=None):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset and Content-Length headers are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # No transaction or row lock while the body arrives: slow clients would hold them for minutes
+        upload = self.get_queryset().filter(pk=pk).first()
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        if offset + length > upload.size:
+            return Response({'error': 'Chunk runs past the declared size'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upload.received = uploads.append_chunk(upload, offset, request.stream, length)
+        except uploads.OffsetMismatch:
+            upload.refresh_from_db(fields=['received'])
+            return self.offset_response(upload, status.HTTP_409_CONFLICT)
+        return self.offset_response(upload)
+
+    def destroy(self, request, pk=None):
+        uploads.discard(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        upload = self.get_queryset().filter(pk=pk).first()
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not upload.is_complete:
+            return self.offset_response(upload, status.HTTP_409_CONFLICT)
+        # Hashed before the row lock: reading a large video under it would stall other requests
+        try:
+            sha256 = uploads.finished_digest(upload)
+        except FileNotFoundError:
+            # Finalized by a concurrent request
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            upload = self.get_queryset().select_for_update().select_related('milestone').filter(pk=pk).first()
+            if upload is None:
+                # Finalized by a concurrent request
+                return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+            with uploads.finished_file(upload, sha256) as file:
+                submit_evidence(upload.milestone, file)
+            uploads.discard(upload)
+        return Response({'status': 'success', 'message': 'Evidence uploaded. Submitted for AI review.'})
@@ -0,0 +1,20 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+from . import storage
+
+
+def release_deleted_files(sender, instance, **kwargs):
+    for model, field in storage.referencing_fields():
+        if isinstance(instance, model):
+            name = getattr(instance, field).name
+            if name:
+                # Other rows may still point at the blob; check once the delete is committed
+                transaction.on_commit(partial(storage.release, name))
+
+
+def connect():
+    for model in {model for model, _field in storage.referencing_fields()}:
+        post_delete.connect(release_deleted_files, sender=model, dispatch_uid=f'release_blobs_{model._meta.label}')
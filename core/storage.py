@@ -0,0 +1,92 @@
+"""
+Content-addressed storage for evidence files.
+
+Blobs are stored once per SHA-256 under a sharded layout
+(blobs/ab/cd/abcd....webm), so a clip re-uploaded after a perceived failure
+resolves to the existing blob without writing its bytes again. Several rows
+may then point at one blob; a blob is deleted only when no FileField using
+this storage references it anymore (see release()), together with any files
+derived from it.
+"""
+import glob
+import os
+import uuid
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import models
+
+from .uploadhandlers import file_digest
+
+BLOB_PREFIX = 'blobs'
+
+
+def get_evidence_storage():
+    return storages['evidence']
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def blob_name(self, digest, name):
+        ext = os.path.splitext(name)[1].lower()
+        return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def get_available_name(self, name, max_length=None):
+        # Names are chosen by content in _save(); identical content shares one name
+        return name
+
+    def _save(self, name, content):
+        digest, _size = file_digest(content)
+        name = self.blob_name(digest, name)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # The blob only appears under its final name once complete. If identical content
+        # from a concurrent request lands first, overwriting it is harmless.
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            partial_path = f'{full_path}.{uuid.uuid4().hex}.partial'
+            with open(partial_path, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            os.replace(partial_path, full_path)
+
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        # Files derived from a blob (e.g. video posters) live beside it as '<blob>.<suffix>'
+        for path in glob.glob(glob.escape(self.path(name)) + '.*'):
+            os.remove(path)
+
+
+def referencing_fields(storage=None):
+    """(model, field name) for every FileField stored in `storage` (default: evidence storage)."""
+    storage = storage or get_evidence_storage()
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField) and field.storage is storage
+    ]
+
+
+def reference_count(name, storage=None):
+    return sum(
+        model._default_manager.filter(**{field: name}).count()
+        for model, field in referencing_fields(storage)
+    )
+
+
+def release(name, storage=None):
+    """Deletes the blob `name` if nothing references it anymore. Returns True if deleted."""
+    storage = storage or get_evidence_storage()
+    if not name or not name.startswith(f'{BLOB_PREFIX}/') or reference_count(name, storage):
+        return False
+    storage.delete(name)
+    return True
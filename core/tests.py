@@ -1,3 +1,60 @@
-from django.test import TestCase
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from clinical.models import ChildMilestone, MilestoneTemplate
+from patients.models import Child
+from .storage import get_evidence_storage, reference_count, release
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp, EVIDENCE_UPLOAD_DIR=os.path.join(self.tmp, 'uploads'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        child = Child.objects.create(first_name='Zara', last_name='Test', sex='F',
+                                     date_of_birth=datetime.date.today() - datetime.timedelta(days=150))
+        self.milestones = [
+            ChildMilestone.objects.create(
+                child=child, template=MilestoneTemplate.objects.create(title=title, expected_age_months=4),
+            )
+            for title in ('Rollover', 'Babbling')
+        ]
+
+    def attach(self, milestone, content, filename='clip.webm'):
+        milestone.evidence.save(filename, ContentFile(content), save=True)
+        return milestone.evidence.name
+
+    def blob_files(self):
+        return [name for _, _, names in os.walk(os.path.join(self.tmp, 'blobs')) for name in names]
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.attach(self.milestones[0], b'same clip')
+        with mock.patch('core.storage.os.replace') as replace:
+            second = self.attach(self.milestones[1], b'same clip', filename='retry.webm')
+        replace.assert_not_called()  # nothing rewritten
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.webm$')
+        self.assertEqual(len(self.blob_files()), 1)
+        self.assertEqual(reference_count(first), 2)
+
+    def test_blob_deleted_with_last_reference(self):
+        name = self.attach(self.milestones[0], b'shared')
+        self.attach(self.milestones[1], b'shared')
+        self.assertFalse(release(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milestones[0].delete()
+        self.assertTrue(get_evidence_storage().exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milestones[1].delete()
+        self.assertFalse(get_evidence_storage().exists(name))
@@ -0,0 +1,87 @@
+"""
+Upload handling for evidence videos.
+
+Django's default handlers keep small uploads in memory and spool larger ones
+to FILE_UPLOAD_TEMP_DIR, from where storage copies them again when that is on
+another filesystem. ChecksumUploadHandler instead streams every file straight
+to a staging file next to MEDIA_ROOT (settings.EVIDENCE_UPLOAD_DIR), hashing
+and counting bytes as they arrive. FileSystemStorage then renames the staged
+file into place, so a clip is written once and never held in RAM.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class StagedUploadedFile(TemporaryUploadedFile):
+    """A TemporaryUploadedFile created in the staging directory, carrying its SHA-256."""
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        os.makedirs(settings.EVIDENCE_UPLOAD_DIR, exist_ok=True)
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(suffix='.upload' + ext, dir=settings.EVIDENCE_UPLOAD_DIR)
+        UploadedFile.__init__(self, file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = None
+
+
+class StagedFile(File):
+    """A finished file on local disk; storage backends that understand temporary files move it instead of copying."""
+
+    def __init__(self, path, name):
+        super().__init__(open(path, 'rb'), name=name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+class ChecksumUploadHandler(FileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.file = StagedUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hasher.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()  # removes the staged file
+
+
+class ChecksumUploadMixin:
+    """For DRF views: parse multipart uploads with ChecksumUploadHandler."""
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [ChecksumUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+def file_digest(file):
+    """
+    Returns (sha256 hex, size) for an uploaded file. Files that came through
+    ChecksumUploadHandler already carry both; anything else is read once.
+    """
+    if getattr(file, 'sha256', None):
+        return file.sha256, file.size
+    hasher = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks():
+        hasher.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    file.sha256 = hasher.hexdigest()  # so storage does not hash it a second time
+    return file.sha256, size
@@ -15,6 +15,8 @@ interface TimelineEvent {
     icon: string
     description: string
     evidence_url?: string
+    poster_url?: string | null
+    preview_url?: string | null
     status?: string
 }
 
@@ -261,11 +263,16 @@ export default function ChildTimeline({ params }: { params: Promise<{ id: string
                                         </p>
                                         <p className="text-sm text-gray-600">{event.description}</p>
 
+                                        {/* Lightweight preview until the full clip is opened */}
+                                        {expandedActivity !== idx && event.preview_url && (
+                                            <video src={event.preview_url} poster={event.poster_url ?? undefined} muted loop playsInline autoPlay preload="none" className="mt-3 rounded-lg w-32 h-20 object-cover bg-black" />
+                                        )}
+
                                         {/* Video Player */}
                                         {expandedActivity === idx && event.evidence_url && (
                                             <div className="mt-3" onClick={(e) => e.stopPropagation()}>
                                                 <div className="rounded-lg overflow-hidden bg-black shadow-md border border-gray-200 mb-4">
-                                                    <video src={event.evidence_url} controls className="w-full max-h-60" autoPlay />
+                                                    <video src={event.evidence_url} poster={event.poster_url ?? undefined} preload="metadata" controls className="w-full max-h-60" autoPlay />
                                                 </div>
 
                                                 {/* Force Completion Button */}
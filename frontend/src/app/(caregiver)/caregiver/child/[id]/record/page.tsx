@@ -3,6 +3,7 @@
 import { useState, useRef, useEffect, use } from "react"
 import { useRouter, useSearchParams } from "next/navigation"
 import api from "@/lib/api"
+import { uploadEvidence } from "@/lib/resumableUpload"
 import { Button } from "@/components/ui/button"
 import { Card } from "@/components/ui/card"
 
@@ -29,14 +30,9 @@ export default function RecordPage({ params }: { params: Promise<{ id: string }>
     useEffect(() => {
         const fetchMilestone = async () => {
             try {
-                // Determine which milestone we are verifying.
-                // We'll fetch the child data and find it in the list (simplest for now without new API)
-                const response = await api.get(`/caregiver/child/${id}/`)
-                const milestones = response.data.milestones || []
-                const found = milestones.find((m: any) => m.id.toString() === milestoneId)
-                if (found) {
-                    setMilestone(found)
-                }
+                // Lightweight detail read; avoids loading the whole child timeline
+                const response = await api.get(`/clinical/milestones/${milestoneId}/`, { params: { child: id } })
+                setMilestone(response.data)
             } catch (err) {
                 console.error("Error fetching milestone", err)
             } finally {
@@ -142,20 +138,15 @@ export default function RecordPage({ params }: { params: Promise<{ id: string }>
     const saveRecording = async () => {
         if (!videoBlob || !milestoneId) return
 
-        const formData = new FormData()
         // Create a file from blob. Use the blob's native type or default to mp4 for iOS compatibility.
         // Note: Backend must accept various video formats.
         const ext = videoBlob.type.includes('webm') ? 'webm' : 'mp4'
         const file = new File([videoBlob], `evidence_${milestoneId}_${Date.now()}.${ext}`, { type: videoBlob.type })
-        formData.append('file', file)
 
         setLoading(true) // Re-use loading state or add 'uploading'
         try {
-            await api.post(`/clinical/milestones/${milestoneId}/upload_evidence/`, formData, {
-                headers: {
-                    'Content-Type': 'multipart/form-data',
-                },
-            })
+            // Chunked and resumable, so a dropped connection does not restart the upload
+            await uploadEvidence(milestoneId, file)
             // Success
             router.push(`/caregiver/child/${id}`) // Go back to timeline
         } catch (err) {
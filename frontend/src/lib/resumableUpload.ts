@@ -0,0 +1,52 @@
+import api from '@/lib/api';
+
+// Small enough that a dropped connection on a rural network costs little to resend
+const CHUNK_SIZE = 512 * 1024;
+const MAX_RETRIES = 5;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Uploads evidence through the resumable protocol (clinical EvidenceUploadViewSet):
+ * open a session, PUT chunks at the server's offset, then finalize. After a failed
+ * chunk it asks the server for the current offset and resumes from there.
+ */
+export async function uploadEvidence(
+    milestoneId: string,
+    file: File,
+    onProgress?: (fraction: number) => void,
+) {
+    const session = await api.post(`/clinical/milestones/${milestoneId}/uploads/`, {
+        filename: file.name,
+        size: file.size,
+        content_type: file.type,
+    });
+    const url = `/clinical/evidence-uploads/${session.data.id}/`;
+
+    let offset: number = session.data.offset;
+    let retries = 0;
+    while (offset < file.size) {
+        try {
+            const response = await api.put(url, file.slice(offset, offset + CHUNK_SIZE), {
+                headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+            });
+            offset = response.data.offset;
+            retries = 0;
+            onProgress?.(offset / file.size);
+        } catch (err: any) {
+            if (err.response?.status === 409) {
+                offset = err.response.data.offset;
+                continue;
+            }
+            if (++retries > MAX_RETRIES) throw err;
+            await sleep(1000 * 2 ** retries);
+            try {
+                offset = (await api.get(url)).data.offset;
+            } catch {
+                // Still offline; retry the same offset after the next backoff
+            }
+        }
+    }
+
+    return api.post(`${url}finalize/`);
+}
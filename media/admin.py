@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MediaAsset, AIReport
+from .models import MediaAsset, AIReport, AIReviewJob
 
 class AIReportInline(admin.StackedInline):
     model = AIReport
@@ -9,3 +9,8 @@ class MediaAssetAdmin(admin.ModelAdmin):
     list_display = ('id', 'encounter', 'media_type', 'is_processed')
     list_filter = ('media_type', 'is_processed')
     inlines = [AIReportInline]
+
+@admin.register(AIReviewJob)
+class AIReviewJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'milestone', 'status', 'attempts', 'run_after', 'locked_by')
+    list_filter = ('status',)
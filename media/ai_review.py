@@ -0,0 +1,230 @@
+"""
+AI review of milestone evidence, queued in the database.
+
+Submitting evidence adds an AIReviewJob in the same transaction, so the HTTP
+request returns as soon as the upload is stored. `manage.py run_ai_review`
+starts worker processes that claim due jobs (row locks with SKIP LOCKED where
+the database has them, and a conditional UPDATE everywhere, so two workers
+never run the same job), run the analyzer (plus the audio stage for
+speech-domain templates, see audio.py, and the motion descriptor for
+gross-motor ones, see motion.py), write the AIReport and move the
+milestone to AI_REVIEWED. A failed attempt is retried with exponential
+backoff until AI_REVIEW_MAX_ATTEMPTS, whatever raised (the analyzer or the
+database); a job whose worker died is claimed again once its lease
+(AI_REVIEW_LEASE_SECONDS) has run out, or marked FAILED if that was its
+last attempt.
+
+No broker is involved: the jobs table is the queue.
+"""
+import datetime
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+def worker_name(index=0):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def enqueue(milestone):
+    """
+    Queues a review of the milestone's current evidence (call inside the submitting transaction).
+    A review already waiting for the same evidence is reused.
+    """
+    from .models import AIReviewJob
+
+    job = AIReviewJob.objects.filter(
+        milestone=milestone, media_asset_id=milestone.evidence_asset_id, status__in=['PENDING', 'RUNNING'],
+    ).first()
+    return job or AIReviewJob.objects.create(milestone=milestone, media_asset_id=milestone.evidence_asset_id)
+
+
+def retry_delay(attempts):
+    """Seconds before attempt `attempts + 1`: doubling from AI_REVIEW_RETRY_BASE_SECONDS, capped."""
+    return min(settings.AI_REVIEW_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), settings.AI_REVIEW_RETRY_MAX_SECONDS)
+
+
+def claim(worker, now=None, candidates=10):
+    """Marks the next due job RUNNING for `worker` and returns it, or None if there is none."""
+    from .models import AIReviewJob
+
+    now = now or timezone.now()
+    lease_expired = now - datetime.timedelta(seconds=settings.AI_REVIEW_LEASE_SECONDS)
+    # A job whose worker died on its last attempt is not run again; it may be what kills workers
+    AIReviewJob.objects.filter(
+        status='RUNNING', locked_at__lt=lease_expired, attempts__gte=settings.AI_REVIEW_MAX_ATTEMPTS,
+    ).update(status='FAILED', last_error='Worker stopped during the last attempt', updated_at=now)
+    due = AIReviewJob.objects.filter(
+        Q(status='PENDING', run_after__lte=now) | Q(status='RUNNING', locked_at__lt=lease_expired)
+    ).order_by('run_after', 'id')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        for job in due[:candidates]:
+            # Only one worker's UPDATE matches the state it read
+            claimed = AIReviewJob.objects.filter(pk=job.pk, status=job.status, locked_at=job.locked_at).update(
+                status='RUNNING', locked_by=worker, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+    return None
+
+
+def get_analyzer():
+    return import_string(settings.AI_REVIEW_ANALYZER)
+
+
+def basic_analysis(asset, template):
+    """
+    Stand-in analyzer until a model is deployed: works from the clip's keyframes
+    (never the full video) and reports what was sampled. Confidence is 0, so a
+    human still decides.
+    """
+    from .derivatives import load_keyframes
+
+    frames = load_keyframes(asset)
+    result = {
+        'analyzer': 'basic',
+        'template': template.title,
+        'keyframes': len(frames),
+        'keyframe_times': asset.keyframes['times'],
+    }
+    return result, 0.0
+
+
+def analyze_audio(asset, template):
+    """Audio features for templates in AI_AUDIO_DOMAINS; None for others, silent clips or if decoding fails."""
+    from . import audio
+
+    if template.domain not in settings.AI_AUDIO_DOMAINS:
+        return None
+    try:
+        return audio.extract(asset.file.path)
+    except (audio.AudioError, OSError):
+        # Like a missing poster: the review goes ahead on the picture alone
+        return None
+
+
+def analyze_motion(asset, template):
+    """
+    Makes sure assets for templates in AI_MOTION_DOMAINS carry their motion descriptor
+    (older assets predate it). Returns it, or None for other templates or undecodable clips.
+    """
+    from . import derivatives, transcode
+
+    if template.domain not in settings.AI_MOTION_DOMAINS:
+        return None
+    try:
+        return derivatives.load_motion(asset)
+    except (transcode.TranscodeError, OSError):
+        return None
+
+
+def complete(job, result, confidence, audio_features=None):
+    from clinical.models import ChildMilestone, ChildStatusSummary
+    from .models import AIReport
+
+    with transaction.atomic():
+        AIReport.objects.update_or_create(
+            media_asset_id=job.media_asset_id,
+            defaults={'result_json': result, 'confidence_score': confidence, 'audio_features': audio_features},
+        )
+        milestone = ChildMilestone.objects.select_for_update().get(pk=job.milestone_id)
+        # A newer upload or a reviewer may have moved the milestone on meanwhile
+        if milestone.status == 'SUBMITTED' and milestone.evidence_asset_id == job.media_asset_id:
+            milestone.status = 'AI_REVIEWED'
+            milestone.save()
+            ChildStatusSummary.objects.refresh_for_child(milestone.child_id)
+        job.status = 'DONE'
+        job.last_error = ''
+        job.save(update_fields=['status', 'last_error', 'updated_at'])
+
+
+def fail(job, error, now=None):
+    now = now or timezone.now()
+    job.last_error = str(error) or error.__class__.__name__
+    if job.attempts >= settings.AI_REVIEW_MAX_ATTEMPTS:
+        job.status = 'FAILED'
+    else:
+        job.status = 'PENDING'
+        job.run_after = now + datetime.timedelta(seconds=retry_delay(job.attempts))
+    job.save(update_fields=['status', 'last_error', 'run_after', 'updated_at'])
+
+
+def analyzer_name(analyze):
+    """Result cache key part for an analyzer: its dotted path and `version` attribute."""
+    return f"{settings.AI_REVIEW_ANALYZER}:{getattr(analyze, 'version', '1')}"
+
+
+def run(job):
+    """Runs a claimed job, reusing the result for identical earlier clips. Returns True if the review was recorded."""
+    from . import result_cache
+
+    try:
+        analyze = get_analyzer()
+        key = (job.media_asset.checksum, analyzer_name(analyze), job.milestone.template_id)
+        cached = result_cache.lookup(*key)
+        if cached is None:
+            result, confidence = analyze(job.media_asset, job.milestone.template)
+            audio_features = analyze_audio(job.media_asset, job.milestone.template)
+            analyze_motion(job.media_asset, job.milestone.template)
+            result_cache.store(*key, result, confidence, audio_features)
+            cached = (result, confidence, audio_features)
+        complete(job, *cached)
+    except Exception as e:
+        # Whatever the analyzer or the database raises, the job must go back to the queue
+        fail(job, e)
+        return False
+    return True
+
+
+def work(worker, once=False, poll_interval=None, should_stop=lambda: False):
+    """
+    Claims and runs jobs until should_stop() (or, with once=True, until none is due).
+    Returns (succeeded, failed).
+    """
+    poll_interval = settings.AI_REVIEW_POLL_SECONDS if poll_interval is None else poll_interval
+    succeeded = failed = 0
+    while not should_stop():
+        try:
+            job = claim(worker)
+        except DatabaseError:
+            # e.g. a locked database; try again at the next poll
+            time.sleep(poll_interval)
+            continue
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        try:
+            ok = run(job)
+        except DatabaseError:
+            # Not even the failure could be recorded; the job is claimed again once its lease runs out
+            ok = False
+        if ok:
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+
+def worker_process(index, once, poll_interval, batch=False):
+    """Entry point of a spawned worker process; with `batch`, clips are scored by inference.work()."""
+    import django
+
+    django.setup()
+    from . import inference
+
+    try:
+        (inference.work if batch else work)(worker_name(index), once=once, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,146 @@
+"""
+Audio features for speech-domain milestones (vocalizing, babbling, first words).
+
+Like transcode.py this module imports nothing from Django. ffmpeg, found the
+way pydub finds it, decodes the audio track to 16 kHz mono PCM on a pipe, and
+the pipe is read in fixed windows of WINDOW_SECONDS, so memory does not grow
+with the length of the clip. Each window is cut into frames of FRAME_SAMPLES
+and analysed with NumPy as one (frames, samples) array:
+
+- energy: RMS level of each frame in dBFS
+- voicing: frames above SILENCE_DBFS whose normalized autocorrelation peaks
+  at a lag in PITCH_RANGE_HZ, i.e. periodic sound such as a voice
+- syllable-rate proxy: onsets of voiced runs per second
+
+Only running totals are carried from one window to the next. ffmpeg's error
+output goes to a temporary file, so a clip that makes it print an error per
+packet cannot fill a pipe and stall the decode; a decode still running after
+DECODE_TIMEOUT_SECONDS is killed.
+"""
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.utils import mediainfo_json
+
+SAMPLE_RATE = 16000
+# 32 ms frames, 32 frames per window
+FRAME_SAMPLES = 512
+WINDOW_SECONDS = 1.024
+SILENCE_DBFS = -45.0
+PITCH_RANGE_HZ = (75, 700)
+VOICING_THRESHOLD = 0.4
+DECODE_TIMEOUT_SECONDS = 300
+
+
+class AudioError(Exception):
+    pass
+
+
+def has_audio(src_path):
+    return any(stream.get('codec_type') == 'audio' for stream in mediainfo_json(src_path).get('streams', []))
+
+
+def frame_features(frames):
+    """Energy (dBFS) and voicing (bool) of each row of `frames`, float samples in [-1, 1]."""
+    rms = np.sqrt((frames ** 2).mean(axis=1))
+    energy = 20 * np.log10(np.maximum(rms, 1e-5))
+
+    # Autocorrelation of every frame at once through the FFT (zero-padded, so it is not circular)
+    centred = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(centred, n=2 * FRAME_SAMPLES, axis=1)
+    autocorrelation = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :FRAME_SAMPLES]
+    lags = np.arange(SAMPLE_RATE // PITCH_RANGE_HZ[1], SAMPLE_RATE // PITCH_RANGE_HZ[0] + 1)
+    # Longer lags overlap fewer samples; rescale so they are not penalized
+    periodicity = (autocorrelation[:, lags] * (FRAME_SAMPLES / (FRAME_SAMPLES - lags))).max(axis=1)
+    periodicity /= np.maximum(autocorrelation[:, 0], 1e-12)
+
+    voiced = (energy > SILENCE_DBFS) & (periodicity > VOICING_THRESHOLD)
+    return energy, voiced
+
+
+class FeatureAccumulator:
+    def __init__(self):
+        self.frames = 0
+        self.voiced = 0
+        self.power = 0.0
+        self.peak = -np.inf
+        self.onsets = 0
+        self.last_voiced = False
+
+    def add(self, samples):
+        """Adds a window of float samples; a trailing partial frame is ignored."""
+        count = len(samples) // FRAME_SAMPLES
+        if not count:
+            return
+        frames = samples[:count * FRAME_SAMPLES].reshape(count, FRAME_SAMPLES)
+        energy, voiced = frame_features(frames)
+        self.frames += count
+        self.voiced += int(voiced.sum())
+        self.power += float((10 ** (energy / 10)).sum())
+        self.peak = max(self.peak, float(energy.max()))
+        runs = np.concatenate([[self.last_voiced], voiced])
+        self.onsets += int(np.count_nonzero(runs[1:] & ~runs[:-1]))
+        self.last_voiced = bool(voiced[-1])
+
+    def result(self):
+        if not self.frames:
+            return None
+        duration = self.frames * FRAME_SAMPLES / SAMPLE_RATE
+        return {
+            'duration': round(duration, 2),
+            'mean_energy_dbfs': round(float(10 * np.log10(self.power / self.frames)), 1),
+            'peak_energy_dbfs': round(self.peak, 1),
+            'voiced_ratio': round(self.voiced / self.frames, 3),
+            'voiced_seconds': round(self.voiced * FRAME_SAMPLES / SAMPLE_RATE, 2),
+            'syllable_rate': round(self.onsets / duration, 2),
+        }
+
+
+def features_from_pcm(stream, window_seconds=WINDOW_SECONDS):
+    """Features of 16-bit mono PCM at SAMPLE_RATE read from `stream` one window at a time."""
+    window_bytes = int(window_seconds * SAMPLE_RATE) * 2
+    accumulator = FeatureAccumulator()
+    while True:
+        data = stream.read(window_bytes)
+        if not data:
+            break
+        samples = np.frombuffer(data[:len(data) // 2 * 2], '<i2').astype(np.float32) / 32768
+        accumulator.add(samples)
+    return accumulator.result()
+
+
+def extract(src_path, window_seconds=WINDOW_SECONDS, timeout=DECODE_TIMEOUT_SECONDS):
+    """Audio features of `src_path`, or None if it has no audio track."""
+    if not has_audio(src_path):
+        return None
+    command = [
+        AudioSegment.converter, '-nostdin', '-v', 'error', '-i', src_path,
+        '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-',
+    ]
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        # Reads from the pipe block, so the time limit is enforced by killing ffmpeg
+        watchdog = threading.Timer(timeout, kill)
+        watchdog.start()
+        try:
+            features = features_from_pcm(process.stdout, window_seconds)
+        finally:
+            watchdog.cancel()
+            process.stdout.close()
+            process.wait()
+        if timed_out.is_set():
+            raise AudioError(f"ffmpeg did not finish within {timeout} seconds")
+        if process.returncode:
+            stderr.seek(0)
+            message = stderr.read()[-2000:].decode(errors='replace').strip()
+            raise AudioError(message or f"ffmpeg exited with {process.returncode}")
+    return features
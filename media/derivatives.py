@@ -0,0 +1,80 @@
+"""
+Derivatives of evidence videos: a poster JPEG and a short, low-resolution
+preview clip for the timeline, and the keyframe contact sheet (keyframes.py)
+that analysers and reviewers work from instead of the video.
+
+They are stored beside the original as '<original>.poster.jpg',
+'<original>.preview.webm' and '<original>.keyframes.jpg', so their names follow from the evidence name and
+need no database rows; the content-addressed storage deletes them with their
+blob. They are rendered eagerly by the background job after upload
+(processing.py) and lazily by the media file view on first request for older
+evidence.
+"""
+import os
+
+from core.storage import get_evidence_storage
+
+from . import keyframes, motion, transcode
+
+SUFFIXES = {
+    'poster': '.poster.jpg',
+    'preview': '.preview' + transcode.RENDITION_EXTENSION,
+    'keyframes': '.keyframes.jpg',
+}
+RENDERERS = {
+    'poster': transcode.extract_poster,
+    'preview': transcode.make_preview,
+    'keyframes': keyframes.extract,
+}
+
+
+def derivative_name(source_name, kind):
+    return source_name + SUFFIXES[kind]
+
+
+def parse(name):
+    """(source name, kind) if `name` is a derivative, else None."""
+    for kind, suffix in SUFFIXES.items():
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)], kind
+    return None
+
+
+def derivative_paths(source_name):
+    storage = get_evidence_storage()
+    return {kind: storage.path(derivative_name(source_name, kind)) for kind in SUFFIXES}
+
+
+def ensure(source_name, kind):
+    """Renders the derivative if it does not exist yet. Returns its name."""
+    storage = get_evidence_storage()
+    name = derivative_name(source_name, kind)
+    if not storage.exists(name):
+        RENDERERS[kind](storage.path(source_name), storage.path(name))
+    return name
+
+
+def is_video(name):
+    return os.path.splitext(name)[1].lower() in ('.webm', '.mp4', '.mov', '.3gp', '.mkv')
+
+
+def load_keyframes(asset):
+    """
+    The asset's keyframes as an array, sampling them (and the motion descriptor,
+    in the same pass) now if the background job has not.
+    """
+    path = get_evidence_storage().path(derivative_name(asset.file.name, 'keyframes'))
+    if not asset.keyframes or not os.path.exists(path):
+        accumulator = motion.MotionAccumulator()
+        asset.keyframes = keyframes.extract(asset.file.path, path, motion=accumulator)
+        asset.motion_descriptor = accumulator.descriptor()
+        asset.save(update_fields=['keyframes', 'motion_descriptor'])
+    return keyframes.read_sheet(path, asset.keyframes)
+
+
+def load_motion(asset):
+    """The asset's motion descriptor, computed now if the background job has not."""
+    if asset.motion_descriptor is None:
+        asset.motion_descriptor = motion.describe(asset.file.path)
+        asset.save(update_fields=['motion_descriptor'])
+    return asset.motion_descriptor
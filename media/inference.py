@@ -0,0 +1,287 @@
+"""
+Batched model inference for AI review.
+
+Rather than one model call per clip, `run_ai_review --batch` workers claim
+every due review job, load each clip's keyframes (keyframes.py) and hand them
+to a BatchScheduler. The scheduler packs frames from many clips into batches
+of up to AI_INFERENCE_BATCH_FRAMES and dispatches a batch once it is full or
+once its oldest clip has waited AI_INFERENCE_MAX_WAIT_SECONDS, so a quiet
+queue still gets prompt answers. Batches go to the backend named by
+AI_INFERENCE_BACKEND; the scores are split back per clip and written to each
+clip's AIReport through ai_review.complete().
+
+A backend is any class with `name`, `version`, `input_size` (width, height)
+and predict(frames, template_ids) -> one score in [0, 1] per frame. LocalModel
+stands in for the model server in development and tests.
+
+Clips analysed before by the same model (result_cache.py) are not scored
+again. Throughput and waiting times are counted in the database
+(AIReviewCounter), so every worker process reports into get_stats() and the
+web process can read it whatever cache backend is configured.
+"""
+import collections
+import time
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import ai_review, result_cache
+
+KEY_PREFIX = 'media:inference'
+STATS_KEYS = {
+    'clips': f'{KEY_PREFIX}:stats:clips',
+    'frames': f'{KEY_PREFIX}:stats:frames',
+    'batches': f'{KEY_PREFIX}:stats:batches',
+    'failed_batches': f'{KEY_PREFIX}:stats:failed_batches',
+    'backend_ms': f'{KEY_PREFIX}:stats:backend_ms',
+    'batch_wait_ms': f'{KEY_PREFIX}:stats:batch_wait_ms',
+    'queue_wait_ms': f'{KEY_PREFIX}:stats:queue_wait_ms',
+}
+
+
+def _incr(key, delta=1):
+    from .models import AIReviewCounter
+
+    AIReviewCounter.objects.incr(key, delta)
+
+
+class LocalModel:
+    """
+    CPU stand-in for the model server: a fixed random projection of downscaled
+    frames, one output per template. Deterministic, and its scores carry no
+    clinical meaning.
+    """
+    name = 'local-stand-in'
+    version = '1'
+    input_size = (64, 64)
+    outputs = 32
+
+    def __init__(self):
+        features = self.input_size[0] * self.input_size[1] * 3
+        self.weights = np.random.default_rng(0).standard_normal((features, self.outputs), np.float32) / features ** 0.5
+
+    def predict(self, frames, template_ids):
+        x = frames.reshape(len(frames), -1).astype(np.float32) / 255
+        x -= x.mean(axis=1, keepdims=True)
+        logits = (x @ self.weights)[np.arange(len(frames)), np.asarray(template_ids) % self.outputs]
+        return 1 / (1 + np.exp(-4 * logits))
+
+
+def get_backend():
+    return import_string(settings.AI_INFERENCE_BACKEND)()
+
+
+def prepare(frames, size):
+    """Keyframes resized to the backend's input size, as one (N, height, width, 3) array."""
+    return np.stack([cv2.resize(frame, size, interpolation=cv2.INTER_AREA) for frame in frames])
+
+
+class ClipRequest:
+    def __init__(self, job, frames, template_id, submitted_at):
+        self.job = job
+        self.frames = frames
+        self.template_id = template_id
+        self.submitted_at = submitted_at
+        self.scores = np.zeros(len(frames), np.float32)
+        # Frames before this index have been dispatched
+        self.next_frame = 0
+
+
+class BatchScheduler:
+    """
+    Packs the frames of submitted clips into batches by size and deadline.
+    on_result(request) is called once all of a clip's frames are scored,
+    on_error(request, error) if a batch holding any of them fails.
+    """
+
+    def __init__(self, backend, on_result, on_error, max_batch_frames=None, max_wait=None, clock=time.monotonic):
+        self.backend = backend
+        self.on_result = on_result
+        self.on_error = on_error
+        self.max_batch_frames = max_batch_frames or settings.AI_INFERENCE_BATCH_FRAMES
+        self.max_wait = settings.AI_INFERENCE_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        self.clock = clock
+        self.pending = collections.deque()
+        self.pending_frames = 0
+
+    def submit(self, job, frames, template_id):
+        self.pending.append(ClipRequest(job, frames, template_id, self.clock()))
+        self.pending_frames += len(frames)
+        while self.pending_frames >= self.max_batch_frames:
+            self.dispatch()
+
+    def seconds_to_deadline(self):
+        """Seconds until the oldest pending clip must be dispatched, or None when nothing is pending."""
+        if not self.pending:
+            return None
+        return max(0.0, self.pending[0].submitted_at + self.max_wait - self.clock())
+
+    def poll(self):
+        """Dispatches every batch whose deadline has passed."""
+        while self.pending and self.seconds_to_deadline() == 0:
+            self.dispatch()
+
+    def flush(self):
+        while self.pending:
+            self.dispatch()
+
+    def dispatch(self):
+        """Sends up to max_batch_frames of the oldest pending frames to the backend as one batch."""
+        parts = []
+        taken = 0
+        while self.pending and taken < self.max_batch_frames:
+            request = self.pending[0]
+            start = request.next_frame
+            end = min(len(request.frames), start + self.max_batch_frames - taken)
+            parts.append((request, start, end))
+            taken += end - start
+            request.next_frame = end
+            if end == len(request.frames):
+                self.pending.popleft()
+        self.pending_frames -= taken
+        if not parts:
+            return
+
+        frames = np.concatenate([request.frames[start:end] for request, start, end in parts])
+        template_ids = np.concatenate([np.full(end - start, request.template_id) for request, start, end in parts])
+        dispatched_at = self.clock()
+        try:
+            scores = self.backend.predict(frames, template_ids)
+        except Exception as e:
+            # Model servers fail in many ways; the clips go back to the job queue for a retry
+            _incr(STATS_KEYS['failed_batches'])
+            for request, _start, _end in parts:
+                if request in self.pending:
+                    self.pending.remove(request)
+                    self.pending_frames -= len(request.frames) - request.next_frame
+                self.on_error(request, e)
+            return
+        backend_ms = (self.clock() - dispatched_at) * 1000
+
+        finished = []
+        offset = 0
+        for request, start, end in parts:
+            request.scores[start:end] = scores[offset:offset + end - start]
+            offset += end - start
+            if end == len(request.frames):
+                finished.append(request)
+
+        now = timezone.now()
+        _incr(STATS_KEYS['batches'])
+        _incr(STATS_KEYS['frames'], len(frames))
+        _incr(STATS_KEYS['backend_ms'], round(backend_ms))
+        _incr(STATS_KEYS['batch_wait_ms'], round(sum(dispatched_at - r.submitted_at for r in finished) * 1000))
+        _incr(STATS_KEYS['queue_wait_ms'], round(sum((now - r.job.created_at).total_seconds() for r in finished) * 1000))
+        _incr(STATS_KEYS['clips'], len(finished))
+        for request in finished:
+            try:
+                self.on_result(request)
+            except Exception as e:
+                # The other clips scored in this batch are still recorded
+                self.on_error(request, e)
+
+
+def model_name(backend):
+    return f'{backend.name}:{backend.version}'
+
+
+def record_result(backend, request):
+    job = request.job
+    result = {
+        'model': model_name(backend),
+        'template': job.milestone.template.title,
+        'frame_scores': [round(float(score), 3) for score in request.scores],
+        'keyframe_times': job.media_asset.keyframes['times'],
+    }
+    confidence = float(request.scores.mean())
+    audio_features = ai_review.analyze_audio(job.media_asset, job.milestone.template)
+    ai_review.analyze_motion(job.media_asset, job.milestone.template)
+    result_cache.store(
+        job.media_asset.checksum, model_name(backend), job.milestone.template_id, result, confidence, audio_features,
+    )
+    ai_review.complete(job, result, confidence, audio_features)
+
+
+def work(worker, once=False, poll_interval=None, should_stop=lambda: False, scheduler=None):
+    """
+    Claims due review jobs and runs them through a BatchScheduler until
+    should_stop() (or, with once=True, until none is due). Returns (succeeded, failed).
+    """
+    from .derivatives import load_keyframes
+
+    poll_interval = settings.AI_REVIEW_POLL_SECONDS if poll_interval is None else poll_interval
+    counts = {'succeeded': 0, 'failed': 0}
+
+    def fail(job, error):
+        counts['failed'] += 1
+        try:
+            ai_review.fail(job, error)
+        except DatabaseError:
+            # The job stays RUNNING and is claimed again once its lease runs out
+            pass
+
+    def on_result(request):
+        record_result(scheduler.backend, request)
+        counts['succeeded'] += 1
+
+    def on_error(request, error):
+        fail(request.job, error)
+
+    scheduler = scheduler or BatchScheduler(get_backend(), on_result, on_error)
+    while not should_stop():
+        try:
+            job = ai_review.claim(worker)
+        except DatabaseError:
+            # e.g. a locked database; try again at the next poll
+            scheduler.poll()
+            time.sleep(poll_interval)
+            continue
+        if job is not None:
+            try:
+                cached = result_cache.lookup(
+                    job.media_asset.checksum, model_name(scheduler.backend), job.milestone.template_id,
+                )
+                if cached is not None:
+                    ai_review.complete(job, *cached)
+                    counts['succeeded'] += 1
+                    continue
+                frames = prepare(load_keyframes(job.media_asset), scheduler.backend.input_size)
+            except Exception as e:
+                fail(job, e)
+                continue
+            scheduler.submit(job, frames, job.milestone.template_id)
+            scheduler.poll()
+            continue
+        if once:
+            scheduler.flush()
+            break
+        scheduler.poll()
+        deadline = scheduler.seconds_to_deadline()
+        time.sleep(poll_interval if deadline is None else min(poll_interval, deadline))
+    return counts['succeeded'], counts['failed']
+
+
+def get_stats():
+    from .models import AIReviewCounter, AIReviewJob
+
+    values = AIReviewCounter.objects.values_for(STATS_KEYS.values())
+    stats = {name: values[key] for name, key in STATS_KEYS.items()}
+    stats['frames_per_second'] = round(stats['frames'] / (stats['backend_ms'] / 1000), 1) if stats['backend_ms'] else None
+    stats['mean_batch_frames'] = round(stats['frames'] / stats['batches'], 1) if stats['batches'] else None
+    for wait in ('batch_wait', 'queue_wait'):
+        total = stats[f'{wait}_ms']
+        stats[f'mean_{wait}_seconds'] = round(total / 1000 / stats['clips'], 3) if stats['clips'] else None
+
+    stats['result_cache'] = result_cache.get_stats()
+
+    backlog = AIReviewJob.objects.filter(status='PENDING').aggregate(count=Count('id'), oldest=Min('created_at'))
+    stats['pending_jobs'] = backlog['count']
+    stats['oldest_pending_seconds'] = (
+        round((timezone.now() - backlog['oldest']).total_seconds()) if backlog['oldest'] else None
+    )
+    return stats
@@ -0,0 +1,165 @@
+"""
+Keyframe sampling: a small, bounded set of representative frames per clip.
+
+Runs in worker processes (see processing.py), so like transcode.py this
+module imports nothing from Django. The clip is decoded once, at up to
+SAMPLE_FPS; every sampled frame gets a scene-change score against the one
+before it (mean absolute difference of small grayscale thumbnails plus the
+distance between their intensity histograms), computed for blocks of frames
+at a time with NumPy. The first frame and the highest-scoring frames at least
+MIN_GAP_SECONDS apart are kept, never more than MAX_KEYFRAMES, so memory stays
+bounded however long the clip is.
+
+The keyframes are written as one JPEG contact sheet of equal tiles, which
+reviewers can open directly; analysers get the frames back as an array with
+read_sheet() and never decode the video.
+"""
+import math
+import os
+
+import cv2
+import numpy as np
+
+from .transcode import TranscodeError, staging_path
+
+MAX_KEYFRAMES = 12
+SAMPLE_FPS = 4
+MIN_GAP_SECONDS = 1.0
+TILE_WIDTH = 320
+SHEET_COLUMNS = 4
+THUMB_SIZE = (32, 32)
+HIST_BINS = 16
+# Sampled frames scored per NumPy call
+BLOCK_SIZE = 32
+
+
+def change_scores(thumbs, previous=None):
+    """
+    Scene-change score in [0, 1] of each grayscale thumbnail in `thumbs` (N, h, w)
+    against the one before it; the first scores 1 when there is no `previous`.
+    """
+    stack = thumbs if previous is None else np.concatenate([previous[None], thumbs])
+    n, pixels = len(stack), stack[0].size
+    pixel_change = np.abs(np.diff(stack.astype(np.int16), axis=0)).mean(axis=(1, 2)) / 255
+
+    # One bincount for all histograms: frame i's bins are offset by i * HIST_BINS
+    bins = (stack.reshape(n, -1) // (256 // HIST_BINS)).astype(np.intp) + np.arange(n)[:, None] * HIST_BINS
+    histograms = np.bincount(bins.ravel(), minlength=n * HIST_BINS).reshape(n, HIST_BINS) / pixels
+    histogram_change = np.abs(np.diff(histograms, axis=0)).sum(axis=1) / 2
+
+    scores = (pixel_change + histogram_change) / 2
+    return scores if previous is not None else np.concatenate([[1.0], scores])
+
+
+def tile_size(frame, tile_width=TILE_WIDTH):
+    height, width = frame.shape[:2]
+    return tile_width, int(height * tile_width / width) // 2 * 2
+
+
+def _offer(kept, time, score, frame, max_keyframes, min_gap):
+    """Adds (time, score, frame) to `kept` if it beats the keyframes it would crowd out."""
+    near = [k for k in kept if abs(k[0] - time) < min_gap]
+    if near:
+        if score <= max(k[1] for k in near):
+            return
+        for k in near:
+            kept.remove(k)
+    elif len(kept) >= max_keyframes:
+        weakest = min(kept, key=lambda k: k[1])
+        if score <= weakest[1]:
+            return
+        kept.remove(weakest)
+    kept.append((time, score, frame))
+
+
+def sample_keyframes(src_path, max_keyframes=MAX_KEYFRAMES, sample_fps=SAMPLE_FPS, min_gap=MIN_GAP_SECONDS,
+                     motion=None):
+    """
+    Decodes `src_path` once and returns its keyframes as [(seconds, score, BGR frame)] in time order.
+    The sampled thumbnails are also fed to `motion` (a motion.MotionAccumulator), if given.
+    """
+    capture = cv2.VideoCapture(src_path)
+    if not capture.isOpened():
+        raise TranscodeError(f"Cannot open {src_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or sample_fps
+    step = max(1, round(fps / sample_fps))
+
+    kept = []
+    previous = None
+    block = []
+
+    def score_block():
+        nonlocal previous
+        thumbs = np.stack([thumb for _time, thumb, _frame in block])
+        if motion is not None:
+            motion.add(thumbs, previous)
+        for (time, _thumb, frame), score in zip(block, change_scores(thumbs, previous)):
+            _offer(kept, time, float(score), frame, max_keyframes, min_gap)
+        previous = thumbs[-1]
+        block.clear()
+
+    try:
+        index = 0
+        # grab() without retrieve() skips the colour conversion of frames that are not sampled
+        while capture.grab():
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                thumb = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), THUMB_SIZE, interpolation=cv2.INTER_AREA)
+                # Candidates are held at tile size, not decoded size
+                block.append((index / fps, thumb, cv2.resize(frame, tile_size(frame), interpolation=cv2.INTER_AREA)))
+                if len(block) == BLOCK_SIZE:
+                    score_block()
+            index += 1
+        if block:
+            score_block()
+    finally:
+        capture.release()
+
+    if not kept:
+        raise TranscodeError(f"No frames decoded from {src_path}")
+    return sorted(kept, key=lambda k: k[0])
+
+
+def write_sheet(frames, dst_path, columns=SHEET_COLUMNS, quality=85):
+    """Writes equal tiles of `frames` row by row into one JPEG. Returns the tile size and column count."""
+    tile = tile_size(frames[0])
+    columns = min(columns, len(frames))
+    rows = math.ceil(len(frames) / columns)
+    sheet = np.zeros((rows * tile[1], columns * tile[0], 3), np.uint8)
+    for i, frame in enumerate(frames):
+        row, column = divmod(i, columns)
+        if frame.shape[:2] != (tile[1], tile[0]):
+            frame = cv2.resize(frame, tile, interpolation=cv2.INTER_AREA)
+        sheet[row * tile[1]:(row + 1) * tile[1], column * tile[0]:(column + 1) * tile[0]] = frame
+    tmp_path = staging_path(dst_path)
+    if not cv2.imwrite(tmp_path, sheet, [cv2.IMWRITE_JPEG_QUALITY, quality]):
+        raise TranscodeError(f"Cannot write {dst_path}")
+    os.replace(tmp_path, dst_path)
+    return tile, columns
+
+
+def extract(src_path, dst_path, max_keyframes=MAX_KEYFRAMES, sample_fps=SAMPLE_FPS, motion=None):
+    """Samples the keyframes of `src_path` into a contact sheet at `dst_path` and returns its layout."""
+    keyframes = sample_keyframes(src_path, max_keyframes, sample_fps, motion=motion)
+    tile, columns = write_sheet([frame for _time, _score, frame in keyframes], dst_path)
+    return {
+        'count': len(keyframes),
+        'columns': columns,
+        'tile': list(tile),
+        'times': [round(time, 2) for time, _score, _frame in keyframes],
+        'scores': [round(score, 3) for _time, score, _frame in keyframes],
+    }
+
+
+def read_sheet(path, layout):
+    """The keyframes of a contact sheet as one (count, tile height, tile width, 3) BGR array."""
+    sheet = cv2.imread(path)
+    if sheet is None:
+        raise TranscodeError(f"Cannot read {path}")
+    width, height = layout['tile']
+    columns = layout['columns']
+    rows = math.ceil(layout['count'] / columns)
+    tiles = sheet[:rows * height, :columns * width].reshape(rows, height, columns, width, 3).swapaxes(1, 2)
+    return tiles.reshape(-1, height, width, 3)[:layout['count']]
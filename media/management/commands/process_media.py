@@ -0,0 +1,43 @@
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from media import processing, transcode
+from media.models import MediaAsset
+
+
+class Command(BaseCommand):
+    help = (
+        "Normalizes uploaded videos the web processes did not get to (pool saturated, restart). "
+        "Transcodes run in a bounded process pool; results are recorded as they finish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.MEDIA_PROCESSING_WORKERS)
+        parser.add_argument('--limit', type=int, help="Process at most this many assets.")
+        parser.add_argument('--retry-failed', action='store_true', help="Also retry assets whose last attempt failed.")
+
+    def handle(self, *args, **options):
+        assets = MediaAsset.objects.filter(media_type='VIDEO', is_processed=False).order_by('created_at')
+        if not options['retry_failed']:
+            assets = assets.filter(processing_error='')
+        if options['limit']:
+            assets = assets[:options['limit']]
+
+        done = failed = 0
+        with processing.pool_executor(options['workers']) as executor:
+            futures = {}
+            for asset in assets.iterator():
+                args = processing.transcode_args(asset)
+                futures[executor.submit(transcode.process_video, *args)] = (asset, asset.file.name, args[1])
+            for future in as_completed(futures):
+                asset, source, staged_path = futures.pop(future)
+                error = future.exception()
+                processing.record_result(asset, source, staged_path, None if error else future.result(), error)
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{asset.id}: {error}")
+                else:
+                    done += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} videos, {failed} failed"))
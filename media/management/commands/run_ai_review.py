@@ -0,0 +1,49 @@
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from media import ai_review, inference
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs AI review workers that claim queued jobs from the database. "
+        "Each worker is a separate process; stop with Ctrl-C or SIGTERM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.AI_REVIEW_WORKERS)
+        parser.add_argument('--once', action='store_true', help="Exit when no job is due instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=settings.AI_REVIEW_POLL_SECONDS)
+        parser.add_argument('--batch', action='store_true',
+                            help="Score clips with the AI_INFERENCE_BACKEND model in batches instead of AI_REVIEW_ANALYZER.")
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 1:
+            work = inference.work if options['batch'] else ai_review.work
+            succeeded, failed = work(ai_review.worker_name(), once=options['once'], poll_interval=options['poll_interval'])
+            self.stdout.write(self.style.SUCCESS(f"Reviewed {succeeded} clips, {failed} attempts failed"))
+            if options['batch']:
+                self.stdout.write(str(inference.get_stats()))
+            return
+
+        # spawn: workers must not inherit the parent's DB connections
+        context = multiprocessing.get_context('spawn')
+        workers = [
+            context.Process(
+                target=ai_review.worker_process,
+                args=(i, options['once'], options['poll_interval'], options['batch']),
+            )
+            for i in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
+        self.stdout.write(self.style.SUCCESS(f"{len(workers)} workers stopped"))
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 19:47
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_mediaasset_checksum_mediaasset_file_size'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediaasset',
+            name='file',
+            field=models.FileField(storage=core.storage.get_evidence_storage, upload_to='developmental_videos/%Y/%m/%d/'),
+        ),
+    ]
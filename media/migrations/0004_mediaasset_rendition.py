@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 19:49
+
+import core.storage
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0016_childmilestone_evidence_asset'),
+        ('media', '0003_evidence_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaasset',
+            name='duration_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediaasset',
+            name='height',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediaasset',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='mediaasset',
+            name='rendition',
+            field=models.FileField(blank=True, help_text='Compact, browser-playable copy served to reviewers', null=True, storage=core.storage.get_evidence_storage, upload_to='renditions/'),
+        ),
+        migrations.AddField(
+            model_name='mediaasset',
+            name='width',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='mediaasset',
+            name='encounter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='media_assets', to='clinical.encounter'),
+        ),
+    ]
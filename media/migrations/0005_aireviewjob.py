@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 19:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0016_childmilestone_evidence_asset'),
+        ('media', '0004_mediaasset_rendition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIReviewJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('media_asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_review_jobs', to='media.mediaasset')),
+                ('milestone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_review_jobs', to='clinical.childmilestone')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='ai_review_job_queue_idx')],
+            },
+        ),
+    ]
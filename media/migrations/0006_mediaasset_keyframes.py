@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0005_aireviewjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaasset',
+            name='keyframes',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
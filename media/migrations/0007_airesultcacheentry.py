@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 20:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0016_childmilestone_evidence_asset'),
+        ('media', '0006_mediaasset_keyframes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIResultCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(help_text='SHA-256 of the analysed file', max_length=64)),
+                ('model', models.CharField(help_text='Analyzer or model backend, with its version', max_length=200)),
+                ('result_json', models.JSONField(default=dict)),
+                ('confidence_score', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clinical.milestonetemplate')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='ai_result_cache_lru_idx')],
+                'unique_together': {('checksum', 'model', 'template')},
+            },
+        ),
+    ]
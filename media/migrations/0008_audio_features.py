@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0007_airesultcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aireport',
+            name='audio_features',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airesultcacheentry',
+            name='audio_features',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0008_audio_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaasset',
+            name='motion_descriptor',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0009_mediaasset_motion_descriptor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIReviewCounter',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
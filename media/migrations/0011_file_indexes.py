@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 21:30
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0010_aireviewcounter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediaasset',
+            name='file',
+            field=models.FileField(db_index=True, storage=core.storage.get_evidence_storage, upload_to='developmental_videos/%Y/%m/%d/'),
+        ),
+        migrations.AlterField(
+            model_name='mediaasset',
+            name='rendition',
+            field=models.FileField(blank=True, db_index=True, help_text='Compact, browser-playable copy served to reviewers', null=True, storage=core.storage.get_evidence_storage, upload_to='renditions/'),
+        ),
+    ]
@@ -1,25 +1,122 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
 from clinical.models import Encounter
+from core.storage import get_evidence_storage
 import uuid
 
 class MediaAsset(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    encounter = models.ForeignKey(Encounter, on_delete=models.CASCADE, related_name='media_assets')
-    file = models.FileField(upload_to='developmental_videos/%Y/%m/%d/')
+    # Empty for milestone evidence, which is linked from ChildMilestone.evidence_asset
+    encounter = models.ForeignKey(Encounter, on_delete=models.CASCADE, related_name='media_assets', null=True, blank=True)
+    # Indexed: blob reference counts and media access checks look assets up by file name
+    file = models.FileField(upload_to='developmental_videos/%Y/%m/%d/', storage=get_evidence_storage, db_index=True)
     media_type = models.CharField(max_length=10, choices=[('VIDEO', 'Video'), ('IMAGE', 'Image')])
     file_size = models.BigIntegerField(null=True, blank=True)
     checksum = models.CharField(max_length=64, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_processed = models.BooleanField(default=False)
 
+    # Filled by background normalization (processing.py)
+    rendition = models.FileField(upload_to='renditions/', storage=get_evidence_storage, null=True, blank=True, db_index=True,
+                                 help_text="Compact, browser-playable copy served to reviewers")
+    duration_seconds = models.FloatField(null=True, blank=True)
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+    processing_error = models.TextField(blank=True)
+    # Layout of the keyframe contact sheet stored beside the file (keyframes.py): count, tile size, times, scores
+    keyframes = models.JSONField(null=True, blank=True)
+    # Fixed-length motion-energy descriptor from the same sampling pass (motion.py)
+    motion_descriptor = models.JSONField(null=True, blank=True)
+
     def __str__(self):
-        return f"{self.media_type} for {self.encounter}"
+        return f"{self.media_type} for {self.encounter or 'milestone evidence'}"
 
 class AIReport(models.Model):
     media_asset = models.OneToOneField(MediaAsset, on_delete=models.CASCADE, related_name='ai_report')
     result_json = models.JSONField(default=dict)
     confidence_score = models.FloatField(default=0.0)
+    # Energy, voicing and syllable-rate features of the audio track, for speech-domain templates (audio.py)
+    audio_features = models.JSONField(null=True, blank=True)
     generated_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"AI Report for {self.media_asset}"
+
+class AIReviewJob(models.Model):
+    """A queued AI review of a milestone's evidence, claimed by `manage.py run_ai_review` workers (ai_review.py)"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    milestone = models.ForeignKey('clinical.ChildMilestone', on_delete=models.CASCADE, related_name='ai_review_jobs')
+    media_asset = models.ForeignKey(MediaAsset, on_delete=models.CASCADE, related_name='ai_review_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    # Not claimed before this time; pushed back after each failed attempt
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='ai_review_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"AI review of {self.milestone_id} ({self.get_status_display()})"
+
+class AIResultCacheEntry(models.Model):
+    """Analysis output reused for identical clips analysed by the same model for the same milestone (result_cache.py)"""
+    checksum = models.CharField(max_length=64, help_text="SHA-256 of the analysed file")
+    model = models.CharField(max_length=200, help_text="Analyzer or model backend, with its version")
+    template = models.ForeignKey('clinical.MilestoneTemplate', on_delete=models.CASCADE, related_name='+')
+    result_json = models.JSONField(default=dict)
+    confidence_score = models.FloatField(default=0.0)
+    audio_features = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Least recently used entries are evicted first
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('checksum', 'model', 'template')
+        indexes = [
+            models.Index(fields=['last_used_at'], name='ai_result_cache_lru_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} on {self.checksum[:12]} for template {self.template_id}"
+
+class AIReviewCounterManager(models.Manager):
+    def incr(self, name, delta=1):
+        if self.filter(name=name).update(value=F('value') + delta):
+            return
+        try:
+            with transaction.atomic():
+                self.create(name=name, value=delta)
+        except IntegrityError:
+            # Another worker created it first
+            self.filter(name=name).update(value=F('value') + delta)
+
+    def values_for(self, names):
+        values = dict(self.filter(name__in=names).values_list('name', 'value'))
+        return {name: values.get(name, 0) for name in names}
+
+class AIReviewCounter(models.Model):
+    """
+    Running total for AI review statistics (inference.py, result_cache.py) and the caregiver
+    response cache (caregiver_app.cache). Kept in the database so counts from every worker and
+    web process reach the stats endpoints.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    objects = AIReviewCounterManager()
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
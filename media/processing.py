@@ -0,0 +1,168 @@
+"""
+Background normalization of uploaded videos.
+
+Upload views call enqueue() on commit; the transcode (plus the timeline
+poster and preview and the keyframe sheet, see derivatives.py) runs in a bounded process pool
+(settings.MEDIA_PROCESSING_WORKERS) and the result is recorded on the
+MediaAsset from the pool's callback thread. When the pool already has
+MEDIA_PROCESSING_MAX_PENDING jobs, or the process restarts, the asset simply
+stays unprocessed and `manage.py process_media` picks it up, so an upload
+request never waits for a transcode.
+"""
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from core import storage
+from core.uploadhandlers import StagedFile
+
+from . import derivatives, transcode
+
+# What an asset whose current file has not been normalized yet carries
+UNPROCESSED = {
+    'rendition': None,
+    'duration_seconds': None,
+    'width': None,
+    'height': None,
+    'keyframes': None,
+    'motion_descriptor': None,
+    'processing_error': '',
+    'is_processed': False,
+}
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def pool_executor(max_workers):
+    # spawn: workers must not inherit the parent's DB connections or threads
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = pool_executor(settings.MEDIA_PROCESSING_WORKERS)
+            _slots = threading.BoundedSemaphore(settings.MEDIA_PROCESSING_MAX_PENDING)
+        return _executor, _slots
+
+
+def staged_rendition_path(asset):
+    # One per job: a replaced file's transcode may still be running for the same asset
+    os.makedirs(settings.EVIDENCE_UPLOAD_DIR, exist_ok=True)
+    return os.path.join(
+        settings.EVIDENCE_UPLOAD_DIR, f'{asset.id}.{uuid.uuid4().hex}.rendition{transcode.RENDITION_EXTENSION}',
+    )
+
+
+def transcode_args(asset):
+    """Arguments for transcode.process_video: rendition to staging, derivatives beside the original."""
+    derivative_paths = derivatives.derivative_paths(asset.file.name)
+    return (
+        asset.file.path,
+        staged_rendition_path(asset),
+        derivative_paths['poster'],
+        derivative_paths['preview'],
+        derivative_paths['keyframes'],
+        settings.MEDIA_RENDITION_MAX_HEIGHT,
+        settings.MEDIA_RENDITION_MAX_FPS,
+    )
+
+
+def record_result(asset, source, staged_path, result=None, error=None):
+    """
+    Records the transcode of `source` on the asset. If the asset's file has been replaced
+    since (the new file has a job of its own), the result is dropped and False returned.
+    """
+    from .models import MediaAsset
+
+    current = MediaAsset.objects.filter(pk=asset.pk, file=source)
+    if error is not None:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+        asset.processing_error = str(error) or error.__class__.__name__
+        return bool(current.update(processing_error=asset.processing_error))
+    if not current.exists():
+        os.remove(staged_path)
+        return False
+
+    with StagedFile(staged_path, os.path.basename(staged_path)) as rendition:
+        asset.rendition.save(rendition.name, rendition, save=False)
+    if os.path.exists(staged_path):
+        # Identical content was already stored, so storage did not move it
+        os.remove(staged_path)
+    fields = {
+        'rendition': asset.rendition.name,
+        'duration_seconds': result['duration'],
+        'width': result['width'],
+        'height': result['height'],
+        'keyframes': result.get('keyframes'),
+        'motion_descriptor': result.get('motion'),
+        'processing_error': '',
+        'is_processed': True,
+    }
+    # Conditional, so a replacement committed meanwhile is not overwritten
+    if not current.update(**fields):
+        storage.release(fields['rendition'])
+        return False
+    for name, value in fields.items():
+        setattr(asset, name, value)
+    return True
+
+
+def process_asset(asset):
+    """Transcodes in the calling process (used by the process_media command)."""
+    source = asset.file.name
+    args = transcode_args(asset)
+    try:
+        result = transcode.process_video(*args)
+    except (transcode.TranscodeError, OSError) as e:
+        record_result(asset, source, args[1], error=e)
+        return False
+    return record_result(asset, source, args[1], result)
+
+
+def _finished(asset_id, source, staged_path, slots, future):
+    from .models import MediaAsset
+
+    slots.release()
+    close_old_connections()
+    try:
+        asset = MediaAsset.objects.filter(pk=asset_id).first()
+        if asset is None:
+            return
+        error = future.exception()
+        record_result(asset, source, staged_path, None if error else future.result(), error)
+    finally:
+        close_old_connections()
+
+
+def enqueue(asset_id):
+    """
+    Schedules normalization in the process pool without waiting for it.
+    Returns False if the pool is saturated; the asset is left for process_media.
+    """
+    from .models import MediaAsset
+
+    asset = MediaAsset.objects.filter(pk=asset_id, media_type='VIDEO', is_processed=False).first()
+    if asset is None:
+        return False
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        return False
+    args = transcode_args(asset)
+    try:
+        future = executor.submit(transcode.process_video, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(partial(_finished, asset.id, asset.file.name, args[1], slots))
+    return True
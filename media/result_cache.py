@@ -0,0 +1,85 @@
+"""
+Cache of AI analysis results, keyed by (content checksum, model and version,
+milestone template).
+
+Re-uploads of the same clip, reprocessing and duplicate submissions resolve to
+the same checksum (the evidence storage is content-addressed), so the review
+pipeline looks here before analysing anything and reuses the stored
+result_json, confidence_score and audio features. A hit is one indexed lookup plus a
+last-used stamp. The table is bounded by AI_RESULT_CACHE_MAX_ENTRIES; once it
+grows past that, the least recently used tenth is evicted in one delete.
+Hits, misses and evictions are counted in AIReviewCounter rows, since they
+happen in worker processes but are reported by the web process.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+KEY_PREFIX = 'media:result_cache'
+STATS_KEYS = {
+    'hits': f'{KEY_PREFIX}:stats:hits',
+    'misses': f'{KEY_PREFIX}:stats:misses',
+    'evictions': f'{KEY_PREFIX}:stats:evictions',
+}
+
+
+def _incr(key, delta=1):
+    from .models import AIReviewCounter
+
+    AIReviewCounter.objects.incr(key, delta)
+
+
+def lookup(checksum, model, template_id):
+    """(result_json, confidence_score, audio_features) from an earlier analysis, or None."""
+    from .models import AIResultCacheEntry
+
+    if not checksum:
+        return None
+    entry = AIResultCacheEntry.objects.filter(checksum=checksum, model=model, template_id=template_id).values_list(
+        'id', 'result_json', 'confidence_score', 'audio_features',
+    ).first()
+    if entry is None:
+        _incr(STATS_KEYS['misses'])
+        return None
+    AIResultCacheEntry.objects.filter(pk=entry[0]).update(last_used_at=timezone.now())
+    _incr(STATS_KEYS['hits'])
+    return entry[1:]
+
+
+def store(checksum, model, template_id, result, confidence, audio_features=None):
+    from .models import AIResultCacheEntry
+
+    if not checksum:
+        return
+    AIResultCacheEntry.objects.update_or_create(
+        checksum=checksum, model=model, template_id=template_id,
+        defaults={
+            'result_json': result, 'confidence_score': confidence, 'audio_features': audio_features,
+            'last_used_at': timezone.now(),
+        },
+    )
+    evict()
+
+
+def evict(max_entries=None):
+    """Trims the cache to 90% of max_entries once it exceeds max_entries. Returns the number evicted."""
+    from .models import AIResultCacheEntry
+
+    max_entries = settings.AI_RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    excess = AIResultCacheEntry.objects.count() - max_entries
+    if excess <= 0:
+        return 0
+    keep = max_entries - max_entries // 10
+    stale = AIResultCacheEntry.objects.order_by('-last_used_at', '-id').values_list('id', flat=True)[keep:]
+    evicted, _ = AIResultCacheEntry.objects.filter(id__in=list(stale)).delete()
+    _incr(STATS_KEYS['evictions'], evicted)
+    return evicted
+
+
+def get_stats():
+    from .models import AIReviewCounter
+
+    values = AIReviewCounter.objects.values_for(STATS_KEYS.values())
+    stats = {name: values[key] for name, key in STATS_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+    return stats
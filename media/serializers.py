@@ -12,3 +12,5 @@ class MediaAssetSerializer(serializers.ModelSerializer):
     class Meta:
         model = MediaAsset
         fields = '__all__'
+        # Computed from the uploaded bytes
+        read_only_fields = ['file_size', 'checksum']
@@ -0,0 +1,168 @@
+"""
+Serving evidence files in production.
+
+Links handed to the apps are signed for the child's family (or the child, when
+it has no family) and for the day they were issued, so a <video> tag can load
+them without credentials, and a page or cached payload keeps stable URLs for
+the day. The view checks the signature and that the file really belongs to a
+child in that scope, then either hands the transfer to the web server
+(X-Accel-Redirect, which also does zero-copy sendfile and Range) or streams it
+itself with single-range 206 support, so seeking never re-downloads from
+byte 0.
+"""
+import datetime
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, quote_etag, urlencode
+
+from core.storage import BLOB_PREFIX, get_evidence_storage
+
+STREAM_BLOCK_SIZE = 256 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_signer = signing.Signer(salt='media.serving')
+
+
+def scope_for(child):
+    return f'family:{child.family_id}' if child.family_id else f'child:{child.pk}'
+
+
+def signature(name, scope, day):
+    return _signer.signature(f'{scope}|{day}|{name}')
+
+
+def media_url(request, file, scope, today=None):
+    """Absolute, signed URL for `file` (a FieldFile or a stored name) or None."""
+    name = getattr(file, 'name', file)
+    if not name:
+        return None
+    day = (today or datetime.date.today()).strftime('%Y%m%d')
+    query = urlencode({'s': scope, 'd': day, 'sig': signature(name, scope, day)})
+    url = f"{reverse('media-file', args=[name])}?{query}"
+    return request.build_absolute_uri(url) if request else url
+
+
+def valid_signature(name, params, today=None):
+    scope, day, sig = params.get('s', ''), params.get('d', ''), params.get('sig', '')
+    if not (scope and day and sig) or not constant_time_compare(sig, signature(name, scope, day)):
+        return None
+    try:
+        issued = datetime.datetime.strptime(day, '%Y%m%d').date()
+    except ValueError:
+        return None
+    age = ((today or datetime.date.today()) - issued).days
+    if not 0 <= age < settings.MEDIA_URL_MAX_AGE_DAYS:
+        return None
+    return scope
+
+
+def owned_by(name, scope):
+    """True if a child in `scope` references the file (shared blobs may belong to several children)."""
+    from clinical.models import ChildMilestone, TimelineEvent
+    from media.models import MediaAsset
+    from patients.models import Child
+
+    kind, _, value = scope.partition(':')
+    field = {'family': 'family_id', 'child': 'id'}.get(kind)
+    if field is None:
+        return False
+    children = Child.objects.filter(**{field: value})
+    assets = MediaAsset.objects.filter(Q(file=name) | Q(rendition=name))
+    return (
+        ChildMilestone.objects.filter(child__in=children).filter(Q(evidence=name) | Q(evidence_asset__in=assets)).exists()
+        or TimelineEvent.objects.filter(child__in=children, evidence=name).exists()
+        or assets.filter(encounter__child__in=children).exists()
+    )
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single 'bytes=' range, None to serve the whole
+    file (no header, or several ranges), or ValueError if it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def file_response(request, name):
+    storage = get_evidence_storage()
+    path = storage.path(name)
+    stat = os.stat(path)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    # Blob names are content hashes, so their bytes never change
+    immutable = name.startswith(f'{BLOB_PREFIX}/')
+    etag = quote_etag(os.path.basename(name) if immutable else f'{int(stat.st_mtime)}-{stat.st_size}')
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=31536000, immutable' if immutable else 'private, max-age=3600',
+    }
+
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        # nginx serves the bytes (sendfile, Range) from an internal location
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(name)
+    else:
+        response = range_response(request, path, stat.st_size, content_type, etag)
+
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def range_response(request, path, size, content_type, etag):
+    if_range = request.headers.get('If-Range')
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None or (if_range and if_range != etag):
+        # Whole file: FileResponse lets WSGI servers use sendfile via wsgi.file_wrapper
+        return FileResponse(open(path, 'rb'), content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(_read_range(path, start, length), status=206, content_type=content_type)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -1,3 +1,681 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import wave
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import cv2
+import numpy as np
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from clinical.models import ChildMilestone, Encounter, MilestoneTemplate
+from core.models import User
+from patients.models import Child, Family
+from core import storage
+from . import (
+    ai_review, audio, derivatives, inference, keyframes, motion, processing, result_cache, serving, transcode,
+)
+from .models import AIReport, AIResultCacheEntry, AIReviewJob, MediaAsset
+
+
+class MediaAssetUploadTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp, EVIDENCE_UPLOAD_DIR=os.path.join(self.tmp, 'uploads'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        child = Child.objects.create(first_name='Zara', last_name='Test', sex='F',
+                                     date_of_birth=datetime.date.today() - datetime.timedelta(days=150))
+        self.encounter = Encounter.objects.create(child=child)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='hew', password='pw'))
+
+    def test_checksum_and_size_recorded_on_upload(self):
+        video = os.urandom(200_000)
+        response = self.client.post('/api/media/media-assets/', {
+            'encounter': str(self.encounter.id),
+            'media_type': 'VIDEO',
+            'file': SimpleUploadedFile('clip.mp4', video, content_type='video/mp4'),
+            'checksum': 'forged',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        asset = MediaAsset.objects.get()
+        self.assertEqual(asset.checksum, hashlib.sha256(video).hexdigest())
+        self.assertEqual(asset.file_size, len(video))
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'uploads')), [])
+
+
+def write_test_video(path, width=640, height=480, fps=30, frames=30):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(frames):
+        writer.write(np.full((height, width, 3), i * 8 % 256, np.uint8))
+    writer.release()
+
+
+class VideoNormalizationTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp, EVIDENCE_UPLOAD_DIR=os.path.join(self.tmp, 'uploads'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        source = os.path.join(self.tmp, 'source.mp4')
+        write_test_video(source)
+        with open(source, 'rb') as f:
+            self.asset = MediaAsset.objects.create(media_type='VIDEO', file=File(f, name='clip.mp4'))
+
+    def test_rendition_is_downscaled_and_metadata_recorded(self):
+        self.assertTrue(processing.process_asset(self.asset))
+        self.asset.refresh_from_db()
+        self.assertTrue(self.asset.is_processed)
+        self.assertEqual((self.asset.width, self.asset.height), (640, 480))
+        self.assertAlmostEqual(self.asset.duration_seconds, 1.0, places=1)
+        self.assertTrue(self.asset.rendition.name.endswith('.webm'))
+        self.assertEqual(self.asset.keyframes['count'], len(derivatives.load_keyframes(self.asset)))
+        self.assertEqual(len(self.asset.motion_descriptor), motion.DESCRIPTOR_LENGTH)
+
+        capture = cv2.VideoCapture(self.asset.rendition.path)
+        self.assertEqual(int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), 360)
+        self.assertEqual(int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), 480)
+        capture.release()
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'uploads')), [])
+
+    def test_poster_and_preview_rendered_beside_original(self):
+        self.assertTrue(processing.process_asset(self.asset))
+        paths = derivatives.derivative_paths(self.asset.file.name)
+        poster = cv2.imread(paths['poster'])
+        self.assertEqual(poster.shape[:2], (360, 480))
+        capture = cv2.VideoCapture(paths['preview'])
+        self.assertEqual(int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), 144)
+        capture.release()
+
+        # Deleted together with their blob
+        name = self.asset.file.name
+        self.asset.delete()
+        self.assertTrue(storage.release(name))
+        self.assertFalse(any(os.path.exists(path) for path in paths.values()))
+
+    def test_replacing_file_discards_old_rendition_and_reprocesses(self):
+        self.assertTrue(processing.process_asset(self.asset))
+        self.asset.refresh_from_db()
+        old_file, old_rendition = self.asset.file.name, self.asset.rendition.name
+
+        source = os.path.join(self.tmp, 'replacement.mp4')
+        write_test_video(source, width=320, height=240)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='hew', password='pw'))
+        with open(source, 'rb') as f, mock.patch('media.processing.enqueue') as enqueue, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(f'/api/media/media-assets/{self.asset.id}/', {
+                'file': SimpleUploadedFile('clip.mp4', f.read(), content_type='video/mp4'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        enqueue.assert_called_once_with(self.asset.id)
+
+        self.asset.refresh_from_db()
+        self.assertNotEqual(self.asset.file.name, old_file)
+        self.assertFalse(self.asset.is_processed)
+        self.assertFalse(self.asset.rendition)
+        self.assertIsNone(self.asset.keyframes)
+        self.assertIsNone(self.asset.motion_descriptor)
+        self.assertIsNone(self.asset.width)
+        evidence_storage = storage.get_evidence_storage()
+        self.assertFalse(evidence_storage.exists(old_file))
+        self.assertFalse(evidence_storage.exists(old_rendition))
+
+        self.assertTrue(processing.process_asset(self.asset))
+        self.asset.refresh_from_db()
+        self.assertEqual((self.asset.width, self.asset.height), (320, 240))
+
+    def test_transcode_of_replaced_file_is_dropped(self):
+        source = self.asset.file.name
+        args = processing.transcode_args(self.asset)
+        self.assertNotEqual(args[1], processing.transcode_args(self.asset)[1])
+        result = transcode.process_video(*args)
+
+        # The file is replaced while that transcode runs
+        self.asset.file = ContentFile(b'replacement bytes', name='clip.mp4')
+        self.asset.save()
+        self.assertFalse(processing.record_result(self.asset, source, args[1], result))
+        self.asset.refresh_from_db()
+        self.assertFalse(self.asset.is_processed)
+        self.assertFalse(self.asset.rendition)
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'uploads')), [])
+
+    def test_unreadable_video_records_error(self):
+        asset = MediaAsset.objects.create(media_type='VIDEO', file=ContentFile(b'not a video', name='broken.mp4'))
+        self.assertFalse(processing.process_asset(asset))
+        asset.refresh_from_db()
+        self.assertFalse(asset.is_processed)
+        self.assertTrue(asset.processing_error)
+
+    def test_command_processes_pending_videos(self):
+        out = io.StringIO()
+        call_command('process_media', workers=1, stdout=out)
+        self.assertIn('Processed 1 videos, 0 failed', out.getvalue())
+        self.asset.refresh_from_db()
+        self.assertTrue(self.asset.is_processed)
+
+    def test_evidence_submission_queues_normalization_after_commit(self):
+        child = Child.objects.create(first_name='Zara', last_name='Test', sex='F',
+                                     date_of_birth=datetime.date.today() - datetime.timedelta(days=150))
+        milestone = ChildMilestone.objects.create(
+            child=child, template=MilestoneTemplate.objects.create(title='Rollover', expected_age_months=4),
+        )
+        with mock.patch('media.processing.enqueue') as enqueue, self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(f'/api/clinical/milestones/{milestone.id}/upload_evidence/', {
+                'file': SimpleUploadedFile('clip.mp4', b'video bytes', content_type='video/mp4'),
+            }, format='multipart')
+            enqueue.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        milestone.refresh_from_db()
+        enqueue.assert_called_once_with(milestone.evidence_asset_id)
+        self.assertEqual(milestone.evidence.name, milestone.evidence_asset.file.name)
+
+
+class KeyframeSamplingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def write_scenes(self, path, colours, seconds=2, fps=30, size=(320, 240)):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+        for colour in colours:
+            frame = np.zeros((size[1], size[0], 3), np.uint8)
+            frame[:, :size[0] // 2] = colour
+            for _ in range(seconds * fps):
+                writer.write(frame)
+        writer.release()
+
+    def test_keyframes_at_scene_changes(self):
+        source = os.path.join(self.tmp, 'scenes.mp4')
+        self.write_scenes(source, [(0, 0, 0), (255, 255, 255), (0, 0, 255)])
+        strongest = sorted(keyframes.sample_keyframes(source), key=lambda k: -k[1])
+        self.assertEqual(sorted(round(time) for time, _score, _frame in strongest[:3]), [0, 2, 4])
+        self.assertGreater(strongest[2][1], 0.2)
+        self.assertLess(strongest[3][1], 0.01)
+
+    def test_keyframes_bounded_and_read_back_from_sheet(self):
+        source = os.path.join(self.tmp, 'long.mp4')
+        self.write_scenes(source, [(i * 15, 0, 255 - i * 15) for i in range(16)], seconds=1, fps=10)
+        sheet = os.path.join(self.tmp, 'sheet.jpg')
+        layout = keyframes.extract(source, sheet, max_keyframes=6)
+        self.assertEqual((layout['count'], layout['columns'], layout['tile']), (6, 4, [320, 240]))
+        self.assertEqual(layout['times'], sorted(layout['times']))
+
+        frames = keyframes.read_sheet(sheet, layout)
+        self.assertEqual(frames.shape, (6, 240, 320, 3))
+        self.assertLess(frames[:, :, 200:].mean(), 5)
+
+
+class MotionDescriptorTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def write_moving_square(self, path, moving=True, fps=20, frames=60, size=(160, 160)):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+        for i in range(frames):
+            frame = np.zeros((size[1], size[0], 3), np.uint8)
+            x = 2 * i if moving else 40
+            # Crosses the top half of the picture from left to right
+            frame[20:60, x:x + 40] = 255
+            writer.write(frame)
+        writer.release()
+
+    def test_descriptor_locates_motion(self):
+        source = os.path.join(self.tmp, 'moving.mp4')
+        self.write_moving_square(source)
+        descriptor = motion.describe(source)
+        self.assertEqual(len(descriptor), motion.DESCRIPTOR_LENGTH)
+
+        spatial = np.array(descriptor[motion.PROFILE_BINS:motion.PROFILE_BINS + 16]).reshape(4, 4)
+        self.assertAlmostEqual(spatial[:2].sum(), 1.0, places=2)
+        mean, _std, _p90, active, spread_x, spread_y = descriptor[-6:]
+        self.assertGreater(mean, 0.01)
+        self.assertEqual(active, 1.0)
+        self.assertGreater(spread_x, 5 * spread_y)
+
+        still = os.path.join(self.tmp, 'still.mp4')
+        self.write_moving_square(still, moving=False)
+        self.assertEqual(motion.describe(still), [0.0] * motion.DESCRIPTOR_LENGTH)
+
+    def test_blocks_do_not_change_descriptor(self):
+        thumbs = np.random.default_rng(0).integers(0, 255, (40, 32, 32), np.uint8)
+        whole = motion.MotionAccumulator()
+        whole.add(thumbs)
+        blocks = motion.MotionAccumulator()
+        blocks.add(thumbs[:7])
+        blocks.add(thumbs[7:30], previous=thumbs[6])
+        blocks.add(thumbs[30:], previous=thumbs[29])
+        self.assertEqual(whole.descriptor(), blocks.descriptor())
+
+
+def speech_pcm(rate=16000):
+    """1 s of silence, three 0.2 s voiced bursts 0.3 s apart, then 1 s of loud noise, as 16-bit PCM."""
+    t = np.arange(int(0.2 * rate)) / rate
+    burst = 0.3 * (np.sin(2 * np.pi * 300 * t) + 0.5 * np.sin(2 * np.pi * 600 * t))
+    gap = np.zeros(int(0.3 * rate))
+    noise = np.random.default_rng(0).uniform(-0.3, 0.3, rate)
+    signal = np.concatenate([np.zeros(rate), burst, gap, burst, gap, burst, gap, noise])
+    return (signal * 32767).astype('<i2').tobytes()
+
+
+class AudioFeatureTests(TestCase):
+    def test_energy_voicing_and_syllable_rate(self):
+        features = audio.features_from_pcm(io.BytesIO(speech_pcm()))
+        self.assertAlmostEqual(features['duration'], 3.5, delta=0.05)
+        self.assertAlmostEqual(features['voiced_seconds'], 0.6, delta=0.1)
+        self.assertEqual(round(features['syllable_rate'] * features['duration']), 3)
+        self.assertGreater(features['peak_energy_dbfs'], -15)
+
+        # Windows only bound memory; the features do not depend on them
+        self.assertEqual(audio.features_from_pcm(io.BytesIO(speech_pcm()), window_seconds=0.256), features)
+        self.assertIsNone(audio.features_from_pcm(io.BytesIO(b'')))
+
+    @skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), "needs ffmpeg")
+    def test_features_decoded_from_file(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'speech.wav')
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(speech_pcm())
+        self.assertEqual(audio.extract(path), audio.features_from_pcm(io.BytesIO(speech_pcm())))
+
+    def fake_decoder(self, body):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'ffmpeg')
+        with open(path, 'w') as f:
+            f.write(f'#!{sys.executable}\nimport sys, time\n{body}\n')
+        os.chmod(path, 0o755)
+        patches = [mock.patch.object(audio.AudioSegment, 'converter', path),
+                   mock.patch('media.audio.has_audio', return_value=True)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_decoder_errors_do_not_stall_decoding(self):
+        # An error per corrupt packet: far more than a pipe buffer holds, before any audio
+        self.fake_decoder("sys.stderr.write('corrupt packet\\n' * 50000); sys.stdout.buffer.write(bytes(64000)); sys.exit(1)")
+        with self.assertRaisesMessage(audio.AudioError, 'corrupt packet'):
+            audio.extract('clip.mp4', timeout=30)
+
+    def test_stuck_decoder_is_killed(self):
+        self.fake_decoder('time.sleep(60)')
+        with self.assertRaisesMessage(audio.AudioError, 'did not finish within 0.5 seconds'):
+            audio.extract('clip.mp4', timeout=0.5)
+
+
+class AIReviewQueueTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp, EVIDENCE_UPLOAD_DIR=os.path.join(self.tmp, 'uploads'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.child = Child.objects.create(first_name='Zara', last_name='Test', sex='F',
+                                          date_of_birth=datetime.date.today() - datetime.timedelta(days=150))
+        self.template = MilestoneTemplate.objects.create(title='Rollover', expected_age_months=4)
+
+    def submit(self, template=None, child=None):
+        milestone = ChildMilestone.objects.create(child=child or self.child, template=template or self.template)
+        source = os.path.join(self.tmp, 'source.mp4')
+        write_test_video(source, frames=10)
+        with open(source, 'rb') as f, mock.patch('media.processing.enqueue'):
+            response = APIClient().post(f'/api/clinical/milestones/{milestone.id}/upload_evidence/', {
+                'file': SimpleUploadedFile('clip.mp4', f.read(), content_type='video/mp4'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        milestone.refresh_from_db()
+        return milestone
+
+    def test_upload_queues_review_and_worker_records_it(self):
+        milestone = self.submit()
+        job = AIReviewJob.objects.get(milestone=milestone)
+        self.assertEqual((job.status, job.media_asset_id), ('PENDING', milestone.evidence_asset_id))
+        self.assertEqual(milestone.status, 'SUBMITTED')
+
+        self.assertEqual(ai_review.work('test', once=True), (1, 0))
+        milestone.refresh_from_db()
+        self.assertEqual(milestone.status, 'AI_REVIEWED')
+        report = AIReport.objects.get(media_asset=milestone.evidence_asset)
+        self.assertEqual(report.result_json['keyframes'], 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('DONE', 1))
+
+    def test_claims_are_exclusive(self):
+        first = ai_review.enqueue(self.submit())
+        second = ai_review.enqueue(self.submit(MilestoneTemplate.objects.create(title='Sits', expected_age_months=6)))
+        self.assertEqual(AIReviewJob.objects.count(), 2)
+
+        claimed = {ai_review.claim('a').pk, ai_review.claim('b').pk}
+        self.assertEqual(claimed, {first.pk, second.pk})
+        self.assertIsNone(ai_review.claim('c'))
+
+        # A worker that died mid-job gives it up once the lease runs out
+        later = timezone.now() + datetime.timedelta(seconds=settings.AI_REVIEW_LEASE_SECONDS + 1)
+        reclaimed = ai_review.claim('d', now=later)
+        self.assertEqual((reclaimed.locked_by, reclaimed.attempts), ('d', 2))
+
+    def test_batch_worker_scores_clips_with_model(self):
+        cache.clear()
+        milestones = [self.submit(), self.submit(MilestoneTemplate.objects.create(title='Sits', expected_age_months=6))]
+        self.assertEqual(inference.work('test', once=True), (2, 0))
+        for milestone in milestones:
+            milestone.refresh_from_db()
+            self.assertEqual(milestone.status, 'AI_REVIEWED')
+            report = AIReport.objects.get(media_asset=milestone.evidence_asset)
+            self.assertEqual(report.result_json['model'], 'local-stand-in:1')
+            self.assertEqual(len(report.result_json['frame_scores']), milestone.evidence_asset.keyframes['count'])
+            self.assertTrue(0 < report.confidence_score < 1)
+        stats = inference.get_stats()
+        self.assertEqual((stats['clips'], stats['batches'], stats['pending_jobs']), (2, 1, 0))
+
+    def test_stats_reach_web_process_without_shared_cache(self):
+        self.submit()
+        self.assertEqual(inference.work('test', once=True), (1, 0))
+        # The same clip for a sibling is answered from the result cache
+        sibling = Child.objects.create(first_name='Ira', last_name='Test', sex='F', date_of_birth=self.child.date_of_birth)
+        self.submit(child=sibling)
+        self.assertEqual(inference.work('test', once=True), (1, 0))
+        # Workers and web server are separate processes, each with its own LocMemCache
+        cache.clear()
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='admin', password='pw', is_staff=True))
+        stats = client.get('/api/media/inference-stats/').data
+        self.assertEqual((stats['clips'], stats['batches']), (1, 1))
+        self.assertEqual(stats['frames'], 1)
+        self.assertIsNotNone(stats['mean_queue_wait_seconds'])
+        self.assertEqual(
+            {k: stats['result_cache'][k] for k in ('hits', 'misses', 'evictions')}, {'hits': 1, 'misses': 1, 'evictions': 0},
+        )
+
+    def test_identical_clip_reuses_cached_result(self):
+        cache.clear()
+        calls = []
+
+        def analyze(asset, template):
+            calls.append(asset.id)
+            return {'score': 0.7}, 0.7
+
+        twin = Child.objects.create(first_name='Twin', last_name='Test', sex='F', date_of_birth=self.child.date_of_birth)
+        with mock.patch('media.ai_review.get_analyzer', return_value=analyze):
+            first = self.submit()
+            ai_review.work('test', once=True)
+            second = self.submit(child=twin)
+            other_template = self.submit(MilestoneTemplate.objects.create(title='Sits', expected_age_months=6))
+            self.assertEqual(ai_review.work('test', once=True), (2, 0))
+
+        self.assertEqual(calls, [first.evidence_asset_id, other_template.evidence_asset_id])
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'AI_REVIEWED')
+        report = AIReport.objects.get(media_asset=second.evidence_asset)
+        self.assertEqual((report.result_json, report.confidence_score), ({'score': 0.7}, 0.7))
+        self.assertEqual(result_cache.get_stats()['hits'], 1)
+
+        # Batched scoring caches under its own model name
+        third = self.submit(child=Child.objects.create(first_name='Triplet', last_name='Test', sex='F',
+                                                       date_of_birth=self.child.date_of_birth))
+        with mock.patch.object(inference.LocalModel, 'predict', return_value=np.array([0.25])) as predict:
+            self.assertEqual(inference.work('test', once=True), (1, 0))
+            fourth = self.submit(child=Child.objects.create(first_name='Quad', last_name='Test', sex='F',
+                                                            date_of_birth=self.child.date_of_birth))
+            self.assertEqual(inference.work('test', once=True), (1, 0))
+            self.assertEqual(predict.call_count, 1)
+        self.assertEqual(AIReport.objects.get(media_asset=fourth.evidence_asset).confidence_score, 0.25)
+        self.assertEqual(third.evidence_asset.checksum, fourth.evidence_asset.checksum)
+
+    def test_audio_features_for_speech_templates(self):
+        features = {'voiced_ratio': 0.4}
+        babbling = MilestoneTemplate.objects.create(title='Babbling', expected_age_months=4, domain='LANGUAGE')
+        with mock.patch('media.audio.extract', return_value=features) as extract:
+            speech = self.submit(babbling)
+            motor = self.submit()
+            self.assertEqual(ai_review.work('test', once=True), (2, 0))
+        extract.assert_called_once_with(speech.evidence_asset.file.path)
+        self.assertEqual(AIReport.objects.get(media_asset=speech.evidence_asset).audio_features, features)
+        self.assertIsNone(AIReport.objects.get(media_asset=motor.evidence_asset).audio_features)
+
+    def test_motion_descriptor_ensured_for_gross_motor_templates(self):
+        self.template.domain = 'GROSS_MOTOR'
+        self.template.save()
+        milestone = self.submit()
+        self.assertIsNone(milestone.evidence_asset.motion_descriptor)
+        ai_review.work('test', once=True)
+        milestone.evidence_asset.refresh_from_db()
+        self.assertEqual(len(milestone.evidence_asset.motion_descriptor), motion.DESCRIPTOR_LENGTH)
+
+    def test_cache_evicts_least_recently_used(self):
+        for i in range(12):
+            result_cache.store(f'{i:064x}', 'model:1', self.template.id, {'i': i}, 0.5)
+        self.assertEqual(AIResultCacheEntry.objects.count(), 12)
+        result_cache.lookup(f'{0:064x}', 'model:1', self.template.id)
+
+        self.assertEqual(result_cache.evict(max_entries=10), 3)
+        remaining = set(AIResultCacheEntry.objects.values_list('result_json__i', flat=True))
+        self.assertEqual(remaining, {0, 4, 5, 6, 7, 8, 9, 10, 11})
+        self.assertEqual(result_cache.evict(max_entries=10), 0)
+
+    @override_settings(AI_REVIEW_MAX_ATTEMPTS=2, AI_REVIEW_RETRY_BASE_SECONDS=30)
+    def test_failures_retried_with_backoff(self):
+        milestone = self.submit()
+        failing = mock.Mock(side_effect=RuntimeError('model unavailable'))
+        with mock.patch('media.ai_review.get_analyzer', return_value=failing):
+            self.assertEqual(ai_review.work('test', once=True), (0, 1))
+            job = AIReviewJob.objects.get(milestone=milestone)
+            self.assertEqual((job.status, job.last_error), ('PENDING', 'model unavailable'))
+            self.assertGreater(job.run_after, timezone.now() + datetime.timedelta(seconds=25))
+            self.assertEqual(ai_review.work('test', once=True), (0, 0))
+
+            job.run_after = timezone.now()
+            job.save()
+            self.assertEqual(ai_review.work('test', once=True), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+        milestone.refresh_from_db()
+        self.assertEqual(milestone.status, 'SUBMITTED')
+
+    def test_worker_survives_errors_outside_the_analyzer(self):
+        first = self.submit()
+        second = self.submit(MilestoneTemplate.objects.create(title='Sits', expected_age_months=6))
+        complete = ai_review.complete
+
+        def flaky_complete(job, *args):
+            if job.milestone_id == first.id:
+                raise OperationalError('database is locked')
+            complete(job, *args)
+
+        with mock.patch('media.ai_review.complete', side_effect=flaky_complete):
+            self.assertEqual(ai_review.work('test', once=True), (1, 1))
+        job = AIReviewJob.objects.get(milestone=first)
+        self.assertEqual((job.status, job.last_error), ('PENDING', 'database is locked'))
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'AI_REVIEWED')
+
+    @override_settings(AI_REVIEW_MAX_ATTEMPTS=2)
+    def test_job_that_kills_its_worker_fails_after_max_attempts(self):
+        job = ai_review.enqueue(self.submit())
+        lease = datetime.timedelta(seconds=settings.AI_REVIEW_LEASE_SECONDS + 1)
+        now = timezone.now()
+        # Each claim's worker dies without recording anything
+        self.assertEqual(ai_review.claim('a', now=now).pk, job.pk)
+        self.assertEqual(ai_review.claim('b', now=now + lease).pk, job.pk)
+        self.assertIsNone(ai_review.claim('c', now=now + 2 * lease))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+
+    def test_batch_worker_records_other_clips_when_one_fails(self):
+        milestones = [self.submit(), self.submit(MilestoneTemplate.objects.create(title='Sits', expected_age_months=6))]
+        record_result = inference.record_result
+
+        def flaky_record(backend, request):
+            if request.job.milestone_id == milestones[0].id:
+                raise OperationalError('database is locked')
+            record_result(backend, request)
+
+        with mock.patch('media.inference.record_result', side_effect=flaky_record):
+            self.assertEqual(inference.work('test', once=True), (1, 1))
+        self.assertEqual(AIReviewJob.objects.get(milestone=milestones[0]).status, 'PENDING')
+        milestones[1].refresh_from_db()
+        self.assertEqual(milestones[1].status, 'AI_REVIEWED')
+
+
+class BatchSchedulerTests(TestCase):
+    class Backend:
+        def __init__(self, fail=False):
+            self.batches = []
+            self.fail = fail
+
+        def predict(self, frames, template_ids):
+            self.batches.append(len(frames))
+            if self.fail:
+                raise ConnectionError('model server down')
+            return frames.mean(axis=(1, 2, 3)) / 100
+
+    def setUp(self):
+        cache.clear()
+        self.now = 0.0
+        self.results, self.errors = {}, []
+        self.backend = self.Backend()
+        self.scheduler = inference.BatchScheduler(
+            self.backend, lambda r: self.results.__setitem__(r.job.name, [round(float(x), 3) for x in r.scores]),
+            lambda r, e: self.errors.append(r.job.name), max_batch_frames=5, max_wait=2, clock=lambda: self.now,
+        )
+
+    def submit(self, name, values):
+        job = SimpleNamespace(name=name, created_at=timezone.now())
+        self.scheduler.submit(job, np.stack([np.full((2, 2, 3), v, np.uint8) for v in values]), template_id=1)
+
+    def test_frames_of_several_clips_share_batches(self):
+        self.submit('a', [10, 20, 30])
+        self.submit('b', [40, 50, 60])
+        self.assertEqual((self.backend.batches, list(self.results)), ([5], ['a']))
+        self.submit('c', [70, 80, 90])
+        self.scheduler.flush()
+        self.assertEqual(self.backend.batches, [5, 4])
+        self.assertEqual(self.results, {
+            'a': [0.1, 0.2, 0.3], 'b': [0.4, 0.5, 0.6], 'c': [0.7, 0.8, 0.9],
+        })
+        stats = inference.get_stats()
+        self.assertEqual((stats['clips'], stats['frames'], stats['batches'], stats['mean_batch_frames']), (3, 9, 2, 4.5))
+
+    def test_partial_batch_dispatched_at_deadline(self):
+        self.submit('a', [10])
+        self.now = 1.5
+        self.scheduler.poll()
+        self.assertEqual(self.backend.batches, [])
+        self.assertEqual(self.scheduler.seconds_to_deadline(), 0.5)
+        self.now = 2.0
+        self.scheduler.poll()
+        self.assertEqual(self.backend.batches, [1])
+        self.assertIsNone(self.scheduler.seconds_to_deadline())
+        self.assertEqual(inference.get_stats()['mean_batch_wait_seconds'], 2.0)
+
+    def test_failed_batch_fails_every_clip_in_it(self):
+        self.backend.fail = True
+        self.submit('a', [10, 20, 30, 40])
+        self.submit('b', [50, 60, 70])
+        self.assertEqual(self.errors, ['a', 'b'])
+        self.assertEqual((self.scheduler.pending_frames, len(self.scheduler.pending)), (0, 0))
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp, EVIDENCE_UPLOAD_DIR=os.path.join(self.tmp, 'uploads'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.family = Family.objects.create(name='Serving Family')
+        child = Child.objects.create(first_name='Zara', last_name='Test', sex='F', family=self.family,
+                                     date_of_birth=datetime.date.today() - datetime.timedelta(days=150))
+        self.milestone = ChildMilestone.objects.create(
+            child=child, template=MilestoneTemplate.objects.create(title='Rollover', expected_age_months=4),
+        )
+        self.video = os.urandom(1000)
+        self.milestone.evidence.save('clip.mp4', ContentFile(self.video))
+        self.url = serving.media_url(None, self.milestone.evidence, serving.scope_for(child))
+        self.client = APIClient()
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_and_partial_content(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.video)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], 'bytes 100-199/1000')
+        self.assertEqual(self.content(partial), self.video[100:200])
+
+        self.assertEqual(self.content(self.client.get(self.url, HTTP_RANGE='bytes=-10')), self.video[-10:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=5000-').status_code, 416)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_signature_scoped_to_family_and_day(self):
+        other = Family.objects.create(name='Other Family')
+        name = self.milestone.evidence.name
+        forged = serving.media_url(None, self.milestone.evidence, serving.scope_for(Child(family=other)))
+        self.assertEqual(self.client.get(forged).status_code, 403)
+        self.assertEqual(self.client.get(self.url.replace('sig=', 'sig=x')).status_code, 403)
+
+        old = serving.media_url(None, self.milestone.evidence, f'family:{self.family.id}',
+                                today=datetime.date.today() - datetime.timedelta(days=5))
+        self.assertEqual(self.client.get(old).status_code, 403)
+        self.assertEqual(self.client.get(f'/api/media/files/{name}').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(username='doctor', password='pw', role='DOCTOR'))
+        self.assertEqual(self.client.get(f'/api/media/files/{name}').status_code, 200)
+
+    def test_derivatives_rendered_on_first_request(self):
+        source = os.path.join(self.tmp, 'source.mp4')
+        write_test_video(source)
+        with open(source, 'rb') as f:
+            self.milestone.evidence.save('clip.mp4', File(f))
+        self.milestone.save()
+        scope = serving.scope_for(self.milestone.child)
+        poster = derivatives.derivative_name(self.milestone.evidence.name, 'poster')
+
+        response = self.client.get(serving.media_url(None, poster, scope))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(self.content(response)[:2], b'\xff\xd8')
+        self.assertEqual(self.client.get(serving.media_url(None, poster + 'x', scope)).status_code, 403)
+
+        broken = derivatives.derivative_name(self.url.split('?')[0].split('/files/')[1], 'preview')
+        self.client.force_authenticate(User.objects.create_user(username='doctor', password='pw', role='DOCTOR'))
+        self.assertEqual(self.client.get(f'/api/media/files/{broken}').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_offloads_to_web_server(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.milestone.evidence.name}')
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,154 @@
+"""
+Video normalization with OpenCV.
+
+Runs in worker processes (see processing.py), so this module imports nothing
+from Django. Renditions are video-only: OpenCV does not carry audio, so the
+original upload stays the reference for anything that needs sound.
+"""
+import os
+import uuid
+
+import cv2
+
+# VP8 in WebM plays in every browser and ships with the opencv-python-headless build
+RENDITION_FOURCC = 'VP80'
+RENDITION_EXTENSION = '.webm'
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def target_size(width, height, max_height):
+    if height <= max_height:
+        return width, height
+    scale = max_height / height
+    # Codecs want even dimensions
+    return int(width * scale) // 2 * 2, max_height // 2 * 2
+
+
+def normalize_video(src_path, dst_path, max_height=360, max_fps=15):
+    """
+    Writes a downscaled, frame-rate-capped rendition of `src_path` to `dst_path`.
+    Returns the source's duration (seconds), width and height.
+    """
+    capture = cv2.VideoCapture(src_path)
+    if not capture.isOpened():
+        raise TranscodeError(f"Cannot open {src_path}")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or max_fps
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if not width or not height:
+            raise TranscodeError(f"No video stream in {src_path}")
+
+        # Keep every `step`-th frame to bring the rate down to about max_fps
+        step = max(1, round(fps / max_fps))
+        size = target_size(width, height, max_height)
+        writer = cv2.VideoWriter(dst_path, cv2.VideoWriter_fourcc(*RENDITION_FOURCC), fps / step, size)
+        if not writer.isOpened():
+            raise TranscodeError(f"Cannot write {dst_path}")
+
+        frames = 0
+        try:
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if frames % step == 0:
+                    if (frame.shape[1], frame.shape[0]) != size:
+                        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                    writer.write(frame)
+                frames += 1
+        finally:
+            writer.release()
+    finally:
+        capture.release()
+
+    if not frames:
+        raise TranscodeError(f"No frames decoded from {src_path}")
+    return {'duration': frames / fps, 'width': width, 'height': height}
+
+
+def staging_path(dst_path):
+    """Temporary path beside dst_path; derivatives only appear under their final name once complete."""
+    root, ext = os.path.splitext(dst_path)
+    return f'{root}.{uuid.uuid4().hex}.partial{ext}'
+
+
+def extract_poster(src_path, dst_path, max_width=480, at_seconds=1.0, quality=80):
+    """Writes a JPEG of the frame at `at_seconds` (or the first frame of shorter clips)."""
+    capture = cv2.VideoCapture(src_path)
+    if not capture.isOpened():
+        raise TranscodeError(f"Cannot open {src_path}")
+    try:
+        capture.set(cv2.CAP_PROP_POS_MSEC, at_seconds * 1000)
+        ok, frame = capture.read()
+        if not ok:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = capture.read()
+    finally:
+        capture.release()
+    if not ok:
+        raise TranscodeError(f"No frames decoded from {src_path}")
+
+    height, width = frame.shape[:2]
+    if width > max_width:
+        frame = cv2.resize(frame, (max_width, int(height * max_width / width)), interpolation=cv2.INTER_AREA)
+    tmp_path = staging_path(dst_path)
+    if not cv2.imwrite(tmp_path, frame, [cv2.IMWRITE_JPEG_QUALITY, quality]):
+        raise TranscodeError(f"Cannot write {dst_path}")
+    os.replace(tmp_path, dst_path)
+
+
+def make_preview(src_path, dst_path, seconds=3, max_height=144, max_fps=10):
+    """Writes the first `seconds` of the clip as a small, low-frame-rate WebM."""
+    capture = cv2.VideoCapture(src_path)
+    if not capture.isOpened():
+        raise TranscodeError(f"Cannot open {src_path}")
+    tmp_path = staging_path(dst_path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or max_fps
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        step = max(1, round(fps / max_fps))
+        size = target_size(width, height, max_height)
+        writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*RENDITION_FOURCC), fps / step, size)
+        if not writer.isOpened():
+            raise TranscodeError(f"Cannot write {dst_path}")
+        try:
+            for index in range(int(fps * seconds)):
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if index % step == 0:
+                    writer.write(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+        finally:
+            writer.release()
+    finally:
+        capture.release()
+    os.replace(tmp_path, dst_path)
+
+
+def process_video(src_path, rendition_path, poster_path, preview_path, keyframes_path, max_height=360, max_fps=15):
+    """
+    The background job for a new upload: the normalized rendition, the timeline
+    derivatives, the keyframe sheet and the motion descriptor (from the same
+    sampling pass). The result carries the keyframe layout and the descriptor.
+    """
+    from . import keyframes, motion  # keyframes imports this module
+
+    result = normalize_video(src_path, rendition_path, max_height, max_fps)
+    # The rendition is what matters; a missing derivative is rendered again on first request
+    for render, path in ((extract_poster, poster_path), (make_preview, preview_path)):
+        try:
+            render(src_path, path)
+        except (TranscodeError, OSError):
+            pass
+    accumulator = motion.MotionAccumulator()
+    try:
+        result['keyframes'] = keyframes.extract(src_path, keyframes_path, motion=accumulator)
+        result['motion'] = accumulator.descriptor()
+    except (TranscodeError, OSError):
+        result['keyframes'] = result['motion'] = None
+    return result
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MediaAssetViewSet, AIReportViewSet
+from .views import MediaAssetViewSet, AIReportViewSet, MediaFileView, InferenceStatsView
 
 router = DefaultRouter()
 router.register(r'media-assets', MediaAssetViewSet)
@@ -8,4 +8,6 @@ router.register(r'ai-reports', AIReportViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('files/<path:name>', MediaFileView.as_view(), name='media-file'),
+    path('inference-stats/', InferenceStatsView.as_view(), name='media-inference-stats'),
 ]
@@ -1,11 +1,77 @@
-from rest_framework import viewsets
+from functools import partial
+
+from django.db import transaction
+from django.http import Http404
+from rest_framework import viewsets, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core import storage
+from core.uploadhandlers import ChecksumUploadMixin, file_digest
+from . import derivatives, inference, processing, serving, transcode
 from .models import MediaAsset, AIReport
 from .serializers import MediaAssetSerializer, AIReportSerializer
 
-class MediaAssetViewSet(viewsets.ModelViewSet):
+class MediaAssetViewSet(ChecksumUploadMixin, viewsets.ModelViewSet):
     queryset = MediaAsset.objects.all()
     serializer_class = MediaAssetSerializer
 
+    def perform_create(self, serializer):
+        checksum, file_size = file_digest(serializer.validated_data['file'])
+        asset = serializer.save(checksum=checksum, file_size=file_size)
+        if asset.media_type == 'VIDEO':
+            transaction.on_commit(partial(processing.enqueue, asset.id))
+
+    def perform_update(self, serializer):
+        file = serializer.validated_data.get('file')
+        if file is None:
+            serializer.save()
+            return
+        previous = [serializer.instance.file.name, serializer.instance.rendition.name]
+        checksum, file_size = file_digest(file)
+        # The rendition, keyframes and motion descriptor describe the old clip
+        asset = serializer.save(checksum=checksum, file_size=file_size, **processing.UNPROCESSED)
+        # The replaced blobs may be shared with other rows; they are only deleted if unreferenced
+        for name in previous:
+            transaction.on_commit(partial(storage.release, name))
+        if asset.media_type == 'VIDEO':
+            transaction.on_commit(partial(processing.enqueue, asset.id))
+
 class AIReportViewSet(viewsets.ModelViewSet):
     queryset = AIReport.objects.all()
     serializer_class = AIReportSerializer
+
+class MediaFileView(APIView):
+    """
+    Serves evidence files with Range support (see serving.py).
+    Caregiver apps use the signed links from media_url(); signed-in staff may open any file.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, name):
+        # Posters and previews are accessible to whoever may see their source
+        derivative = derivatives.parse(name)
+        source = derivative[0] if derivative else name
+        if not request.user.is_authenticated:
+            scope = serving.valid_signature(name, request.query_params)
+            if scope is None or not serving.owned_by(source, scope):
+                return Response({'error': 'Link expired or not valid for this file'}, status=status.HTTP_403_FORBIDDEN)
+        evidence_storage = storage.get_evidence_storage()
+        if derivative and not evidence_storage.exists(name):
+            if not derivatives.is_video(source) or not evidence_storage.exists(source):
+                raise Http404
+            try:
+                derivatives.ensure(*derivative)
+            except transcode.TranscodeError:
+                raise Http404
+        if not evidence_storage.exists(name):
+            raise Http404
+        return serving.file_response(request, name)
+
+class InferenceStatsView(APIView):
+    """
+    Throughput and waiting times of batched AI review (`run_ai_review --batch`), for sizing workers.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(inference.get_stats())
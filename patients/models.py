@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+import datetime
 import uuid
 
 class Family(models.Model):
@@ -32,6 +34,48 @@ class Caregiver(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+class ChildQuerySet(models.QuerySet):
+    ACTIONABLE_STATUSES = ('PENDING', 'REJECTED')
+    REVIEW_STATUSES = ('SUBMITTED', 'AI_REVIEWED')
+
+    def with_milestone_status(self, today=None):
+        """
+        Annotates actionable_count, review_count and status_color on every child
+        in one aggregate query, instead of counting milestones child by child.
+
+        The age cutoff (int(age_days / 30) >= expected_age_months) is turned into
+        a CASE over the distinct template ages, so the comparison stays in SQL.
+        """
+        from clinical.schedule import get_schedule
+
+        today = today or datetime.date.today()
+        ages = reversed(get_schedule().distinct_ages)
+        # Highest template age each child has reached; -1 means none unlocked yet.
+        age_cutoff = Case(
+            *[When(date_of_birth__lte=today - datetime.timedelta(days=30 * age), then=Value(age))
+              for age in ages],
+            default=Value(-1),
+            output_field=IntegerField(),
+        )
+
+        return self.annotate(age_cutoff=age_cutoff).annotate(
+            actionable_count=Count('milestones', filter=Q(
+                milestones__status__in=self.ACTIONABLE_STATUSES,
+                milestones__template__expected_age_months__lte=models.F('age_cutoff'),
+            )),
+            review_count=Count('milestones', filter=Q(
+                milestones__status__in=self.REVIEW_STATUSES,
+            )),
+        ).annotate(
+            status_color=Case(
+                When(is_at_risk=True, then=Value('red')),
+                When(actionable_count__gt=0, then=Value('amber')),
+                When(review_count__gt=0, then=Value('blue')),
+                default=Value('green'),
+                output_field=models.CharField(),
+            ),
+        )
+
 class Child(models.Model):
     SEX_CHOICES = (
         ('M', 'Male'),
@@ -57,5 +101,7 @@ class Child(models.Model):
     enrollment_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ChildQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.get_sex_display()})"
@@ -1,3 +1,55 @@
+import datetime
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from clinical.models import ChildMilestone, ChildStatusSummary, MilestoneTemplate
+from .models import Caregiver, Child
+
+
+def child_payload(caregiver, first_name, age_days=200):
+    return {
+        'caregiver': str(caregiver.id),
+        'first_name': first_name,
+        'last_name': 'Test',
+        'sex': 'F',
+        'date_of_birth': (datetime.date.today() - datetime.timedelta(days=age_days)).isoformat(),
+    }
+
+
+class ChildEnrollmentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.caregiver = Caregiver.objects.create(first_name='Asha', last_name='')
+        for title, age in (('Social Smile', 2), ('Rollover', 4), ('Walks Alone', 12)):
+            MilestoneTemplate.objects.create(title=title, expected_age_months=age)
+
+    def test_create_populates_milestones_and_summary(self):
+        response = self.client.post('/api/patients/children/', child_payload(self.caregiver, 'Zara'), format='json')
+        self.assertEqual(response.status_code, 201)
+        child_id = response.data['id']
+        self.assertEqual(ChildMilestone.objects.filter(child_id=child_id, status='PENDING').count(), 3)
+        self.assertEqual(ChildStatusSummary.objects.get(child_id=child_id).actionable_count, 2)
+
+    def test_bulk_enroll(self):
+        payload = [child_payload(self.caregiver, f'Child {i}') for i in range(25)]
+        response = self.client.post('/api/patients/children/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(ChildMilestone.objects.filter(child_id__in=response.data['ids']).count(), 75)
+        self.assertEqual(ChildStatusSummary.objects.filter(child_id__in=response.data['ids']).count(), 25)
+
+    def test_bulk_enroll_is_all_or_nothing(self):
+        payload = [child_payload(self.caregiver, 'Valid'), {'first_name': 'Missing fields'}]
+        response = self.client.post('/api/patients/children/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Child.objects.exists())
 
-# Create your tests here.
+    def test_materialize_skips_existing_pairs(self):
+        child = Child.objects.create(first_name='Arjun', last_name='Test', sex='M',
+                                     date_of_birth=datetime.date.today())
+        template = MilestoneTemplate.objects.first()
+        ChildMilestone.objects.create(child=child, template=template, status='COMPLETED')
+        ChildMilestone.objects.materialize([child.id])
+        self.assertEqual(ChildMilestone.objects.filter(child=child).count(), 3)
+        self.assertEqual(ChildMilestone.objects.get(child=child, template=template).status, 'COMPLETED')
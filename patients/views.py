@@ -1,4 +1,7 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.db import transaction
 from .models import Caregiver, Child
 from .serializers import CaregiverSerializer, ChildSerializer
 
@@ -12,26 +15,40 @@ class ChildViewSet(viewsets.ModelViewSet):
     serializer_class = ChildSerializer
     permission_classes = [permissions.AllowAny]
 
+    def enroll(self, serializer):
+        """
+        Saves the child(ren) and populates their milestones from the templates,
+        so every new child gets the standard developmental path (like Zara/Arjun).
+        Milestones start PENDING; timelines show them as active once age >= expected age.
+        Runs in the caller's transaction, so a child is never enrolled without its milestones.
+        """
+        from clinical.models import ChildMilestone, ChildStatusSummary
+
+        saved = serializer.save()
+        children = saved if isinstance(saved, list) else [saved]
+        child_ids = [child.id for child in children]
+
+        ChildMilestone.objects.materialize(child_ids)
+        ChildStatusSummary.objects.rebuild(Child.objects.filter(id__in=child_ids))
+        return children
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        print("DEBUG: perform_create called with data:", serializer.validated_data)
-        child = serializer.save()
-        print("DEBUG: Child saved:", child)
-        
-        # Populate Milestones from Templates
-        # This ensures every new child gets the standard developmental path (like Zara/Arjun)
-        try:
-            from clinical.models import MilestoneTemplate, ChildMilestone
-            import datetime
-            
-            templates = MilestoneTemplate.objects.all()
-            # Calculate rough age in months
-            age_months = (datetime.date.today() - child.date_of_birth).days // 30
-            
-            for t in templates:
-                cm, created = ChildMilestone.objects.get_or_create(child=child, template=t)
-                
-                # Default is pending (is_completed=False), so nothing to do here.
-                # Timelines will show them as ACTIVE (Pending) if age >= expected_age.
-                    
-        except Exception as e:
-            print(f"Error populating milestones for {child}: {e}")
+        self.enroll(serializer)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Enrolls a list of children in one transaction, for enrollment drives.
+        Either every child is enrolled or, on a validation error, none are.
+        """
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Expected a list of children.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            children = self.enroll(serializer)
+        return Response(
+            {'count': len(children), 'ids': [child.id for child in children]},
+            status=status.HTTP_201_CREATED,
+        )
@@ -27,6 +27,7 @@ templates_data = [
         "title": "Social Smile", 
         "desc": "Smiles at people", 
         "age": 2,
+        "domain": "SOCIAL",
         "hi": {"title": "सामाजिक मुस्कान", "desc": "लोगों को देखकर मुस्कुराता है"},
         "kn": {"title": "ಸಾಮಾಜಿಕ ನಗು", "desc": "ಜನರನ್ನು ನೋಡಿದಾಗ ನಗುತ್ತದೆ"}
     },
@@ -34,6 +35,7 @@ templates_data = [
         "title": "Head Up", 
         "desc": "Holds head up when on tummy", 
         "age": 2,
+        "domain": "GROSS_MOTOR",
         "hi": {"title": "सिर उठाना", "desc": "पेट के बल लेटने पर सिर उठाता है"},
         "kn": {"title": "ತಲೆ ಎತ್ತುವುದು", "desc": "ಹೊಟ್ಟೆಯ ಮೇಲೆ ಮಲಗಿದಾಗ ತಲೆಯನ್ನು ಹಿಡಿದಿಟ್ಟುಕೊಳ್ಳುತ್ತದೆ"}
     },
@@ -42,6 +44,7 @@ templates_data = [
         "title": "Rollover", 
         "desc": "Rolls from tummy to back", 
         "age": 4,
+        "domain": "GROSS_MOTOR",
         "hi": {"title": "पलटना", "desc": "पेट से पीठ के बल पलटता है"},
         "kn": {"title": "ಉರುಳುವುದು", "desc": "ಹೊಟ್ಟೆಯಿಂದ ಬೆನ್ನಿಗೆ ಉರುಳುತ್ತದೆ"}
     },
@@ -49,6 +52,7 @@ templates_data = [
         "title": "Babbling", 
         "desc": "Makes sounds like 'ooh' and 'aah'", 
         "age": 4,
+        "domain": "LANGUAGE",
         "hi": {"title": "बड़बड़ाना", "desc": "'ऊ' और 'आ' जैसी आवाज़ें निकालता है"},
         "kn": {"title": "ಬಡಬಡಿಸುವುದು", "desc": "'ಊ' ಮತ್ತು 'ಆ' ತರಹದ ಶಬ್ದಗಳನ್ನು ಮಾಡುತ್ತದೆ"}
     },
@@ -57,6 +61,7 @@ templates_data = [
         "title": "Sits with Support", 
         "desc": "Sits without help for short periods", 
         "age": 6,
+        "domain": "GROSS_MOTOR",
         "hi": {"title": "सहारे के साथ बैठना", "desc": "थोड़ी देर के लिए बिना मदद के बैठता है"},
         "kn": {"title": "ಬೆಂಬಲದೊಂದಿಗೆ ಕುಳಿತುಕೊಳ್ಳುವುದು", "desc": "ಸ್ವಲ್ಪ ಸಮಯದವರೆಗೆ ಸಹಾಯವಿಲ್ಲದೆ ಕುಳಿತುಕೊಳ್ಳುತ್ತದೆ"}
     },
@@ -64,6 +69,7 @@ templates_data = [
         "title": "Passes Objects", 
         "desc": "Passes toy from one hand to another", 
         "age": 6,
+        "domain": "FINE_MOTOR",
         "hi": {"title": "वस्तुएँ पकड़ना", "desc": "खिलौने को एक हाथ से दूसरे हाथ में देता है"},
         "kn": {"title": "ವಸ್ತುಗಳನ್ನು ರವಾನಿಸುವುದು", "desc": "ಆಟಿಕೆ ಒಂದು ಕೈಯಿಂದ ಇನ್ನೊಂದು ಕೈಗೆ ನೀಡುತ್ತದೆ"}
     },
@@ -72,6 +78,7 @@ templates_data = [
         "title": "Crawling", 
         "desc": "Crawls on hands and knees", 
         "age": 9,
+        "domain": "GROSS_MOTOR",
         "hi": {"title": "घुटनों के बल चलना", "desc": "हाथ और घुटनों के बल चलता है"},
         "kn": {"title": "ತೆವಳುವುದು", "desc": "ಕೈ ಮತ್ತು ಮೊಣಕಾಲುಗಳ ಮೇಲೆ ತೆವಳುತ್ತದೆ"}
     },
@@ -79,6 +86,7 @@ templates_data = [
         "title": "Pincer Grasp", 
         "desc": "Picks up small food with thumb/index", 
         "age": 9,
+        "domain": "FINE_MOTOR",
         "hi": {"title": "चुटकी पकड़", "desc": "अंगूठे और तर्जनी से छोटा भोजन उठाता है"},
         "kn": {"title": "ಚಿಮುಟದ ಹಿಡಿತ", "desc": "ಹೆಬ್ಬೆರಳು/ತೋರುಬೆರಳಿನಿಂದ ಸಣ್ಣ ಆಹಾರವನ್ನು ತೆಗೆದುಕೊಳ್ಳುತ್ತದೆ"}
     },
@@ -87,6 +95,7 @@ templates_data = [
         "title": "First Steps", 
         "desc": "Takes steps holding on or alone", 
         "age": 12,
+        "domain": "GROSS_MOTOR",
         "hi": {"title": "पहला कदम", "desc": "पकड़ कर या अकेले कदम बढ़ाता है"},
         "kn": {"title": "ಮೊದಲ ಹಂತಗಳು", "desc": "ಹಿಡಿದುಕೊಂಡು ಅಥವಾ ಏಕಾಂಗಿಯಾಗಿ ಹೆಜ್ಜೆಗಳನ್ನು ಇಡುತ್ತದೆ"}
     },
@@ -94,6 +103,7 @@ templates_data = [
         "title": "First Words", 
         "desc": "Says 'mama' or 'dada'", 
         "age": 12,
+        "domain": "LANGUAGE",
         "hi": {"title": "पहला शब्द", "desc": "'mama' या 'dada' बोलता है"},
         "kn": {"title": "ಮೊದಲ ಪದಗಳು", "desc": "'ಅಮ್ಮ' ಅಥವಾ 'ಅಪ್ಪ' ಎನ್ನುತ್ತದೆ"}
     },
@@ -102,6 +112,7 @@ templates_data = [
         "title": "Walking Well", 
         "desc": "Walks alone steadily", 
         "age": 18,
+        "domain": "GROSS_MOTOR",
         "hi": {"title": "अच्छी तरह चलना", "desc": "अकेले स्थिरता से चलता है"},
         "kn": {"title": "ಚೆನ್ನಾಗಿ ನಡೆಯುವುದು", "desc": "ಏಕಾಂಗಿಯಾಗಿ ಸ್ಥಿರವಾಗಿ ನಡೆಯುತ್ತದೆ"}
     },
@@ -109,6 +120,7 @@ templates_data = [
         "title": "Spoon Feeding", 
         "desc": "Eats with a spoon", 
         "age": 18,
+        "domain": "FINE_MOTOR",
         "hi": {"title": "चम्मच से खाना", "desc": "चम्मच से खाता है"},
         "kn": {"title": "ಚಮಚದ ಊಟ", "desc": "ಚಮಚದೊಂದಿಗೆ ತಿನ್ನುತ್ತದೆ"}
     },
@@ -117,6 +129,7 @@ templates_data = [
         "title": "Running", 
         "desc": "Runs well", 
         "age": 24,
+        "domain": "GROSS_MOTOR",
         "hi": {"title": "दौड़ना", "desc": "अच्छी तरह दौड़ता है"},
         "kn": {"title": "ಓಡುವುದು", "desc": "ಚೆನ್ನಾಗಿ ಓಡುತ್ತದೆ"}
     },
@@ -124,6 +137,7 @@ templates_data = [
         "title": "2-Word Sentences", 
         "desc": "Puts two words together", 
         "age": 24,
+        "domain": "LANGUAGE",
         "hi": {"title": "दो शब्दों के वाक्य", "desc": "दो शब्दों को एक साथ जोड़ता है"},
         "kn": {"title": "2-ಪದಗಳ ವಾಕ್ಯಗಳು", "desc": "ಎರಡು ಪದಗಳನ್ನು ಒಟ್ಟಿಗೆ ಸೇರಿಸುತ್ತದೆ"}
     },
@@ -142,7 +156,8 @@ for data in templates_data:
         title_en=data['title'],
         description=data['desc'],
         description_en=data['desc'],
-        expected_age_months=data['age']
+        expected_age_months=data['age'],
+        domain=data.get('domain', '')
     )
     
     # 2. Add Hindi
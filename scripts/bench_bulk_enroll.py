@@ -0,0 +1,98 @@
+"""
+Benchmark: enrolling 1,000 children with their milestones.
+
+"before" saves each child and then calls get_or_create once per template, as
+ChildViewSet.perform_create used to; "after" goes through ChildViewSet.enroll
+(one batched bulk_create for all milestones plus one summary rebuild). Both
+runs happen inside a transaction that is rolled back, so the database is left
+as it was.
+
+    python scripts/bench_bulk_enroll.py [count]
+"""
+import datetime
+import os
+import sys
+import time
+
+import django
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appeal_backend.settings')
+django.setup()
+
+from django.db import connection, transaction
+
+from clinical.models import ChildMilestone, ChildStatusSummary, MilestoneTemplate
+from patients.models import Caregiver
+from patients.serializers import ChildSerializer
+from patients.views import ChildViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def payload(caregiver, count):
+    dob = (datetime.date.today() - datetime.timedelta(days=200)).isoformat()
+    return [
+        {'caregiver': str(caregiver.id), 'first_name': f'Bench {i}', 'last_name': 'Child', 'sex': 'F', 'date_of_birth': dob}
+        for i in range(count)
+    ]
+
+
+def legacy_enroll(data):
+    templates = MilestoneTemplate.objects.all()
+    for item in data:
+        serializer = ChildSerializer(data=item)
+        serializer.is_valid(raise_exception=True)
+        child = serializer.save()
+        for t in templates:
+            ChildMilestone.objects.get_or_create(child=child, template=t)
+        ChildStatusSummary.objects.refresh_for_child(child.id)
+
+
+def bulk_enroll(data):
+    serializer = ChildSerializer(data=data, many=True)
+    serializer.is_valid(raise_exception=True)
+    ChildViewSet().enroll(serializer)
+
+
+def measure(label, enroll, count):
+    try:
+        with transaction.atomic():
+            caregiver = Caregiver.objects.create(first_name='Bench', last_name='Caregiver')
+            data = payload(caregiver, count)
+            queries = QueryCounter()
+            with connection.execute_wrapper(queries):
+                start = time.perf_counter()
+                enroll(data)
+                elapsed = time.perf_counter() - start
+            milestones = ChildMilestone.objects.filter(child__caregiver=caregiver).count()
+            raise Rollback
+    except Rollback:
+        pass
+    print(f"{label}: {elapsed:.2f}s, {queries.count} queries, {milestones} milestones")
+    return elapsed
+
+
+def run(count=1000):
+    templates = MilestoneTemplate.objects.count()
+    print(f"Enrolling {count} children with {templates} templates")
+    before = measure('before', legacy_enroll, count)
+    after = measure('after', bulk_enroll, count)
+    print(f"{before / after:.1f}x faster")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: per-request cost of building the caregiver UI strings.
+
+"before" rebuilds the dicts with the per-request language conditionals the
+dashboard and timeline views used; "after" looks them up in the precompiled
+catalog (caregiver_app.strings).
+
+    python scripts/bench_ui_strings.py
+"""
+import os
+import sys
+import timeit
+
+import django
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appeal_backend.settings')
+django.setup()
+
+from django.utils import translation
+from django.utils.translation import get_language
+
+from caregiver_app.strings import active_language, catalog, get_strings
+
+
+def legacy_dashboard_strings(lang):
+    is_hindi = lang and lang.startswith('hi')
+    is_kannada = lang and lang.startswith('kn')
+
+    strings = {
+        'months': "ತಿಂಗಳುಗಳು" if is_kannada else ("महीने" if is_hindi else "months"),
+        'years': "ವರ್ಷಗಳು" if is_kannada else ("साल" if is_hindi else "years"),
+        'yrs': "ವರ್ಷ" if is_kannada else ("साल" if is_hindi else "yrs"),
+        'mo': "ತಿಂಗಳು" if is_kannada else ("महीने" if is_hindi else "mo"),
+        'tasks_pending': "ಕಾರ್ಯಗಳು ಬಾಕಿ ಇವೆ" if is_kannada else ("कार्य लंबित" if is_hindi else "tasks pending"),
+        'in_review': "ಪರಿಶೀಲನೆಯಲ್ಲಿದೆ" if is_kannada else ("समीक्षा में" if is_hindi else "In Review"),
+        'none_pending': "ಯಾವುದೂ ಬಾಕಿ ಇಲ್ಲ" if is_kannada else ("कोई लंबित नहीं" if is_hindi else "None pending"),
+        'doctor_review': "ವೈದ್ಯರ ಪರಿಶೀಲನೆ ನಡೆಯುತ್ತಿದೆ" if is_kannada else ("डॉक्टर समीक्षा जारी" if is_hindi else "Doctor review ongoing"),
+        'hello': "ನಮಸ್ಕಾರ" if is_kannada else ("नमस्ते" if is_hindi else "Hello"),
+    }
+    return strings
+
+
+def legacy_timeline_strings(lang):
+    is_hindi = lang and lang.startswith('hi')
+    is_kannada = lang and lang.startswith('kn')
+
+    strings = {
+        'joined': "APPEAL ಸೇರಿದರು" if is_kannada else ("APPEAL में शामिल हुए" if is_hindi else "Joined APPEAL"),
+        'reg_complete': "ನೋಂದಣಿ ಪೂರ್ಣಗೊಂಡಿದೆ" if is_kannada else ("सत्यापन पूर्ण" if is_hindi else "Registration complete"),
+        'checkup': "ತಪಾಸಣೆ" if is_kannada else ("जांच" if is_hindi else "Check-up"),
+        'home_visit': "ಮನೆ ಭೇಟಿ" if is_kannada else ("गृह भेंट" if is_hindi else "Home Visit"),
+        'checks_performed': "ತಪಾಸಣೆ ಮಾಡಲಾಗಿದೆ" if is_kannada else ("जांच की गई" if is_hindi else "checks performed"),
+        'achieved': "ಸಾಧಿಸಲಾಗಿದೆ: " if is_kannada else ("प्राप्त किया: " if is_hindi else "Achieved: "),
+        'milestone_comp': "ಮೈಲಿಗಲ್ಲು ಪೂರ್ಣಗೊಂಡಿದೆ" if is_kannada else ("महीने में मील का पत्थर पूरा हुआ" if is_hindi else "Milestone completed at"),
+        'months': "ತಿಂಗಳುಗಳು" if is_kannada else ("महीने" if is_hindi else "months"),
+        'needs_retry': "ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ: " if is_kannada else ("पुनः प्रयास करें: " if is_hindi else "Needs Retry: "),
+        'retry_desc': "ವೀಡಿಯೊ ಗುಣಮಟ್ಟದ ಸಮಸ್ಯೆ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ." if is_kannada else ("वीडियो की गुणवत्ता में समस्या। कृपया पुन: प्रयास करें।" if is_hindi else "Video quality issues. Please try again."),
+        'in_review': "ಪರಿಶೀಲನೆಯಲ್ಲಿದೆ: " if is_kannada else ("समीक्षा में: " if is_hindi else "In Review: "),
+        'ai_analyzing': "AI ವಿಶ್ಲೇಷಿಸುತ್ತಿದೆ..." if is_kannada else ("एआई विश्लेषण कर रहा है..." if is_hindi else "AI Analyzing..."),
+        'dr_reviewing': "ವೈದ್ಯರು ಪರಿಶೀಲಿಸುತ್ತಿದ್ದಾರೆ..." if is_kannada else ("डॉक्टर समीक्षा कर रहे हैं..." if is_hindi else "Dr. Reviewing..."),
+        'verify': "ಪರಿಶೀಲಿಸಿ" if is_kannada else ("सत्यापित करें" if is_hindi else "Verify"),
+        'is_child': "ಏನು" if is_kannada else ("क्या" if is_hindi else "Check if"),
+        'action_desc': "ಹಾಗೆ ವರ್ತಿಸುತ್ತಿದೆಯೇ? AI ವಿಶ್ಲೇಷಣೆಗಾಗಿ ವೀಡಿಯೊ ರೆಕಾರ್ಡ್ ಮಾಡಿ." if is_kannada else ("जैसा व्यवहार कर रहा है? एआई विश्लेषण के लिए एक वीडियो रिकॉर्ड करें।" if is_hindi else ". Record a video for AI analysis."),
+        'caught_up': "ಎಲ್ಲವೂ ಮುಗಿದಿದೆ!" if is_kannada else ("सब ठीक है!" if is_hindi else "All Caught Up!"),
+        'doing_great': "ಅತ್ಯುತ್ತಮವಾಗಿದೆ. ಯಾವುದೇ ಬಾಕಿ ಇಲ್ಲ." if is_kannada else ("बहुत अच्छा कर रहा है। कोई लंबित कार्य नहीं।" if is_hindi else "is doing great. No pending actions."),
+        'view_history': "ಇತಿಹಾಸ ವೀಕ್ಷಿಸಿ" if is_kannada else ("इतिहास देखें" if is_hindi else "View History"),
+        'start_recording': "ರೆಕಾರ್ಡಿಂಗ್ ಪ್ರಾರಂಭಿಸಿ" if is_kannada else ("रिकॉर्डिंग शुरू करें" if is_hindi else "Start Recording"),
+    }
+    return strings
+
+
+# Both variants resolve the active language once per request, as the views do
+
+
+def catalog_strings():
+    lang = active_language()
+    return get_strings('dashboard', lang), get_strings('timeline', lang)
+
+
+def legacy_strings():
+    lang = get_language()
+    return legacy_dashboard_strings(lang), legacy_timeline_strings(lang)
+
+
+def run(number=100000):
+    catalog()  # loaded once per process, like on the first request
+    for lang in ('en', 'hi', 'kn'):
+        with translation.override(lang):
+            assert legacy_strings() == catalog_strings(), lang
+            before = timeit.timeit(legacy_strings, number=number) / number * 1e6
+            after = timeit.timeit(catalog_strings, number=number) / number * 1e6
+            print(f"{lang}: before {before:.2f} us/request, after {after:.2f} us/request ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    run()